@@ -0,0 +1,174 @@
+# analytics.py
+"""
+포트폴리오 성과 지표를 벡터 연산으로 계산합니다.
+
+모든 함수는 (날짜 x 포트폴리오) 평가액 행렬 또는 1차원 평가액 배열을 받습니다.
+- 롤링 CAGR: 모든 구간의 시작/끝 위치를 한 번에 구해 계산합니다.
+- 낙폭: 누적 최고점과 최고점 위치를 한 번 훑어서 구하고, 낙폭 구간(최고점/저점/회복)도 함께 구합니다.
+- 수익률 지표: 정기 투자금 입금을 뺀 기간 수익률(시간가중)로 CAGR/변동성/샤프/소르티노/칼마 비율을 계산합니다.
+"""
+import numpy as np
+import pandas as pd
+
+DAYS_PER_YEAR = 365.25
+FREQ_ALIASES = {'Y': 'YE', 'A': 'YE', 'Q': 'QE', 'M': 'ME'}
+
+def _as_matrix(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(len(values), -1)
+
+_scalar_pow = np.frompyfunc(pow, 2, 1)
+
+def _days(dates):
+    """DatetimeIndex 를 첫 날짜로부터의 경과 일수(int64) 배열로 변환합니다."""
+    return (pd.DatetimeIndex(dates) - pd.DatetimeIndex(dates)[:1].repeat(len(dates))).days.to_numpy(dtype=np.int64)
+
+def underwater(values):
+    """평가액의 누적 최고점 대비 낙폭((값 - 최고점) / 최고점) 을 같은 모양으로 반환합니다."""
+    matrix = _as_matrix(values)
+    running_peak = np.maximum.accumulate(matrix, axis=0)
+    drawdown = (matrix - running_peak) / running_peak
+    return drawdown.reshape(np.shape(values))
+
+def peak_positions(values):
+    """각 날짜의 누적 최고점에 처음 도달한 위치 배열을 반환합니다. (values 와 같은 모양)"""
+    matrix = _as_matrix(values)
+    previous_peak = np.vstack((np.full((1, matrix.shape[1]), -np.inf), np.maximum.accumulate(matrix, axis=0)[:-1]))
+    new_high = matrix > previous_peak
+    positions = np.where(new_high, np.arange(len(matrix))[:, None], 0)
+    return np.maximum.accumulate(positions, axis=0).reshape(np.shape(values))
+
+def max_drawdown(values):
+    """
+    포트폴리오별 최대 낙폭을 (낙폭, 최고점 위치, 저점 위치) 배열로 반환합니다.
+
+    저점은 최대 낙폭이 처음 나타난 날, 최고점은 그 저점의 누적 최고점에 처음 도달한 날입니다.
+    """
+    matrix = _as_matrix(values)
+    drawdown = underwater(matrix)
+    trough = np.argmin(drawdown, axis=0)
+    columns = np.arange(matrix.shape[1])
+    return drawdown[trough, columns], peak_positions(matrix)[trough, columns], trough
+
+def drawdown_episodes(values, dates):
+    """
+    한 포트폴리오의 낙폭 구간 목록을 반환합니다.
+
+    구간은 최고점 이후 평가액이 최고점 아래로 내려간 때부터 최고점을 회복할 때까지이며,
+    각 항목은 {drawdown, peak_date, trough_date, recovery_date, duration_days, recovery_days} 입니다.
+    아직 회복하지 못한 구간은 recovery_date/recovery_days 가 None 이고 duration_days 는 마지막 날까지입니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    dates = pd.DatetimeIndex(dates)
+    drawdown = underwater(values)
+    below = drawdown < 0
+    if not below.any():
+        return []
+
+    # 최고점 아래에 있는 연속 구간의 [시작, 끝) 위치
+    edges = np.diff(np.concatenate(([0], below.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    # 구간별 최저 낙폭과 그 첫 위치
+    lowest = np.minimum.reduceat(drawdown, starts)
+    segment = np.cumsum(edges[:-1] == 1) - 1
+    hits = np.flatnonzero(below & (drawdown == lowest[np.maximum(segment, 0)]))
+    _, first_hit = np.unique(segment[hits], return_index=True)
+    troughs = hits[first_hit]
+    peaks = peak_positions(values)[starts - 1]
+
+    days = _days(dates)
+    recovered = ends < len(values)
+    recovery = np.where(recovered, ends, len(values) - 1)
+    date_strings = dates.strftime('%Y-%m-%d')
+    return [{
+        "drawdown": float(lowest[k]),
+        "peak_date": date_strings[peaks[k]],
+        "trough_date": date_strings[troughs[k]],
+        "recovery_date": date_strings[recovery[k]] if recovered[k] else None,
+        "duration_days": int(days[recovery[k]] - days[peaks[k]]),
+        "recovery_days": int(days[recovery[k]] - days[troughs[k]]) if recovered[k] else None,
+    } for k in range(len(starts))]
+
+def rolling_windows(dates, window_years, step_freq):
+    """
+    롤링 구간의 (시작 위치, 끝 위치) 배열을 반환합니다.
+
+    시작 기준일은 step_freq 간격의 리샘플링 구간 라벨이고, 끝 기준일은 그로부터 window_years 년 뒤입니다.
+    각 기준일 이후 첫 평가일을 실제 시작/끝으로 하며, 끝 기준일이 마지막 평가일을 넘는 구간은 제외합니다.
+    """
+    dates = pd.DatetimeIndex(dates)
+    base_freq = ''.join(filter(str.isalpha, step_freq))
+    if base_freq in FREQ_ALIASES:
+        step_freq = step_freq.replace(base_freq, FREQ_ALIASES[base_freq])
+
+    start_dates = pd.Series(0.0, index=dates).resample(step_freq).first().index
+    end_dates = start_dates + pd.DateOffset(years=window_years)
+    keep = end_dates <= dates[-1]
+    return dates.searchsorted(start_dates[keep], side='left'), dates.searchsorted(end_dates[keep], side='left')
+
+def rolling_cagr(values, dates, window_years, step_freq):
+    """
+    모든 롤링 구간의 CAGR 을 한 번에 계산하여 (시작 위치, 끝 위치, CAGR 행렬) 을 반환합니다.
+
+    CAGR 행렬은 (구간 x 포트폴리오) 이며, 시작 평가액이 0 이하이거나 기간이 0 인 구간은 NaN 입니다.
+    """
+    matrix = _as_matrix(values)
+    start, end = rolling_windows(dates, window_years, step_freq)
+    days = _days(dates)
+    years = ((days[end] - days[start]) / DAYS_PER_YEAR)[:, None]
+    start_values, end_values = matrix[start], matrix[end]
+    valid = (start_values > 0) & (years > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio, exponent = np.broadcast_arrays(end_values / start_values, 1 / years)
+    # 거듭제곱만 원소별 C pow 로 계산합니다. (배열 np.power 의 SIMD 구현은 마지막 자리가 다를 수 있음)
+    growth = _scalar_pow(np.where(valid, ratio, 1.0), np.where(valid, exponent, 1.0)).astype(np.float64)
+    return start, end, np.where(valid, growth - 1, np.nan)
+
+def period_returns(values, total_investment=None):
+    """
+    평가일 간 수익률 행렬((날짜 - 1) x 포트폴리오) 을 반환합니다.
+
+    total_investment 가 주어지면 그 증가분(정기 투자 입금)을 평가액에서 빼고 계산하는 시간가중 수익률입니다.
+    """
+    matrix = _as_matrix(values)
+    deposits = np.diff(_as_matrix(total_investment), axis=0) if total_investment is not None else 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (matrix[1:] - deposits) / matrix[:-1] - 1
+
+def performance_metrics(values, dates, total_investment=None, risk_free_rate=0.0):
+    """
+    포트폴리오별 성과 지표를 {지표 이름: 배열} 로 반환합니다.
+
+    - cagr: 시간가중 수익률의 연환산 값
+    - volatility: 기간 수익률 표준편차의 연환산 값
+    - sharpe / sortino: (연환산 평균 수익률 - 무위험 수익률) / 변동성 (소르티노는 하방 변동성)
+    - calmar: cagr / |최대 낙폭|
+    - mdd: 최대 낙폭
+    연환산 횟수는 평가일 수와 전체 기간으로 정하며, 계산할 수 없는 값은 NaN 입니다.
+    """
+    matrix = _as_matrix(values)
+    days = _days(dates)
+    years = days[-1] / DAYS_PER_YEAR if len(days) else 0.0
+    returns = period_returns(matrix, total_investment)
+    periods_per_year = len(returns) / years if years > 0 else np.nan
+    mdd = underwater(matrix).min(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.prod(1 + returns, axis=0)
+        cagr = growth ** (1 / years) - 1 if years > 0 else np.full(matrix.shape[1], np.nan)
+        mean_return = returns.mean(axis=0) * periods_per_year if len(returns) else np.full(matrix.shape[1], np.nan)
+        volatility = returns.std(axis=0, ddof=1) * np.sqrt(periods_per_year) if len(returns) > 1 else np.full(matrix.shape[1], np.nan)
+        excess = returns - risk_free_rate / periods_per_year
+        downside = np.sqrt((np.minimum(excess, 0) ** 2).mean(axis=0) * periods_per_year) if len(returns) else np.full(matrix.shape[1], np.nan)
+        sharpe = np.where(volatility > 0, (mean_return - risk_free_rate) / volatility, np.nan)
+        sortino = np.where(downside > 0, (mean_return - risk_free_rate) / downside, np.nan)
+        calmar = np.where(mdd < 0, cagr / -mdd, np.nan)
+    return {"cagr": cagr, "volatility": volatility, "sharpe": sharpe, "sortino": sortino, "calmar": calmar, "mdd": mdd}
+
+def metrics_frame(values, dates, total_investment=None, risk_free_rate=0.0, names=None):
+    """performance_metrics 결과를 (포트폴리오 x 지표) DataFrame 으로 반환합니다."""
+    return pd.DataFrame(performance_metrics(values, dates, total_investment, risk_free_rate), index=names)
+
+def metrics_dict(metrics, column=0):
+    """performance_metrics 결과에서 한 포트폴리오의 지표를 JSON 으로 보낼 수 있는 딕셔너리로 꺼냅니다. (NaN 은 None)"""
+    return {name: (float(array[column]) if np.isfinite(array[column]) else None) for name, array in metrics.items()}
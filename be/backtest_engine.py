@@ -1,39 +1,62 @@
 # backtest_engine.py
 import sys
+import time
+import numpy as np
 import pandas as pd
-from config import STRATEGY_ASSETS, BUY_COMMISSION_RATE
+from config import STRATEGY_ASSETS, DAILY_DATA_STRATEGIES
 from data_handler import load_data, prepare_strategy_data
-from strategies import decide_haa_portfolio, decide_daa_portfolio, decide_laa_portfolio
-from portfolio_manager import execute_rebalancing, evaluate_portfolio_state, execute_periodic_buy, get_active_target_weights
+from strategies import strategy_target_weights
+from portfolio_manager import (
+    make_ticker_index, price_matrix, target_arrays, row_targets, get_active_target_weights, execute_initial_buy,
+    execute_rebalancing, execute_periodic_buy, evaluate_portfolio_state, evaluation_frame,
+)
 from reporting import calculate_mdd, calculate_rolling_returns
+from analytics import performance_metrics, metrics_dict, drawdown_episodes
+from trade_journal import TradeJournal, SUMMARY, HOLD
+from instrumentation import StageTimings, LOAD_DATA, PREPARE_STRATEGY_DATA, SIMULATE, ANALYTICS, BUILD_RESPONSE
 
-def run_backtest(params: dict):
-    """파라미터를 받아 백테스트를 실행하고 모든 결과를 딕셔너리로 반환합니다."""
-    
-    # --- 1. 파라미터 추출 및 설정 ---
+def resolve_universe(params: dict):
+    """전략/종목 파라미터로 (전체 종목 집합, 기본 전략 목표 비중) 을 결정합니다."""
+    strategy, stocks = params['strategy'], params['stocks']
+    if strategy == 'default':
+        if not stocks or len(stocks) < 2 or len(stocks) % 2 != 0:
+            raise ValueError("기본(default) 전략을 사용하려면 stocks에 티커와 비중을 쌍으로 입력해야 합니다.")
+        return set(stocks[::2]), {t: float(w) for t, w in zip(stocks[::2], stocks[1::2])}
+    assets = STRATEGY_ASSETS[strategy]
+    return set.union(*[set(v) for v in assets.values()]), {}
+
+def load_backtest_data(db_path, all_tickers, start_date, strategy, timings=None):
+    """
+    시세를 읽고 전략 지표를 계산하여 (stock_data, monthly_prices, momentum_data, daily_data) 를 반환합니다.
+
+    timings(StageTimings) 가 주어지면 load_data / prepare_strategy_data 단계 시간과 읽은 행(날짜) 수, 값 수를 기록합니다.
+    """
+    timings = timings or StageTimings()
+    # 평가일은 항상 월말이므로 일별 지표가 필요 없는 전략은 월말 종가만 읽습니다.
+    needs_daily = strategy in DAILY_DATA_STRATEGIES
+    with timings.stage(LOAD_DATA):
+        stock_data = load_data(db_path, all_tickers, start_date, frequency="daily" if needs_daily else "monthly")
+    timings.count(LOAD_DATA, rows=len(stock_data), values=stock_data.size)
+    with timings.stage(PREPARE_STRATEGY_DATA):
+        monthly_prices, momentum_data, daily_data = prepare_strategy_data(stock_data, include_daily=needs_daily, db_path=db_path)
+    return stock_data, monthly_prices, momentum_data, daily_data
+
+def simulate(params: dict, tickers, original_target_weights, data, progress=None):
+    """
+    준비된 데이터로 시뮬레이션을 실행하고 (numeric_df, journal) 을 반환합니다.
+
+    tickers 는 배열 위치를 정하는 종목 순서입니다. 평가일이 없으면 numeric_df 는 None 입니다.
+    progress 가 주어지면 평가일마다 progress(완료한 평가일 수, 전체 평가일 수) 를 호출합니다.
+    거래 기록 수준은 params['log_level'] (off/summary/trades/debug, 기본 debug) 입니다.
+    """
     strategy = params['strategy']
     start_date = params['start_date']
     end_date = params['end_date']
-    db_path = params['db_path']
     capital = params['capital']
-    stocks = params['stocks']
     no_rebalance = params['no_rebalance']
-    
-    if strategy == 'default':
-        if not stocks or len(stocks) < 2 or len(stocks) % 2 != 0:
-            raise ValueError("기본(default) 전략을 사용하려면 stocks에 티커와 비중을 쌍으로 입력해야 합니다.")
-        all_tickers = set(stocks[::2])
-        original_target_weights = {t: float(w) for t, w in zip(stocks[::2], stocks[1::2])}
-    else:
-        assets = STRATEGY_ASSETS[strategy]
-        all_tickers = set.union(*[set(v) for v in assets.values()])
-        original_target_weights = {}
+    stock_data, monthly_prices, momentum_data, daily_data = data
 
-    # --- 2. 데이터 준비 ---
-    stock_data = load_data(db_path, all_tickers, start_date)
-    monthly_prices, momentum_data, daily_data = prepare_strategy_data(stock_data)
-
-    # --- 3. 시뮬레이션 기간 설정 ---
+    # --- 1. 시뮬레이션 기간 설정 ---
     sim_start_date = pd.to_datetime(start_date)
     sim_end_date = pd.to_datetime(end_date) if end_date else monthly_prices.index[-1]
     
@@ -42,84 +65,179 @@ def run_backtest(params: dict):
     evaluation_dates = monthly_prices.index[sorted(list(set(date_indices)))]
     evaluation_dates = evaluation_dates[(evaluation_dates >= sim_start_date) & (evaluation_dates <= sim_end_date)]
 
-    # --- 4. 시뮬레이션 실행 ---
+    # --- 2. 시뮬레이션 실행 ---
+    # 종목 순서를 고정하고 보유 수량/가격/평가 결과를 배열로 관리합니다.
+    ticker_index = make_ticker_index(tickers)
+    prices_by_date = price_matrix(stock_data, tickers)
+    price_rows = stock_data.index.searchsorted(evaluation_dates, side='right') - 1
+    if strategy == 'default':
+        original_positions, original_weights = target_arrays(original_target_weights, ticker_index)
+    else:
+        # 전 평가일의 목표 비중/매매 순서를 한 번에 계산
+        target_weights, target_order = strategy_target_weights(strategy, evaluation_dates, stock_data, monthly_prices, momentum_data, daily_data)
+        weight_matrix = target_weights.reindex(columns=tickers, fill_value=0.0).to_numpy(dtype=np.float64)
+        order_matrix = target_order.reindex(columns=tickers, fill_value=-1).to_numpy()
+
+    n_dates, n_tickers = len(evaluation_dates), len(tickers)
     cash = capital
-    holdings = {ticker: 0 for ticker in all_tickers}
+    holdings = np.zeros(n_tickers, dtype=np.int64)
     total_investment = capital
-    results = []
-    logs = []
+    # 누적 투자금은 capital/periodic_investment 의 자료형(정수 입력이면 정수)을 유지하도록 목록으로 기록합니다.
+    cash_history, investment_history = np.empty(n_dates), []
+    holdings_history = np.empty((n_dates, n_tickers), dtype=np.int64)
+    value_history, weight_history = np.empty((n_dates, n_tickers)), np.empty((n_dates, n_tickers))
+    journal = TradeJournal(params.get('log_level') or 'debug', evaluation_dates, tickers)
 
     for i, date in enumerate(evaluation_dates):
-        logs.append({"date": date.strftime('%Y-%m-%d'), "type": "EVALUATION_START"})
+        journal.start_date(i)
         
         if i > 0 and params['periodic_investment'] > 0:
             cash += params['periodic_investment']
             total_investment += params['periodic_investment']
-            logs.append({"date": date.strftime('%Y-%m-%d'), "type": "DEPOSIT", "amount": params['periodic_investment']})
+            journal.deposit(params['periodic_investment'], cash)
             
-        current_prices = stock_data.loc[stock_data.index.asof(date)]
+        prices = prices_by_date[price_rows[i]]
         
-        target_portfolio = {}
-        if strategy == 'default': target_portfolio = get_active_target_weights(original_target_weights, current_prices)
-        elif strategy == 'haa': target_portfolio = decide_haa_portfolio(date, monthly_prices, momentum_data)
-        elif strategy == 'daa': target_portfolio = decide_daa_portfolio(date, momentum_data)
-        elif strategy == 'laa': target_portfolio = decide_laa_portfolio(date, current_prices, daily_data)
+        if strategy == 'default': positions, weights = get_active_target_weights(original_positions, original_weights, prices)
+        else: positions, weights = row_targets(weight_matrix[i], order_matrix[i])
         
-        if not target_portfolio:
-            logs.append({"date": date.strftime('%Y-%m-%d'), "type": "INFO", "message": "목표 포트폴리오를 결정할 수 없어 현재 상태 유지"})
+        if len(positions) == 0:
+            journal.info(HOLD, dated=True)
         else:
             if i == 0:
-                initial_portfolio_value = cash
-                for ticker, weight in target_portfolio.items():
-                    price = current_prices.get(ticker)
-                    if price is not None and price > 0:
-                        allocation = initial_portfolio_value * weight
-                        shares = int(allocation / (price * (1 + BUY_COMMISSION_RATE)))
-                        if shares > 0:
-                            base_cost, commission = shares * price, (shares * price) * BUY_COMMISSION_RATE
-                            total_cost = base_cost + commission
-                            if cash >= total_cost:
-                                holdings[ticker], cash = shares, cash - total_cost
-                                logs.append({"date": date.strftime('%Y-%m-%d'), "type": "TRANSACTION", "action": "BUY", "ticker": ticker, "shares": shares, "price": price, "amount": base_cost, "fee": commission})
+                holdings, cash = execute_initial_buy(holdings, cash, positions, weights, prices, journal)
             else:
                 if strategy == 'default' and no_rebalance:
-                    holdings, cash = execute_periodic_buy(holdings.copy(), cash, original_target_weights, current_prices, logs)
+                    holdings, cash = execute_periodic_buy(holdings, cash, original_positions, original_weights, prices, journal)
                 else:
-                    holdings, cash = execute_rebalancing(holdings.copy(), cash, target_portfolio, current_prices, logs)
+                    holdings, cash = execute_rebalancing(holdings, cash, positions, weights, prices, journal)
         
-        eval_result = evaluate_portfolio_state(date, holdings, cash, current_prices, all_tickers)
-        eval_result['Total Investment'] = total_investment
-        results.append(eval_result)
+        value_history[i], weight_history[i] = evaluate_portfolio_state(holdings, prices)
+        holdings_history[i], cash_history[i] = holdings, cash
+        investment_history.append(total_investment)
+        if progress is not None: progress(i + 1, n_dates)
         
-    # --- 5. 최종 결과 집계 ---
-    if not results:
-        return {"error": "시뮬레이션 결과가 없습니다."}
+    # --- 3. 평가 결과 집계 ---
+    if n_dates == 0:
+        return None, journal
 
-    numeric_df = pd.DataFrame(results).fillna(0)
+    numeric_df = evaluation_frame(
+        evaluation_dates, tickers, cash_history, holdings_history, prices_by_date[price_rows],
+        value_history, weight_history, np.asarray(investment_history),
+    ).fillna(0)
     numeric_df['Date'] = pd.to_datetime(numeric_df['Date'])
     numeric_df.set_index('Date', inplace=True)
     
-    value_columns = [f"{t} Value" for t in all_tickers if f"{t} Value" in numeric_df.columns]
+    value_columns = [f"{t} Value" for t in tickers if f"{t} Value" in numeric_df.columns]
     numeric_df["Portfolio Value"] = numeric_df[value_columns].sum(axis=1) + numeric_df["Cash"]
     numeric_df['ROI'] = (numeric_df['Portfolio Value'] - numeric_df['Total Investment']) / numeric_df['Total Investment']
-    
-    # 요약 지표 계산
-    summary_mdd = calculate_mdd(numeric_df)
+    return numeric_df, journal
+
+def run_backtest(params: dict, progress=None, timings=None):
+    """
+    파라미터를 받아 백테스트를 실행하고 모든 결과를 딕셔너리로 반환합니다. (progress 는 simulate 참고)
+
+    timings(StageTimings) 가 주어지면 단계별 시간과 카운터를 기록합니다. 결과에 timings 블록을 붙이는 것은 호출 측의 몫입니다.
+    """
+    timings = timings or StageTimings()
+    all_tickers, original_target_weights = resolve_universe(params)
+    data = load_backtest_data(params['db_path'], all_tickers, params['start_date'], params['strategy'], timings)
+    tickers = list(all_tickers)
+    numeric_df, journal = timed_simulate(params, tickers, original_target_weights, data, timings, progress=progress)
+    return build_result(params, tickers, numeric_df, journal, timings)
+
+def timed_simulate(params: dict, tickers, original_target_weights, data, timings, progress=None):
+    """simulate 를 실행하며 simulate 단계 시간과 평가일 수(rows), 체결 건수(trades)를 기록합니다."""
+    with timings.stage(SIMULATE):
+        numeric_df, journal = simulate(params, tickers, original_target_weights, data, progress=progress)
+    timings.count(SIMULATE, rows=0 if numeric_df is None else len(numeric_df), trades=journal.n_trades)
+    return numeric_df, journal
+
+ROWS_FORMAT, COLUMNAR_FORMAT = 'rows', 'columnar'
+# NDJSON 스트리밍 시 한 줄에 담는 로그/평가일 수
+STREAM_CHUNK_SIZE = 256
+# 요약에 담는 낙폭 구간 수 (깊은 순)
+TOP_DRAWDOWNS = 5
+
+def build_summary(params: dict, numeric_df, journal=None):
+    """
+    최종 평가액/투자금/수익률, MDD, 롤링 리턴, 성과 지표, 주요 낙폭 구간 요약을 만듭니다.
+    (거래 기록이 summary 수준 이상이면 거래 합계 포함)
+    """
     summary_rolling = calculate_rolling_returns(numeric_df, params['rolling_window'], params['rolling_step']) if params['rolling_window'] else None
+    values = numeric_df["Portfolio Value"].to_numpy()
+    metrics = performance_metrics(values, numeric_df.index, numeric_df["Total Investment"].to_numpy())
+    episodes = sorted(drawdown_episodes(values, numeric_df.index), key=lambda episode: episode["drawdown"])
+    summary = {
+        "final_portfolio_value": numeric_df["Portfolio Value"].iloc[-1],
+        "total_investment": numeric_df["Total Investment"].iloc[-1],
+        "final_roi": numeric_df["ROI"].iloc[-1],
+        "mdd": calculate_mdd(numeric_df),
+        "rolling_returns": summary_rolling,
+        "metrics": metrics_dict(metrics),
+        "drawdowns": episodes[:TOP_DRAWDOWNS]
+    }
+    if journal is not None and journal.level >= SUMMARY:
+        summary["trades"] = journal.summary()
+    return summary
+
+def result_rows(numeric_df, tickers, start=0, stop=None):
+    """평가일별 결과를 {date, portfolio_value, ..., assets: {종목: {...}}} 목록으로 만듭니다. (iterrows 없이 열 배열에서 생성)"""
+    frame = numeric_df.iloc[start:stop]
+    # iterrows 와 같게 모든 값을 float 로 내보냅니다.
+    column = lambda name: frame[name].to_numpy(dtype=np.float64).tolist()
+    dates = frame.index.strftime('%Y-%m-%d').tolist()
+    portfolio_value, total_investment, roi, cash = column("Portfolio Value"), column("Total Investment"), column("ROI"), column("Cash")
+    assets = [(t, column(f"{t} Holdings"), column(f"{t} Price"), column(f"{t} Value"), column(f"{t} Weight")) for t in tickers]
+    return [{
+        "date": dates[k],
+        "portfolio_value": portfolio_value[k],
+        "total_investment": total_investment[k],
+        "roi": roi[k],
+        "cash": cash[k],
+        "assets": {t: {"holdings": holdings[k], "price": price[k], "value": value[k], "weight": weight[k]} for t, holdings, price, value, weight in assets}
+    } for k in range(len(dates))]
+
+def result_columns(numeric_df, tickers, start=0, stop=None):
+    """평가일별 결과를 필드/종목별 배열로 만듭니다. (columnar 형식)"""
+    frame = numeric_df.iloc[start:stop]
+    return {
+        "dates": frame.index.strftime('%Y-%m-%d').tolist(),
+        "portfolio_value": frame["Portfolio Value"].tolist(),
+        "total_investment": frame["Total Investment"].tolist(),
+        "roi": frame["ROI"].tolist(),
+        "cash": frame["Cash"].tolist(),
+        "assets": {t: {
+            "holdings": frame[f"{t} Holdings"].tolist(), "price": frame[f"{t} Price"].tolist(),
+            "value": frame[f"{t} Value"].tolist(), "weight": frame[f"{t} Weight"].tolist(),
+        } for t in tickers},
+    }
+
+def build_result(params: dict, tickers, numeric_df, journal, timings=None):
+    """
+    simulate 결과로 API 응답 딕셔너리를 만듭니다.
+
+    기본(rows) 형식은 요약, 로그, 평가일별 결과, 차트 데이터로 이루어지고,
+    params['response_format'] 이 'columnar' 이면 결과를 필드/종목별 배열로 담고 차트 데이터는 생략합니다.
+    (차트 데이터는 columnar 결과의 dates/portfolio_value/total_investment/roi 와 같습니다.)
+    timings(StageTimings) 가 주어지면 analytics(요약)/build_response(로그/결과 생성) 단계 시간을 기록합니다.
+    """
+    if numeric_df is None:
+        return {"error": "시뮬레이션 결과가 없습니다."}
+
+    timings = timings or StageTimings()
+    with timings.stage(ANALYTICS):
+        summary = build_summary(params, numeric_df, journal)
+    with timings.stage(BUILD_RESPONSE):
+        result = _build_response(params, tickers, numeric_df, journal, summary)
+    timings.count(BUILD_RESPONSE, rows=len(numeric_df), logs=len(result["logs"]))
+    return result
+
+def _build_response(params: dict, tickers, numeric_df, journal, summary):
+    logs = journal.records()
+    if params.get('response_format') == COLUMNAR_FORMAT:
+        return {"format": COLUMNAR_FORMAT, "summary": summary, "logs": logs, "results": result_columns(numeric_df, tickers)}
 
-    # 최종 JSON 구조화
-    final_results = []
-    for date, row in numeric_df.iterrows():
-        assets_data = {t: {"holdings": row[f"{t} Holdings"], "price": row[f"{t} Price"], "value": row[f"{t} Value"], "weight": row[f"{t} Weight"]} for t in all_tickers}
-        final_results.append({
-            "date": date.strftime('%Y-%m-%d'),
-            "portfolio_value": row["Portfolio Value"],
-            "total_investment": row["Total Investment"],
-            "roi": row["ROI"],
-            "cash": row["Cash"],
-            "assets": assets_data
-        })
-    
     chart_data = {
         "labels": numeric_df.index.strftime('%Y-%m-%d').tolist(),
         "datasets": {
@@ -128,18 +246,53 @@ def run_backtest(params: dict):
             "roi": numeric_df["ROI"].tolist()
         }
     }
-
-    final_json = {
-        "summary": {
-            "final_portfolio_value": numeric_df["Portfolio Value"].iloc[-1],
-            "total_investment": numeric_df["Total Investment"].iloc[-1],
-            "final_roi": numeric_df["ROI"].iloc[-1],
-            "mdd": summary_mdd,
-            "rolling_returns": summary_rolling
-        },
+    return {
+        "summary": summary,
         "logs": logs,
-        "results": final_results,
+        "results": result_rows(numeric_df, tickers),
         "chart_data": chart_data
     }
-    
-    return final_json
+
+def stream_backtest(params: dict, chunk_size=STREAM_CHUNK_SIZE, timings=None):
+    """
+    백테스트를 실행하고 결과를 NDJSON 한 줄에 해당하는 딕셔너리로 차례대로 내보냅니다.
+
+    순서는 {"type": "summary"}, {"type": "logs"} 묶음들, {"type": "results"} 묶음들, {"type": "end"} 입니다.
+    results 묶음은 response_format 에 따라 행 목록 또는 열 배열이며 내보낼 때 만들어집니다.
+    params['include_timings'] 가 참이면 end 줄에 단계별 timings 를 담습니다. (build_response 는 묶음 생성 시간의 합)
+    오류가 나면 {"type": "error"} 를 내보내고 끝납니다.
+    """
+    timings = timings or StageTimings()
+    try:
+        all_tickers, original_target_weights = resolve_universe(params)
+        data = load_backtest_data(params['db_path'], all_tickers, params['start_date'], params['strategy'], timings)
+        tickers = list(all_tickers)
+        numeric_df, journal = timed_simulate(params, tickers, original_target_weights, data, timings)
+        if numeric_df is None:
+            yield {"type": "error", "error": "시뮬레이션 결과가 없습니다."}
+            return
+        with timings.stage(ANALYTICS):
+            summary = build_summary(params, numeric_df, journal)
+        started = time.perf_counter()
+        logs = journal.records()
+        build_seconds = time.perf_counter() - started
+    except Exception as e:
+        yield {"type": "error", "error": str(e)}
+        return
+
+    columnar = params.get('response_format') == COLUMNAR_FORMAT
+    yield {"type": "summary", "format": COLUMNAR_FORMAT if columnar else ROWS_FORMAT, "summary": summary, "tickers": tickers, "n_logs": len(logs), "n_results": len(numeric_df)}
+    for start in range(0, len(logs), chunk_size):
+        yield {"type": "logs", "data": logs[start:start + chunk_size]}
+    build_chunk = result_columns if columnar else result_rows
+    for start in range(0, len(numeric_df), chunk_size):
+        started = time.perf_counter()
+        chunk = build_chunk(numeric_df, tickers, start, start + chunk_size)
+        build_seconds += time.perf_counter() - started
+        yield {"type": "results", "data": chunk}
+    timings.record(BUILD_RESPONSE, build_seconds)
+    timings.count(BUILD_RESPONSE, rows=len(numeric_df), logs=len(logs))
+    end = {"type": "end"}
+    if params.get('include_timings'):
+        end["timings"] = timings.as_dict()
+    yield end
@@ -0,0 +1,163 @@
+# indicator_cache.py
+
+"""
+prepare_strategy_data 결과(월말 종가, 모멘텀 지표, 일별 지표)의 디스크 캐시.
+
+DB 파일 옆의 '<DB 이름>.indicators' 디렉터리에 (종목 집합, 첫 날짜, 일별 지표 여부)
+별로 한 파일씩 저장하며, 각 파일에는 계산 당시의 데이터 버전(stock_price 의 MAX(rowid))을
+함께 기록합니다.
+- 버전이 같으면 저장된 지표를 그대로 사용합니다.
+- 버전이 바뀌었으면 해당 종목들의 변경분 중 가장 이른 날짜를 찾아, 그 이후 구간만
+  (지표 계산에 필요한 이전 행을 포함하여) 다시 계산하고 앞부분은 캐시를 이어 붙입니다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import pandas as pd
+from price_store import get_data_version
+
+CACHE_FORMAT_VERSION = 1
+# 꼬리 구간을 다시 계산할 때 포함할 이전 구간: roc_12/sma_12_month 는 12개월, sma_200_day 는 199행
+MONTHLY_LOOKBACK_MONTHS = 12
+DAILY_LOOKBACK_ROWS = 199
+MAX_CACHE_FILES = 64
+
+
+def get_cache_dir(db_path):
+    """DB 파일 옆에 위치한 지표 캐시 디렉터리 경로를 반환합니다."""
+    root, _ = os.path.splitext(db_path)
+    return root + ".indicators"
+
+
+def _cache_path(db_path, stock_data, include_daily):
+    key = json.dumps(
+        [
+            CACHE_FORMAT_VERSION,
+            sorted(map(str, stock_data.columns)),
+            str(stock_data.index[0].date()),
+            bool(include_daily),
+        ]
+    )
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(get_cache_dir(db_path), f"{digest}.pkl")
+
+
+def _read_cache(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+
+def _write_cache(path, entry):
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # 같은 키를 동시에 기록하는 스레드/프로세스가 서로의 임시 파일을 건드리지 않도록 이름을 따로 만듭니다.
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pd.to_pickle(entry, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # 오래 사용하지 않은 항목부터 정리하여 파일 수를 제한합니다. (다른 쪽이 먼저 지운 파일은 건너뜀)
+    files = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".pkl"):
+            try:
+                files.append((os.path.getmtime(os.path.join(cache_dir, name)), name))
+            except FileNotFoundError:
+                pass
+    files.sort()
+    for _, name in files[: max(len(files) - MAX_CACHE_FILES, 0)]:
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def _earliest_change(db_path, tickers, since_version, until_version):
+    """since_version 이후 추가/갱신된 행 중 tickers 에 해당하는 가장 이른 날짜를 반환합니다."""
+    with sqlite3.connect(db_path) as con:
+        placeholders = ", ".join("?" for _ in tickers)
+        row = con.execute(
+            f"SELECT MIN(Date) FROM stock_price WHERE rowid > ? AND rowid <= ? AND Symbol IN ({placeholders})",
+            [since_version, until_version] + list(tickers),
+        ).fetchone()
+    return row[0]
+
+
+def _splice(cached, fresh, boundary):
+    """boundary 이전은 캐시 값을, 이후는 새로 계산한 값을 사용합니다."""
+    return pd.concat([cached[cached.index < boundary], fresh[fresh.index >= boundary]])
+
+
+def _update_tail(cached, stock_data, include_daily, changed, compute):
+    """changed 날짜 이후 구간만 다시 계산하여 캐시된 지표에 이어 붙입니다."""
+    monthly_prices, momentum_data, daily_data = cached
+    month_start = changed.to_period("M").to_timestamp()
+    tail_start = month_start - pd.DateOffset(months=MONTHLY_LOOKBACK_MONTHS)
+    if include_daily:
+        changed_row = stock_data.index.searchsorted(changed)
+        tail_start = min(tail_start, stock_data.index[max(changed_row - DAILY_LOOKBACK_ROWS, 0)])
+    if tail_start <= stock_data.index[0]:
+        return compute(stock_data, include_daily)
+
+    fresh_monthly, fresh_momentum, fresh_daily = compute(stock_data[stock_data.index >= tail_start], include_daily)
+    month_boundary = month_start + pd.offsets.MonthEnd(0)
+    monthly_prices = _splice(monthly_prices, fresh_monthly, month_boundary)
+    monthly_prices.index.freq = fresh_monthly.index.freq
+    momentum_data = {name: _splice(frame, fresh_momentum[name], month_boundary) for name, frame in momentum_data.items()}
+    daily_data = {name: _splice(series, fresh_daily[name], changed) for name, series in daily_data.items()}
+    return monthly_prices, momentum_data, daily_data
+
+
+def cached_strategy_data(db_path, stock_data, include_daily, compute):
+    """
+    compute(stock_data, include_daily) 의 결과를 캐시에서 가져오거나 증분 갱신합니다.
+
+    반환값은 compute 와 같은 (monthly_prices, momentum_data, daily_data) 입니다.
+    DB 를 읽을 수 없으면 캐시 없이 compute 를 호출하고, 캐시 파일 기록에 실패해도 결과는 그대로 반환합니다.
+    """
+    if stock_data.empty:
+        return compute(stock_data, include_daily)
+    try:
+        version = get_data_version(db_path)
+    except sqlite3.Error:
+        return compute(stock_data, include_daily)
+
+    path = _cache_path(db_path, stock_data, include_daily)
+    entry = _read_cache(path)
+    last_month = stock_data.index[-1] + pd.offsets.MonthEnd(0)
+    if entry is not None and entry["data_version"] == version and entry["data"][0].index[-1] == last_month:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # 읽은 뒤 다른 쪽에서 정리된 파일
+        return entry["data"]
+
+    result = None
+    if entry is not None and entry["data_version"] < version:
+        changed = _earliest_change(db_path, list(stock_data.columns), entry["data_version"], version)
+        if changed is None:
+            result = entry["data"]
+        else:
+            result = _update_tail(entry["data"], stock_data, include_daily, pd.Timestamp(changed), compute)
+    if result is None or result[0].index[-1] != last_month:
+        result = compute(stock_data, include_daily)
+
+    try:
+        _write_cache(path, {"data_version": version, "data": result})
+    except OSError:
+        pass  # 캐시 기록 실패는 계산 결과에 영향을 주지 않습니다.
+    return result
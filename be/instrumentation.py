@@ -0,0 +1,120 @@
+# instrumentation.py
+"""
+백테스트 단계별 실행 시간과 처리량 계측.
+
+- StageTimings: 요청 하나의 단계별 시간(초)과 카운터(읽은 행 수, 체결 건수 등)를 기록합니다.
+  응답의 timings 블록은 이 기록으로 만듭니다.
+- 모든 기록은 프로세스 전체 집계(METRICS)에도 더해지며, GET /metrics 가 이를 Prometheus 텍스트 형식으로 보냅니다.
+  (프로세스 풀에서 실행되는 배치/작업의 계측은 해당 작업 프로세스에만 남습니다.)
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# 단계 실행 시간 히스토그램 구간 상한(초)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOAD_DATA, PREPARE_STRATEGY_DATA, SIMULATE, ANALYTICS, BUILD_RESPONSE = (
+    "load_data", "prepare_strategy_data", "simulate", "analytics", "build_response",
+)
+
+class Metrics:
+    """프로세스 전체의 단계별 실행 시간 히스토그램과 카운터 합계. 스레드 안전합니다."""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for k, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry["buckets"][k] += 1
+            entry["sum"] += seconds
+            entry["count"] += 1
+
+    def add(self, stage, counter, value):
+        with self.lock:
+            key = (counter, stage)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def render(self, extra=None):
+        """
+        집계를 Prometheus 텍스트 형식으로 만듭니다.
+
+        extra 는 {지표 이름: (유형, 설명, 값)} 으로, 캐시 적중 수처럼 다른 곳에서 관리하는 값을 함께 내보낼 때 사용합니다.
+        """
+        with self.lock:
+            stages = {name: {**entry, "buckets": list(entry["buckets"])} for name, entry in self.stages.items()}
+            counters = dict(self.counters)
+
+        lines = [
+            "# HELP backtest_stage_seconds 백테스트 단계별 실행 시간(초)",
+            "# TYPE backtest_stage_seconds histogram",
+        ]
+        for stage, entry in sorted(stages.items()):
+            for bound, count in zip(self.buckets, entry["buckets"]):
+                lines.append(f'backtest_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'backtest_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {entry["count"]}')
+            lines.append(f'backtest_stage_seconds_sum{{stage="{stage}"}} {entry["sum"]}')
+            lines.append(f'backtest_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+
+        for counter in sorted({counter for counter, _ in counters}):
+            name = f"backtest_stage_{counter}_total"
+            lines += [f"# HELP {name} 백테스트 단계별 {counter} 합계", f"# TYPE {name} counter"]
+            for (key, stage), value in sorted(counters.items()):
+                if key == counter:
+                    lines.append(f'{name}{{stage="{stage}"}} {value}')
+
+        for name, (kind, description, value) in (extra or {}).items():
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+class StageTimings:
+    """요청 하나의 단계별 실행 시간과 카운터. 기록은 metrics(기본: 프로세스 전체 집계) 에도 더해집니다."""
+
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self.stages = {}
+
+    def _entry(self, stage):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {"seconds": 0.0}
+        return entry
+
+    @contextmanager
+    def stage(self, name):
+        """with 블록의 실행 시간을 name 단계에 더합니다. (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        """따로 잰 실행 시간(초)을 name 단계에 더합니다. (여러 구간으로 나뉜 단계를 한 번으로 집계할 때)"""
+        self._entry(name)["seconds"] += seconds
+        self.metrics.observe(name, seconds)
+
+    def count(self, stage, **counters):
+        """stage 단계의 카운터(rows=..., trades=... 등)에 값을 더합니다."""
+        entry = self._entry(stage)
+        for counter, value in counters.items():
+            value = int(value)
+            entry[counter] = entry.get(counter, 0) + value
+            self.metrics.add(stage, counter, value)
+
+    def as_dict(self):
+        """응답의 timings 블록: {total_seconds, stages: {단계: {seconds, 카운터...}}} (단계는 실행 순서)"""
+        return {
+            "total_seconds": sum((entry["seconds"] for entry in self.stages.values()), 0.0),
+            "stages": {name: dict(entry) for name, entry in self.stages.items()},
+        }
@@ -0,0 +1,236 @@
+# jobs.py
+"""
+오래 걸리는 백테스트를 위한 로컬 작업 큐와 디스크 결과 저장소.
+
+- 작업은 로컬 프로세스 풀에서 실행되며 외부 브로커가 필요 없습니다.
+- 작업 상태/진행률/결과는 작업 디렉터리에 '<id>.json'(상태), '<id>.result.json'(결과) 로 저장합니다.
+  작업 프로세스가 직접 상태 파일을 갱신하므로 API 프로세스는 파일만 읽으면 됩니다.
+- 끝난 작업은 TTL 이 지나면 삭제되고, 작업 수/결과 용량이 상한을 넘으면 오래된 것부터 삭제됩니다.
+  (작업 등록 시와, 상태 조회 시 EVICT_INTERVAL 초에 한 번)
+- 작업에는 등록한 프로세스(owner: 호스트, pid)를 기록합니다. 여러 API 프로세스(uvicorn --workers N)가
+  같은 디렉터리를 사용해도, 시작 시에는 등록한 프로세스가 없어진 작업만 실패로 표시합니다.
+"""
+import json
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import backtest_engine
+from instrumentation import StageTimings
+
+JOB_DIR = os.environ.get("BACKTEST_JOB_DIR", "backtest_jobs")
+JOB_TTL_SECONDS = 24 * 3600
+MAX_JOBS = 500
+MAX_RESULT_BYTES = 512 * 1024 * 1024
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# 진행률은 이 간격(초)보다 자주 기록하지 않습니다.
+PROGRESS_INTERVAL = 0.5
+# 상태 조회 시 끝난 작업 정리를 이 간격(초)보다 자주 하지 않습니다.
+EVICT_INTERVAL = 60.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+def json_default(value):
+    # numpy 스칼라(np.int64 등)는 파이썬 값으로, 그 밖의 값(날짜 등)은 문자열로 저장합니다.
+    return value.item() if hasattr(value, "item") else str(value)
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=json_default)
+    os.replace(tmp_path, path)
+
+def _owner():
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+def _owner_alive(owner):
+    """작업을 등록한 프로세스가 살아 있는지. 다른 호스트의 프로세스는 확인할 수 없으므로 살아 있다고 봅니다."""
+    if not owner:
+        return False  # owner 를 기록하기 전 형식의 작업
+    if owner.get("host") != socket.gethostname():
+        return True
+    try:
+        os.kill(owner["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+class JobStore:
+    """작업 상태와 결과를 디렉터리에 저장합니다. 여러 프로세스에서 같은 디렉터리를 열어 사용할 수 있습니다."""
+
+    def __init__(self, directory=JOB_DIR, ttl=JOB_TTL_SECONDS, max_jobs=MAX_JOBS, max_result_bytes=MAX_RESULT_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_result_bytes = max_result_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _status_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _result_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.result.json")
+
+    def create(self, params):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.write(job_id, {"id": job_id, "status": QUEUED, "created": now, "updated": now,
+                            "progress": {"done": 0, "total": None}, "error": None, "params": params,
+                            "owner": _owner()})
+        return job_id
+
+    def write(self, job_id, status):
+        _write_json(self._status_path(job_id), status)
+
+    def update(self, job_id, **fields):
+        status = self.get(job_id)
+        if status is None:
+            return None
+        status.update(fields, updated=time.time())
+        self.write(job_id, status)
+        return status
+
+    def get(self, job_id):
+        # 외부 입력으로 경로를 만들기 때문에 uuid hex 형식만 허용합니다.
+        if len(job_id) != 32 or any(c not in "0123456789abcdef" for c in job_id):
+            return None
+        return _read_json(self._status_path(job_id))
+
+    def set_result(self, job_id, result):
+        _write_json(self._result_path(job_id), result)
+
+    def get_result(self, job_id):
+        return _read_json(self._result_path(job_id))
+
+    def delete(self, job_id):
+        for path in (self._status_path(job_id), self._result_path(job_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # 다른 프로세스가 먼저 정리한 작업
+
+    def jobs(self):
+        jobs = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and not name.endswith(".result.json"):
+                status = _read_json(os.path.join(self.directory, name))
+                if status is not None:
+                    jobs.append(status)
+        return jobs
+
+    def evict(self, now=None):
+        """TTL 이 지난 끝난 작업을 지우고, 작업 수/결과 용량 상한을 넘으면 오래된 끝난 작업부터 지웁니다."""
+        now = time.time() if now is None else now
+        jobs = sorted(self.jobs(), key=lambda job: job["updated"])
+        finished = [job for job in jobs if job["status"] in FINISHED]
+        expired = [job for job in finished if now - job["updated"] > self.ttl]
+        for job in expired:
+            self.delete(job["id"])
+        finished = [job for job in finished if now - job["updated"] <= self.ttl]
+
+        sizes = {}
+        for job in finished:
+            try:
+                sizes[job["id"]] = os.path.getsize(self._result_path(job["id"]))
+            except FileNotFoundError:
+                sizes[job["id"]] = 0
+        n_jobs, total_bytes = len(jobs) - len(expired), sum(sizes.values())
+        for job in finished:
+            if n_jobs <= self.max_jobs and total_bytes <= self.max_result_bytes:
+                break
+            self.delete(job["id"])
+            n_jobs, total_bytes = n_jobs - 1, total_bytes - sizes[job["id"]]
+
+    def fail_unfinished(self, message):
+        """등록한 프로세스가 없어져 끝나지 못한 작업을 실패로 표시합니다. (서버 재시작 시)"""
+        for job in self.jobs():
+            if job["status"] not in FINISHED and not _owner_alive(job.get("owner")):
+                self.update(job["id"], status=FAILED, error=message)
+
+def _run_job(directory, job_id, params):
+    """[작업 프로세스] 백테스트를 실행하며 진행률과 결과를 저장소에 기록합니다."""
+    store = JobStore(directory)
+    store.update(job_id, status=RUNNING, started=time.time())
+    last_write = 0.0
+
+    def progress(done, total):
+        nonlocal last_write
+        now = time.monotonic()
+        if done == total or now - last_write >= PROGRESS_INTERVAL:
+            last_write = now
+            store.update(job_id, progress={"done": done, "total": total})
+
+    timings = StageTimings()
+    try:
+        result = backtest_engine.run_backtest(params, progress=progress, timings=timings)
+    except Exception as e:
+        store.update(job_id, status=FAILED, error=str(e))
+        return
+    if params.get("include_timings"):
+        result["timings"] = timings.as_dict()
+    store.set_result(job_id, result)
+    store.update(job_id, status=DONE, error=result.get("error"))
+
+class JobQueue:
+    """JobStore 에 기록하며 로컬 프로세스 풀에서 백테스트 작업을 실행합니다."""
+
+    def __init__(self, store=None, max_workers=MAX_WORKERS):
+        self.store = store or JobStore()
+        self.store.fail_unfinished("서버가 재시작되어 작업이 중단되었습니다.")
+        self.max_workers = max_workers
+        self.pool = None
+        self.last_evict = 0.0
+
+    def submit(self, params):
+        """작업을 등록하고 바로 작업 ID 를 반환합니다."""
+        self._evict()
+        job_id = self.store.create(params)
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            future = self.pool.submit(_run_job, self.store.directory, job_id, params)
+        except BrokenProcessPool:
+            # 작업 프로세스가 비정상 종료되어 풀을 쓸 수 없으면 새 풀로 다시 시도합니다.
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            future = self.pool.submit(_run_job, self.store.directory, job_id, params)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def _evict(self):
+        self.last_evict = time.monotonic()
+        self.store.evict()
+
+    def _on_done(self, job_id, future):
+        # 작업 프로세스가 비정상 종료된 경우 (예: 메모리 부족) 상태를 실패로 남깁니다.
+        error = future.exception() if not future.cancelled() else None
+        if future.cancelled() or error is not None:
+            self.store.update(job_id, status=FAILED, error=str(error) if error else "작업이 취소되었습니다.")
+
+    def status(self, job_id, include_result=True):
+        """작업 상태(진행률 포함)를 반환합니다. 끝난 작업이면 result 를 함께 담습니다. 없는 작업이면 None."""
+        # 새 작업 등록이 없어도 TTL 이 지난 작업이 정리되도록 합니다.
+        if time.monotonic() - self.last_evict >= EVICT_INTERVAL:
+            self._evict()
+        status = self.store.get(job_id)
+        if status is None:
+            return None
+        if include_result and status["status"] == DONE:
+            status["result"] = self.store.get_result(job_id)
+        return status
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
@@ -1,9 +1,16 @@
 # main_api.py
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException
 from fastapi.middleware.cors import CORSMiddleware  # 1. Middleware 임포트
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import backtest_engine
+import sweep
+import jobs
+import json
+import os
+from instrumentation import METRICS, PROMETHEUS_CONTENT_TYPE, StageTimings
+from result_cache import ResultCache
 
 
 # --- API 요청 파라미터를 위한 Pydantic 모델 정의 ---
@@ -35,6 +42,20 @@ class BacktestParams(BaseModel):
         None, example=3, description="롤링 리턴 기간 (단위: 연)"
     )
     rolling_step: str = Field("1Y", example="1Q", description="롤링 리턴 계산 빈도")
+    log_level: str = Field(
+        "debug",
+        example="trades",
+        description="거래 기록 수준 (off, summary, trades, debug)",
+    )
+    response_format: str = Field(
+        "rows",
+        example="columnar",
+        description="결과 형식 (rows: 평가일별 객체 목록, columnar: 필드/종목별 배열)",
+    )
+    include_timings: bool = Field(
+        False,
+        description="응답에 단계별 실행 시간/카운터(timings)를 포함 (/backtest, /backtest/stream, /jobs)",
+    )
 
 
 app = FastAPI()
@@ -53,6 +74,10 @@ app.add_middleware(
 )
 
 
+# 결과 캐시: BACKTEST_RESULT_CACHE_DIR 가 설정되면 디스크 계층도 사용합니다.
+result_cache = ResultCache(directory=os.environ.get("BACKTEST_RESULT_CACHE_DIR"))
+
+
 @app.get("/")
 def read_root():
     return {"message": "Portfolio Backtest API"}
@@ -67,7 +92,95 @@ def run_backtest_endpoint(params: BacktestParams):
     try:
         # Pydantic 모델을 딕셔너리로 변환하여 백테스트 엔진에 전달
         params_dict = params.dict()
-        results = backtest_engine.run_backtest(params_dict)
+        timings = StageTimings()
+        results = result_cache.get_or_compute(
+            params_dict, lambda p: backtest_engine.run_backtest(p, timings=timings)
+        )
+        if params_dict["include_timings"]:
+            # 캐시에서 꺼낸 결과이면 실행한 단계가 없습니다.
+            results = {**results, "timings": {**timings.as_dict(), "cached": not timings.stages}}
+        return results
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _ndjson_lines(items):
+    for item in items:
+        yield json.dumps(item, ensure_ascii=False, default=jobs.json_default) + "\n"
+
+
+@app.post("/backtest/stream")
+def stream_backtest_endpoint(params: BacktestParams):
+    """
+    백테스트 결과를 NDJSON 으로 스트리밍합니다.
+    summary -> logs 묶음 -> results 묶음 -> end 순서로 한 줄씩 보내므로 클라이언트가 점진적으로 그릴 수 있습니다.
+    """
+    return StreamingResponse(
+        _ndjson_lines(backtest_engine.stream_backtest(params.dict())),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/backtest/batch")
+def run_backtest_batch_endpoint(params_list: List[BacktestParams]):
+    """
+    여러 백테스트를 한 번에 실행하고 결과를 요청 순서대로 반환합니다.
+    같은 종목 구성/DB 의 요청은 데이터를 한 번만 읽고 시뮬레이션은 병렬로 실행합니다.
+    실패한 항목은 {"error": ...} 로 반환되며 나머지 항목에는 영향을 주지 않습니다.
+    """
+    try:
+        params_dicts = [params.dict() for params in params_list]
+        keys = [result_cache.key_for(p) for p in params_dicts]
+        results = [result_cache.get(key) if key else None for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        for i, result in zip(missing, sweep.run_batch([params_dicts[i] for i in missing])):
+            results[i] = result
+            if keys[i] and "error" not in result:
+                result_cache.put(keys[i], result)
         return results
     except Exception as e:
         return {"error": str(e)}
+
+
+_job_queue = None
+
+
+def get_job_queue():
+    """작업 큐를 처음 사용할 때 만듭니다. (작업 디렉터리: BACKTEST_JOB_DIR 환경 변수)"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = jobs.JobQueue()
+    return _job_queue
+
+
+@app.post("/jobs")
+def create_job_endpoint(params: BacktestParams):
+    """백테스트를 로컬 프로세스 풀에 등록하고 바로 작업 ID 를 반환합니다."""
+    return {"job_id": get_job_queue().submit(params.dict())}
+
+
+@app.get("/jobs/{job_id}")
+def get_job_endpoint(job_id: str):
+    """작업 상태(queued/running/done/failed)와 진행률, 완료된 경우 결과를 반환합니다."""
+    status = get_job_queue().status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return status
+
+
+@app.get("/cache/stats")
+def cache_stats_endpoint():
+    """결과 캐시의 적중/실패 횟수와 항목 수를 반환합니다."""
+    return result_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """이 프로세스의 단계별 실행 시간/카운터 집계와 결과 캐시 통계를 Prometheus 텍스트 형식으로 반환합니다."""
+    stats = result_cache.stats()
+    extra = {
+        "backtest_result_cache_hits_total": ("counter", "결과 캐시 적중 수", stats["hits"]),
+        "backtest_result_cache_misses_total": ("counter", "결과 캐시 실패 수", stats["misses"]),
+        "backtest_result_cache_memory_entries": ("gauge", "메모리 캐시 항목 수", stats["memory_entries"]),
+    }
+    return PlainTextResponse(METRICS.render(extra), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,124 +1,179 @@
 # portfolio_manager.py
+import numpy as np
 import pandas as pd
 from config import BUY_COMMISSION_RATE, SELL_TAX_RATE
+from trade_journal import (
+    INITIAL_BUY, REBALANCE_BUY, SELL_ALL, SELL_ADJUST, SWEEP_BUY, PERIODIC_BUY, SWEEP, PERIODIC, STATIC_REBALANCE,
+)
 
-def _normalize_weights(weights):
-    """주어진 가중치 딕셔너리의 합이 1이 되도록 정규화합니다."""
-    if not weights:
-        return {}
-    total_weight = sum(weights.values())
-    if total_weight == 0:
-        return {ticker: 1.0 / len(weights) for ticker in weights}
-    return {ticker: w / total_weight for ticker, w in weights.items()}
+# 포트폴리오 상태는 고정된 종목 순서(tickers)에 맞춘 배열로 다룹니다.
+# - holdings: 종목별 보유 수량 (int64)
+# - prices  : 종목별 현재가 (float64, 시세가 없으면 NaN)
+# - 목표 포트폴리오: (종목 위치 배열, 비중 배열) — 원래 딕셔너리의 순서를 유지합니다.
+
+def make_ticker_index(tickers):
+    """종목 -> 배열 위치 딕셔너리를 만듭니다."""
+    return {ticker: i for i, ticker in enumerate(tickers)}
+
+def price_matrix(stock_data, tickers):
+    """(날짜 x 종목) 가격 행렬을 tickers 순서로 반환합니다. DB에 없는 종목은 0.0 입니다."""
+    return stock_data.reindex(columns=list(tickers), fill_value=0.0).to_numpy(dtype=np.float64)
+
+def target_arrays(target_portfolio, ticker_index):
+    """{종목: 비중} 목표 포트폴리오를 (종목 위치 배열, 비중 배열) 로 변환합니다."""
+    positions = np.array([ticker_index[t] for t in target_portfolio], dtype=np.intp)
+    weights = np.array(list(target_portfolio.values()), dtype=np.float64)
+    return positions, weights
+
+def row_targets(weight_row, order_row):
+    """목표 비중 행렬의 한 행(weights, order)을 (종목 위치 배열, 비중 배열) 로 변환합니다."""
+    positions = np.flatnonzero(order_row >= 0)
+    positions = positions[np.argsort(order_row[positions], kind="stable")]
+    return positions, weight_row[positions]
+
+
+def _tradable(prices):
+    return ~np.isnan(prices) & (prices > 0)
 
-def get_active_target_weights(original_target_weights, prices):
+def _sequential_sum(values):
+    """파이썬 sum 과 같은 순서(왼쪽부터)로 더합니다. (np.sum 의 쌍별 합산과 반올림이 다를 수 있음)"""
+    return np.add.accumulate(values)[-1] if len(values) else 0.0
+
+def get_active_target_weights(positions, weights, prices):
     """현재 거래 가능한 종목만으로 목표 비중을 동적으로 재계산합니다."""
-    available_tickers = [ticker for ticker in original_target_weights if pd.notna(prices.get(ticker)) and prices.get(ticker) > 0]
-    active_weights = {ticker: original_target_weights[ticker] for ticker in available_tickers}
-    return _normalize_weights(active_weights)
-
-def _sweep_cash(holdings, cash, target_portfolio, prices, logs):
-    """[내부 함수] 잔여 현금을 목표 비중에 맞춰 추가 매수하고 로그를 기록합니다."""
-    target_prices = {t: prices.get(t) for t in target_portfolio if pd.notna(prices.get(t)) and prices.get(t) > 0}
-    if not target_prices or cash <= min(target_prices.values()):
+    keep = _tradable(prices[positions])
+    positions, weights = positions[keep], weights[keep]
+    if len(weights) == 0:
+        return positions, weights
+    total_weight = _sequential_sum(weights)
+    if total_weight == 0:
+        return positions, np.full(len(weights), 1.0 / len(weights))
+    return positions, weights / total_weight
+
+def _execute_orders(holdings, cash, positions, shares, prices, is_buy):
+    """
+    [내부 함수] 주문을 순서대로 체결하고 (현금, 체결된 주문 배열들) 을 반환합니다.
+
+    매도는 항상 체결되고 매수는 그 시점의 현금이 총비용 이상일 때만 체결됩니다.
+    모든 매수가 체결되면 현금은 누적합 한 번으로 계산하고, 건너뛰는 매수가 있을 때만
+    순서대로 다시 계산합니다.
+    """
+    amounts = shares * prices
+    fees = amounts * np.where(is_buy, BUY_COMMISSION_RATE, SELL_TAX_RATE)
+    flows = np.where(is_buy, -(amounts + fees), amounts - fees)
+    running = np.add.accumulate(np.concatenate(([cash], flows)))
+    filled = ~is_buy | (running[:-1] >= amounts + fees)
+    if filled.all():
+        cash = float(running[-1])
+    else:
+        for k in range(len(flows)):
+            filled[k] = not is_buy[k] or cash >= amounts[k] + fees[k]
+            if filled[k]:
+                cash += flows[k]
+        cash = float(cash)
+    np.add.at(holdings, positions[filled], np.where(is_buy, shares, -shares)[filled])
+    return cash, (positions[filled], shares[filled], prices[filled], amounts[filled], fees[filled], is_buy[filled])
+
+def _weighted_buy(holdings, cash, budget, positions, weights, prices):
+    """[내부 함수] budget 을 목표 비중대로 나눠 정수 주식 수만큼 매수합니다."""
+    target_prices = prices[positions]
+    ok = _tradable(target_prices)
+    positions, weights, target_prices = positions[ok], weights[ok], target_prices[ok]
+    shares = np.trunc(budget * weights / (target_prices * (1 + BUY_COMMISSION_RATE))).astype(np.int64)
+    buy = shares > 0
+    return _execute_orders(holdings, cash, positions[buy], shares[buy], target_prices[buy], np.ones(buy.sum(), dtype=bool))
+
+def execute_initial_buy(holdings, cash, positions, weights, prices, journal):
+    """첫 평가일에 초기 투자금을 목표 비중대로 매수하고 거래 기록에 남깁니다."""
+    cash, trades = _weighted_buy(holdings, cash, cash, positions, weights, prices)
+    journal.trades(trades, INITIAL_BUY, dated=True)
+    return holdings, cash
+
+def _sweep_cash(holdings, cash, positions, weights, prices, journal):
+    """[내부 함수] 잔여 현금을 목표 비중에 맞춰 추가 매수하고 거래 기록에 남깁니다."""
+    target_prices = prices[positions]
+    ok = _tradable(target_prices)
+    if not ok.any() or cash <= target_prices[ok].min():
         return holdings, cash
 
-    logs.append({"type": "INFO", "message": f"잔여 현금({cash:,.2f}) 추가 매수 실행"})
+    journal.info(SWEEP, amount=cash)
     cash_to_reinvest = cash - 1.0  # 거래 오류 방지용 버퍼
-    
-    for ticker, weight in target_portfolio.items():
-        price = target_prices.get(ticker)
-        if price is None: continue
-        
-        allocation = cash_to_reinvest * weight
-        shares = int(allocation / (price * (1 + BUY_COMMISSION_RATE)))
-        
-        if shares > 0:
-            base_cost, commission = shares * price, (shares * price) * BUY_COMMISSION_RATE
-            total_cost = base_cost + commission
-            if cash >= total_cost:
-                holdings[ticker] = holdings.get(ticker, 0) + shares
-                cash -= total_cost
-                logs.append({"type": "TRANSACTION", "action": "SWEEP_BUY", "ticker": ticker, "shares": shares, "price": price, "amount": base_cost, "fee": commission})
+    cash, trades = _weighted_buy(holdings, cash, cash_to_reinvest, positions, weights, prices)
+    journal.trades(trades, SWEEP_BUY)
     return holdings, cash
 
-def execute_rebalancing(holdings, cash, target_portfolio, prices, logs):
-    """[동적 전략용] 거래 비용 및 현금 최소화 로직을 포함하여 리밸런싱을 실행하고 로그를 기록합니다."""
-    current_portfolio_value = cash + sum(holdings.get(t, 0) * prices.get(t, 0) for t in holdings if pd.notna(prices.get(t)))
-    
-    # 매도
-    tickers_to_sell = [t for t in holdings if holdings[t] > 0 and t not in target_portfolio]
-    for ticker in tickers_to_sell:
-        shares, price = holdings[ticker], prices.get(ticker)
-        if shares > 0 and pd.notna(price):
-            holdings[ticker], base_proceeds = 0, shares * price
-            tax = base_proceeds * SELL_TAX_RATE
-            cash += base_proceeds - tax
-            logs.append({"type": "TRANSACTION", "action": "SELL_ALL", "ticker": ticker, "shares": shares, "price": price, "amount": base_proceeds, "fee": tax})
-            
-    # 매수/비중조절
-    for ticker, target_weight in target_portfolio.items():
-        price = prices.get(ticker)
-        if pd.isna(price) or price <= 0: continue
-        delta_value = (current_portfolio_value * target_weight) - (holdings.get(ticker, 0) * price)
-        if delta_value > 0:
-            shares = int(delta_value / (price * (1 + BUY_COMMISSION_RATE)))
-            if shares > 0:
-                base_cost, commission = shares * price, (shares * price) * BUY_COMMISSION_RATE
-                if cash >= base_cost + commission:
-                    holdings[ticker] = holdings.get(ticker, 0) + shares
-                    cash -= base_cost + commission
-                    logs.append({"type": "TRANSACTION", "action": "BUY", "ticker": ticker, "shares": shares, "price": price, "amount": base_cost, "fee": commission})
-        elif delta_value < 0:
-            shares = int(-delta_value / price)
-            if shares > 0 and holdings.get(ticker, 0) >= shares:
-                holdings[ticker] -= shares
-                base_proceeds = shares * price
-                tax = base_proceeds * SELL_TAX_RATE
-                cash += base_proceeds - tax
-                logs.append({"type": "TRANSACTION", "action": "SELL_ADJUST", "ticker": ticker, "shares": shares, "price": price, "amount": base_proceeds, "fee": tax})
-    
-    return _sweep_cash(holdings, cash, target_portfolio, prices, logs)
-
-def execute_periodic_buy(holdings, cash, initial_target_weights, prices, logs):
-    """[Default-no-rebalance 용] 매도 없이, 현금을 동적 목표비중에 따라 추가 매수하고 로그를 기록합니다."""
-    logs.append({"type": "INFO", "message": "주기적 추가 매수 실행 (리밸런싱 없음)"})
-    active_target_weights = get_active_target_weights(initial_target_weights, prices)
-    cash_to_invest = cash
-    for ticker, weight in active_target_weights.items():
-        price = prices.get(ticker)
-        if pd.isna(price) or price <= 0: continue
-        allocation = cash_to_invest * weight
-        shares = int(allocation / (price * (1 + BUY_COMMISSION_RATE)))
-        if shares > 0:
-            base_cost, commission = shares * price, (shares * price) * BUY_COMMISSION_RATE
-            if cash >= base_cost + commission:
-                holdings[ticker] = holdings.get(ticker, 0) + shares
-                cash -= base_cost + commission
-                logs.append({"type": "TRANSACTION", "action": "PERIODIC_BUY", "ticker": ticker, "shares": shares, "price": price, "amount": base_cost, "fee": commission})
-    return _sweep_cash(holdings, cash, active_target_weights, prices, logs)
-
-def execute_default_rebalancing(holdings, cash, target_weights, prices, logs):
-    """[Default-rebalance 용] 동적 목표 비중에 맞춰 리밸런싱하고 로그를 기록합니다."""
-    logs.append({"type": "INFO", "message": "정적 비중 리밸런싱 실행"})
-    active_target_weights = get_active_target_weights(target_weights, prices)
-    return execute_rebalancing(holdings, cash, active_target_weights, prices, logs)
+def execute_rebalancing(holdings, cash, positions, weights, prices, journal):
+    """[동적 전략용] 거래 비용 및 현금 최소화 로직을 포함하여 리밸런싱을 실행하고 거래 기록에 남깁니다."""
+    valued = ~np.isnan(prices)
+    current_portfolio_value = cash + _sequential_sum(np.where(valued, holdings * prices, 0.0))
+
+    # 매도: 목표에 없는 보유 종목 전량 (종목 순서)
+    in_target = np.zeros(len(holdings), dtype=bool)
+    in_target[positions] = True
+    sell_all = np.flatnonzero((holdings > 0) & ~in_target & valued)
+
+    # 매수/비중조절 (목표 순서)
+    target_prices = prices[positions]
+    ok = _tradable(target_prices)
+    adjust_positions, adjust_prices = positions[ok], target_prices[ok]
+    delta_value = current_portfolio_value * weights[ok] - holdings[adjust_positions] * adjust_prices
+    is_buy = delta_value > 0
+    shares = np.where(
+        is_buy,
+        np.trunc(delta_value / (adjust_prices * (1 + BUY_COMMISSION_RATE))),
+        np.trunc(-delta_value / adjust_prices),
+    ).astype(np.int64)
+    trade = (shares > 0) & (is_buy | (holdings[adjust_positions] >= shares))
+
+    order_positions = np.concatenate((sell_all, adjust_positions[trade]))
+    cash, trades = _execute_orders(
+        holdings,
+        cash,
+        order_positions,
+        np.concatenate((holdings[sell_all], shares[trade])),
+        np.concatenate((prices[sell_all], adjust_prices[trade])),
+        np.concatenate((np.zeros(len(sell_all), dtype=bool), is_buy[trade])),
+    )
+    # 전량 매도 주문은 항상 체결되므로 체결 목록의 앞부분이 전량 매도입니다.
+    actions = np.where(trades[5], REBALANCE_BUY, SELL_ADJUST)
+    actions[:len(sell_all)] = SELL_ALL
+    journal.trades(trades, actions)
+    return _sweep_cash(holdings, cash, positions, weights, prices, journal)
+
+def execute_periodic_buy(holdings, cash, positions, weights, prices, journal):
+    """[Default-no-rebalance 용] 매도 없이, 현금을 동적 목표비중에 따라 추가 매수하고 거래 기록에 남깁니다."""
+    journal.info(PERIODIC)
+    positions, weights = get_active_target_weights(positions, weights, prices)
+    cash, trades = _weighted_buy(holdings, cash, cash, positions, weights, prices)
+    journal.trades(trades, PERIODIC_BUY)
+    return _sweep_cash(holdings, cash, positions, weights, prices, journal)
+
+def execute_default_rebalancing(holdings, cash, positions, weights, prices, journal):
+    """[Default-rebalance 용] 동적 목표 비중에 맞춰 리밸런싱하고 거래 기록에 남깁니다."""
+    journal.info(STATIC_REBALANCE)
+    positions, weights = get_active_target_weights(positions, weights, prices)
+    return execute_rebalancing(holdings, cash, positions, weights, prices, journal)
     
-def evaluate_portfolio_state(date, holdings, cash, prices, all_tickers):
-    """특정 시점의 포트폴리오 상태를 평가하여 딕셔너리로 반환합니다."""
-    eval_result = {"Date": date.strftime("%Y-%m-%d"), "Cash": cash}
-    valid_asset_value = 0
-    for ticker in all_tickers:
-        price = prices.get(ticker, 0.0)
-        num_shares = holdings.get(ticker, 0)
-        stock_value = num_shares * price
-        eval_result.update({f"{ticker} Holdings": num_shares, f"{ticker} Price": price, f"{ticker} Value": stock_value})
-        if num_shares > 0 and price > 0:
-            valid_asset_value += stock_value
+def evaluate_portfolio_state(holdings, prices):
+    """특정 시점의 종목별 평가액과 비중(보유 중이고 가격이 있는 종목 평가액 합 기준) 배열을 반환합니다."""
+    values = holdings * prices
+    valid_asset_value = _sequential_sum(np.where((holdings > 0) & (prices > 0), values, 0.0))
     if valid_asset_value > 0:
-        for ticker in all_tickers:
-            eval_result[f"{ticker} Weight"] = eval_result[f"{ticker} Value"] / valid_asset_value
-    else:
-        for ticker in all_tickers:
-            eval_result[f"{ticker} Weight"] = 0
-    return eval_result
+        return values, values / valid_asset_value
+    return values, np.zeros(len(values))
+
+def evaluation_frame(dates, tickers, cash, holdings, prices, values, weights, total_investment):
+    """
+    평가일별 상태 배열들을 결과 DataFrame 으로 만듭니다.
+
+    열 구성/순서는 Date, Cash, 종목별 (Holdings, Price, Value), 종목별 Weight, Total Investment 입니다.
+    """
+    columns = {"Date": [d.strftime("%Y-%m-%d") for d in dates], "Cash": cash}
+    for i, ticker in enumerate(tickers):
+        columns[f"{ticker} Holdings"] = holdings[:, i]
+        columns[f"{ticker} Price"] = prices[:, i]
+        columns[f"{ticker} Value"] = values[:, i]
+    for i, ticker in enumerate(tickers):
+        columns[f"{ticker} Weight"] = weights[:, i]
+    columns["Total Investment"] = total_investment
+    return pd.DataFrame(columns)
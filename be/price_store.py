@@ -0,0 +1,255 @@
+# price_store.py
+
+"""
+stock_price 테이블을 메모리 매핑 가능한 컬럼형 파일로 내보낸 저장소.
+
+DB 파일 옆의 '<DB 이름>.colstore' 디렉터리에 다음 파일을 둡니다.
+- meta.json : 필드 목록, 종목 목록(열 순서), 날짜 수/용량, 데이터 버전
+- dates.npy : 전체 종목 공통 날짜 축 (datetime64[D])
+- <필드>.f64 : (날짜 용량 x 종목 수) float64 행렬, 열 우선(Fortran) 순서
+
+종목별 열이 연속된 메모리에 놓이므로 일부 종목만 읽을 때도 해당 페이지만 접근합니다.
+데이터 버전은 stock_price 의 MAX(rowid) 이며, INSERT OR REPLACE 로 추가/갱신된 행은
+항상 더 큰 rowid 를 받으므로 'rowid > 이전 버전' 조건으로 변경분만 반영할 수 있습니다.
+"""
+
+import json
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+STORE_FIELDS = ("Close",)
+# 날짜 축 여유분 (약 2년치 거래일). 용량 안에서는 새 거래일을 제자리에 기록합니다.
+DATE_CAPACITY_STEP = 512
+STORE_FORMAT_VERSION = 1
+READ_CHUNK_SIZE = 500_000
+COPY_BLOCK_COLUMNS = 1024
+
+
+def get_store_dir(db_path):
+    """DB 파일 옆에 위치한 컬럼형 저장소 디렉터리 경로를 반환합니다."""
+    root, _ = os.path.splitext(db_path)
+    return root + ".colstore"
+
+
+def get_data_version(db_path):
+    """stock_price 테이블의 데이터 버전(MAX(rowid))을 반환합니다."""
+    with sqlite3.connect(db_path) as con:
+        row = con.execute("SELECT MAX(rowid) FROM stock_price").fetchone()
+    return row[0] or 0
+
+
+def _read_meta(store_dir):
+    path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != STORE_FORMAT_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(store_dir, meta):
+    path = os.path.join(store_dir, "meta.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, path)
+
+
+def _field_path(store_dir, field):
+    return os.path.join(store_dir, f"{field}.f64")
+
+
+def _open_field(store_dir, field, capacity, n_symbols, mode="r"):
+    """필드 파일을 (날짜 용량 x 종목 수) 열 우선 memmap 으로 엽니다."""
+    if capacity == 0 or n_symbols == 0:
+        return np.full((capacity, n_symbols), np.nan, order="F")
+    return np.memmap(
+        _field_path(store_dir, field),
+        dtype=np.float64,
+        mode=mode,
+        shape=(capacity, n_symbols),
+        order="F",
+    )
+
+
+def _to_day_array(values):
+    """'YYYY-MM-DD' 형식의 날짜 값들을 datetime64[D] 배열로 변환합니다."""
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[D]")
+
+
+def load_price_matrix(db_path, tickers=None, start_date=None, end_date=None, field="Close", dropna=True):
+    """
+    저장소에서 (날짜 x 종목) 가격 행렬을 DataFrame 으로 읽습니다.
+
+    tickers 가 None 이면 전체 종목을 반환하며, 이때와 요청 종목이 연속된 열일 때는
+    memmap 의 뷰를 그대로 사용합니다(복사 없음). 저장소가 없거나 DB 보다 오래되었으면
+    None 을 반환하므로 호출 측은 SQLite 조회로 대체해야 합니다.
+    """
+    store_dir = get_store_dir(db_path)
+    meta = _read_meta(store_dir)
+    if meta is None or field not in meta["fields"]:
+        return None
+    try:
+        if meta["data_version"] != get_data_version(db_path):
+            return None
+    except sqlite3.Error:
+        return None
+
+    dates = np.load(os.path.join(store_dir, "dates.npy"))
+    lo, hi = 0, meta["n_dates"]
+    if start_date is not None:
+        lo = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date).date(), "D"), side="left"))
+    if end_date is not None:
+        hi = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date).date(), "D"), side="right"))
+
+    symbols = pd.Index(meta["symbols"])
+    matrix = _open_field(store_dir, field, meta["date_capacity"], len(symbols))
+    if tickers is None:
+        columns = symbols
+        values = matrix[lo:hi, :]
+    else:
+        requested = sorted(set(tickers))
+        positions = symbols.get_indexer(requested)
+        columns = pd.Index([t for t, p in zip(requested, positions) if p >= 0])
+        positions = positions[positions >= 0]
+        if len(positions) > 0 and np.all(np.diff(positions) == 1):
+            values = matrix[lo:hi, positions[0] : positions[-1] + 1]
+        else:
+            values = matrix[lo:hi, positions]
+
+    df = pd.DataFrame(
+        values,
+        index=pd.DatetimeIndex(dates[lo:hi].astype("datetime64[ns]"), name="date"),
+        columns=columns.rename("ticker"),
+        copy=False,
+    )
+    if dropna:
+        # SQLite 피벗과 같게: 해당 구간에 데이터가 없는 종목/날짜는 제외
+        df = df.dropna(axis=1, how="all").dropna(how="all")
+    return df
+
+
+def _relayout(store_dir, fields, meta, all_dates, symbols, capacity):
+    """날짜 축 중간에 날짜가 끼어들거나 용량을 넘으면 새 배치로 파일을 다시 씁니다."""
+    old_dates = np.load(os.path.join(store_dir, "dates.npy")) if meta else None
+    old_n_symbols = len(meta["symbols"]) if meta else 0
+    row_map = np.searchsorted(all_dates, old_dates) if meta else None
+
+    for field in fields:
+        if len(symbols) == 0:
+            break
+        tmp_path = _field_path(store_dir, field) + ".tmp"
+        new = np.memmap(tmp_path, dtype=np.float64, mode="w+", shape=(capacity, len(symbols)), order="F")
+        new[:] = np.nan
+        if meta and old_n_symbols > 0 and meta["n_dates"] > 0:
+            old = _open_field(store_dir, field, meta["date_capacity"], old_n_symbols)
+            for c0 in range(0, old_n_symbols, COPY_BLOCK_COLUMNS):
+                c1 = min(c0 + COPY_BLOCK_COLUMNS, old_n_symbols)
+                new[row_map, c0:c1] = old[: meta["n_dates"], c0:c1]
+            del old
+        new.flush()
+        del new
+
+    # 파일 교체 중에는 저장소를 '없음'으로 보이게 하여 읽기 측이 SQLite 로 대체하도록 합니다.
+    meta_path = os.path.join(store_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for field in fields:
+        if len(symbols) > 0:
+            os.replace(_field_path(store_dir, field) + ".tmp", _field_path(store_dir, field))
+
+
+def _grow_symbols(store_dir, fields, capacity, old_n_symbols, n_symbols):
+    """열 우선 배치이므로 새 종목 열은 파일 끝에 이어 붙입니다."""
+    for field in fields:
+        path = _field_path(store_dir, field)
+        with open(path, "r+b") as f:
+            f.truncate(capacity * n_symbols * 8)
+        matrix = _open_field(store_dir, field, capacity, n_symbols, mode="r+")
+        matrix[:, old_n_symbols:] = np.nan
+        matrix.flush()
+        del matrix
+
+
+def update_price_store(db_path, fields=STORE_FIELDS, rebuild=False):
+    """
+    stock_price 테이블의 변경분을 컬럼형 저장소에 반영합니다.
+
+    이전 빌드 이후(rowid 기준) 추가/갱신된 행만 읽어서 기록하며, 저장소가 없거나
+    rebuild=True 이면 전체를 새로 만듭니다. 반영된 행 수를 반환합니다.
+    """
+    fields = list(fields)
+    store_dir = get_store_dir(db_path)
+    os.makedirs(store_dir, exist_ok=True)
+    meta = None if rebuild else _read_meta(store_dir)
+    if meta is not None and meta["fields"] != fields:
+        meta = None
+    base_version = meta["data_version"] if meta else 0
+
+    with sqlite3.connect(db_path) as con:
+        current_version = con.execute("SELECT MAX(rowid) FROM stock_price").fetchone()[0] or 0
+        if meta is not None and current_version == base_version:
+            return 0
+        version_range = (base_version, current_version)
+
+        new_dates = _to_day_array(
+            [r[0] for r in con.execute("SELECT DISTINCT Date FROM stock_price WHERE rowid > ? AND rowid <= ?", version_range)]
+        )
+        new_symbols = {
+            r[0] for r in con.execute("SELECT DISTINCT Symbol FROM stock_price WHERE rowid > ? AND rowid <= ?", version_range)
+        }
+
+        old_dates = np.load(os.path.join(store_dir, "dates.npy")) if meta else np.array([], dtype="datetime64[D]")
+        old_symbols = meta["symbols"] if meta else []
+        added_dates = np.setdiff1d(np.unique(new_dates), old_dates)
+        all_dates = np.union1d(old_dates, added_dates)
+        symbols = old_symbols + sorted(new_symbols.difference(old_symbols))
+
+        capacity = meta["date_capacity"] if meta else 0
+        appended_only = len(old_dates) == 0 or len(added_dates) == 0 or added_dates[0] > old_dates[-1]
+        in_place = meta is not None and len(old_symbols) > 0 and appended_only and len(all_dates) <= capacity
+        if not in_place:
+            capacity = len(all_dates) + DATE_CAPACITY_STEP
+            _relayout(store_dir, fields, meta, all_dates, symbols, capacity)
+        elif len(symbols) > len(old_symbols):
+            _grow_symbols(store_dir, fields, capacity, len(old_symbols), len(symbols))
+
+        matrices = {f: _open_field(store_dir, f, capacity, len(symbols), mode="r+") for f in fields}
+        if in_place and len(all_dates) > len(old_dates):
+            # 이전에 중단된 갱신이 남긴 값이 새 날짜 행에 섞이지 않도록 비웁니다.
+            for matrix in matrices.values():
+                matrix[len(old_dates) : len(all_dates), :] = np.nan
+        symbol_index = pd.Index(symbols)
+        query = f"SELECT Symbol, Date, {', '.join(fields)} FROM stock_price WHERE rowid > ? AND rowid <= ?"
+        n_rows = 0
+        for chunk in pd.read_sql_query(query, con, params=version_range, chunksize=READ_CHUNK_SIZE):
+            rows = np.searchsorted(all_dates, _to_day_array(chunk["Date"]))
+            cols = symbol_index.get_indexer(chunk["Symbol"])
+            for field, matrix in matrices.items():
+                matrix[rows, cols] = chunk[field].to_numpy(dtype=np.float64)
+            n_rows += len(chunk)
+        for matrix in matrices.values():
+            if isinstance(matrix, np.memmap):
+                matrix.flush()
+        del matrices
+
+    dates_path = os.path.join(store_dir, "dates.npy")
+    with open(dates_path + ".tmp", "wb") as f:
+        np.save(f, all_dates)
+    os.replace(dates_path + ".tmp", dates_path)
+    _write_meta(
+        store_dir,
+        {
+            "format": STORE_FORMAT_VERSION,
+            "fields": fields,
+            "n_dates": len(all_dates),
+            "date_capacity": capacity,
+            "symbols": symbols,
+            "data_version": current_version,
+        },
+    )
+    return n_rows
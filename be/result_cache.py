@@ -0,0 +1,165 @@
+# result_cache.py
+"""
+백테스트 결과 캐시.
+
+키는 정규화한 파라미터와 DB 데이터 버전(stock_price 의 MAX(rowid))의 해시입니다.
+수집으로 행이 추가/갱신되면 데이터 버전이 바뀌므로 이전 결과는 자동으로 더 이상 사용되지 않습니다.
+- 메모리 계층: 최근 사용 순(LRU)으로 max_entries 개까지 유지합니다.
+- 디스크 계층(선택): directory 가 주어지면 '<키>.pkl' 로 저장하고 max_files 개까지 유지합니다.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from price_store import get_data_version
+
+CACHE_FORMAT_VERSION = 2
+# 결과 내용에 영향을 주지 않는 파라미터 (키에서 제외)
+NON_RESULT_PARAMS = ("include_timings",)
+MAX_MEMORY_ENTRIES = 128
+MAX_DISK_FILES = 1024
+
+def canonical_params(params):
+    """결과가 같은 파라미터가 같은 값이 되도록 정규화합니다. (숫자형 통일, DB 경로 절대 경로화)"""
+    canonical = {}
+    for key, value in params.items():
+        if key in NON_RESULT_PARAMS:
+            continue
+        if isinstance(value, bool) or value is None:
+            canonical[key] = value
+        elif isinstance(value, (int, float)):
+            canonical[key] = float(value)
+        elif isinstance(value, (list, tuple)):
+            # stocks 의 순서는 매매 순서에 영향을 주므로 그대로 유지합니다.
+            canonical[key] = [str(v) for v in value]
+        else:
+            canonical[key] = str(value)
+    canonical["db_path"] = os.path.realpath(canonical["db_path"])
+    return canonical
+
+def cache_key(params, data_version):
+    """정규화한 파라미터와 데이터 버전으로 캐시 키(sha256 hex)를 만듭니다."""
+    payload = json.dumps([CACHE_FORMAT_VERSION, canonical_params(params), data_version], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """메모리 LRU 와 선택적 디스크 계층으로 이루어진 백테스트 결과 캐시. 스레드 안전합니다."""
+
+    def __init__(self, max_entries=MAX_MEMORY_ENTRIES, directory=None, max_files=MAX_DISK_FILES):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_files = max_files
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def key_for(self, params):
+        """파라미터의 캐시 키를 반환합니다. DB 가 없거나 읽을 수 없으면 None (캐시 사용 안 함)."""
+        db_path = params.get("db_path")
+        if not db_path or not os.path.exists(db_path):
+            return None
+        try:
+            return cache_key(params, get_data_version(db_path))
+        except sqlite3.Error:
+            return None
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """캐시된 결과를 반환하고 적중/실패 횟수를 기록합니다. 없으면 None."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.counts["hits"] += 1
+                self.counts["memory_hits"] += 1
+                return self.entries[key]
+        value = self._read_disk(key) if self.directory else None
+        with self.lock:
+            if value is None:
+                self.counts["misses"] += 1
+                return None
+            self.counts["hits"] += 1
+            self.counts["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.counts["stores"] += 1
+            self._remember(key, value)
+        if self.directory:
+            try:
+                self._write_disk(key, value)
+            except OSError:
+                pass  # 디스크 계층 기록 실패는 메모리 계층과 요청 결과에 영향을 주지 않습니다.
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # 읽은 뒤 다른 스레드가 정리한 파일
+        return value
+
+    def _write_disk(self, key, value):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        # 오래 사용하지 않은 파일부터 정리하여 파일 수를 제한합니다.
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                file_path = os.path.join(self.directory, name)
+                try:
+                    files.append((os.path.getmtime(file_path), file_path))
+                except FileNotFoundError:
+                    pass  # 다른 스레드가 먼저 정리한 파일
+        if len(files) > self.max_files:
+            files.sort()
+            for _, old_path in files[: len(files) - self.max_files]:
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+
+    def get_or_compute(self, params, compute):
+        """캐시에 있으면 그 결과를, 없으면 compute(params) 결과를 저장 후 반환합니다. 오류 결과는 저장하지 않습니다."""
+        key = self.key_for(params)
+        if key is not None:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+        result = compute(params)
+        if key is not None and "error" not in result:
+            self.put(key, result)
+        return result
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counts["hits"] + self.counts["misses"]
+            return {
+                **self.counts,
+                "hit_rate": self.counts["hits"] / lookups if lookups else 0.0,
+                "memory_entries": len(self.entries),
+                "disk_enabled": bool(self.directory),
+            }
@@ -1,5 +1,6 @@
 # strategies.py
 
+import numpy as np
 import pandas as pd
 from config import STRATEGY_ASSETS
 
@@ -56,3 +57,165 @@ def decide_laa_portfolio(date, current_prices, daily_data):
         target_portfolio[assets["defensive"][0]] = 0.25
 
     return target_portfolio
+
+
+# --- 벡터화 버전: 모든 평가일의 목표 비중을 한 번에 계산 ---
+# 각 함수는 (weights, order) 두 DataFrame (평가일 x 전략 종목) 을 반환합니다.
+# - weights: 목표 비중 (목표에 없으면 0)
+# - order  : 목표 딕셔너리에서의 순서 (매매 실행 순서, 목표에 없으면 -1)
+# 목표를 정할 수 없는 날(decide_* 가 {} 를 반환하는 날)은 모든 order 가 -1
+# 입니다.
+# 위의 decide_* 함수는 날짜별 기준 구현으로 유지합니다.
+
+
+def _strategy_tickers(assets):
+    """전략 자산 목록을 중복 없이 순서대로 모읍니다."""
+    return list(dict.fromkeys(t for group in assets.values() for t in group))
+
+
+def _empty_targets(dates, tickers):
+    weights = np.zeros((len(dates), len(tickers)))
+    order = np.full((len(dates), len(tickers)), -1, dtype=np.int64)
+    return weights, order
+
+
+def _to_frames(dates, tickers, weights, order):
+    return (
+        pd.DataFrame(weights, index=dates, columns=tickers),
+        pd.DataFrame(order, index=dates, columns=tickers),
+    )
+
+
+def _first_argmax(values):
+    """행마다 NaN 을 제외한 최댓값의 첫 위치(idxmax 와 동일)를 반환합니다. 모두 NaN 이면 -1."""
+    missing = np.isnan(values)
+    positions = np.where(missing, -np.inf, values).argmax(axis=1)
+    return np.where(missing.all(axis=1), -1, positions)
+
+
+def _assign_single_pick(weights, order, rows, pick_columns, picks):
+    """rows 행에 pick_columns[picks] 종목 하나를 비중 1.0 으로 지정합니다. (-1 은 건너뜀)"""
+    rows, picks = rows[picks >= 0], picks[picks >= 0]
+    weights[rows, pick_columns[picks]] = 1.0
+    order[rows, pick_columns[picks]] = 0
+
+
+def haa_target_weights(dates, monthly_prices, momentum_data):
+    """decide_haa_portfolio 를 모든 평가일(월말)에 대해 한 번에 계산합니다."""
+    assets = STRATEGY_ASSETS["haa"]
+    tickers = _strategy_tickers(assets)
+    column = {t: i for i, t in enumerate(tickers)}
+    weights, order = _empty_targets(dates, tickers)
+
+    roc_6 = momentum_data["roc_6"].loc[dates]
+    offensive_picks = _first_argmax(roc_6[assets["offensive"]].to_numpy(dtype=float))
+    defensive_picks = _first_argmax(roc_6[assets["defensive"]].to_numpy(dtype=float))
+
+    canary = assets["canary"][0]
+    canary_price = monthly_prices.loc[dates, canary].to_numpy(dtype=float)
+    canary_sma = momentum_data["sma_12_month"].loc[dates, canary]
+    canary_sma = canary_sma.to_numpy(dtype=float)
+    valid = ~np.isnan(canary_price) & ~np.isnan(canary_sma)
+    risk_on = canary_price > canary_sma
+
+    # 선택할 종목이 모두 NaN 인 날(idxmax 가 값을 내지 못하는 경우)은 목표를 정하지 않습니다.
+    rows = np.arange(len(dates))
+    on, off = valid & risk_on, valid & ~risk_on
+    offensive_columns = np.array([column[t] for t in assets["offensive"]])
+    defensive_columns = np.array([column[t] for t in assets["defensive"]])
+    _assign_single_pick(
+        weights, order, rows[on], offensive_columns, offensive_picks[on]
+    )
+    _assign_single_pick(
+        weights, order, rows[off], defensive_columns, defensive_picks[off]
+    )
+    return _to_frames(dates, tickers, weights, order)
+
+
+def daa_target_weights(dates, momentum_data, top_n=3):
+    """decide_daa_portfolio 를 모든 평가일(월말)에 대해 한 번에 계산합니다."""
+    assets = STRATEGY_ASSETS["daa"]
+    tickers = _strategy_tickers(assets)
+    column = {t: i for i, t in enumerate(tickers)}
+    weights, order = _empty_targets(dates, tickers)
+
+    daa_momentum = momentum_data["daa_momentum"].loc[dates]
+    canary_scores = daa_momentum[assets["canary"]].to_numpy(dtype=float)
+    canary_missing = np.isnan(canary_scores)
+    # 평균의 부호는 NaN 을 제외한 합의 부호와 같습니다.
+    defensive_mode = canary_missing.all(axis=1) | (
+        np.where(canary_missing, 0.0, canary_scores).sum(axis=1) < 0
+    )
+
+    rows = np.arange(len(dates))
+    defensive_picks = _first_argmax(
+        daa_momentum[assets["defensive"]].to_numpy(dtype=float)
+    )
+    defensive_columns = np.array([column[t] for t in assets["defensive"]])
+    _assign_single_pick(
+        weights,
+        order,
+        rows[defensive_mode],
+        defensive_columns,
+        defensive_picks[defensive_mode],
+    )
+
+    # nlargest(top_n): 값 내림차순, 같은 값은 앞선 종목 우선, 부족하면 NaN 종목으로 채움
+    # (np.argsort 의 안정 정렬은 NaN 을 원래 순서대로 맨 뒤에 둡니다.)
+    offensive = daa_momentum[assets["offensive"]].to_numpy(dtype=float)
+    offensive_columns = np.array([column[t] for t in assets["offensive"]])
+    ranked = np.argsort(-offensive, axis=1, kind="stable")
+    n_picks = min(len(offensive_columns), top_n)
+    offensive_rows = rows[~defensive_mode]
+    for rank in range(n_picks):
+        picked = offensive_columns[ranked[offensive_rows, rank]]
+        weights[offensive_rows, picked] = 1.0 / n_picks
+        order[offensive_rows, picked] = rank
+    return _to_frames(dates, tickers, weights, order)
+
+
+def laa_target_weights(dates, stock_data, daily_data):
+    """decide_laa_portfolio 를 모든 평가일에 대해 한 번에 계산합니다. (일별 지표 필요)"""
+    assets = STRATEGY_ASSETS["laa"]
+    tickers = _strategy_tickers(assets)
+    column = {t: i for i, t in enumerate(tickers)}
+    weights, order = _empty_targets(dates, tickers)
+
+    # 현재가는 index.asof(date) 행, SMA 는 Series.asof 처럼 마지막 유효값을 사용합니다.
+    price_rows = stock_data.index.searchsorted(dates, side="right") - 1
+    spy_price = np.full(len(dates), np.nan)
+    if "SPY" in stock_data.columns:
+        spy_values = stock_data["SPY"].to_numpy(dtype=float)
+        spy_price = np.where(price_rows >= 0, spy_values[price_rows], np.nan)
+    sma = daily_data["sma_200_day"]
+    sma_rows = sma.index.searchsorted(dates, side="right") - 1
+    sma_values = sma.ffill().to_numpy(dtype=float)
+    spy_sma_200 = np.where(sma_rows >= 0, sma_values[sma_rows], np.nan)
+
+    valid = ~np.isnan(spy_price) & ~np.isnan(spy_sma_200)
+    risk_on = spy_price > spy_sma_200
+    for rank, ticker in enumerate(assets["core"]):
+        weights[valid, column[ticker]] = 0.25
+        order[valid, column[ticker]] = rank
+    pick_rank = len(assets["core"])
+    picks = (
+        (valid & risk_on, assets["offensive"][0]),
+        (valid & ~risk_on, assets["defensive"][0]),
+    )
+    for mask, ticker in picks:
+        weights[mask, column[ticker]] = 0.25
+        order[mask, column[ticker]] = pick_rank
+    return _to_frames(dates, tickers, weights, order)
+
+
+def strategy_target_weights(
+    strategy, dates, stock_data, monthly_prices, momentum_data, daily_data
+):
+    """전략 이름에 맞는 벡터화 함수로 (평가일 x 종목) weights, order 를 계산합니다."""
+    if strategy == "haa":
+        return haa_target_weights(dates, monthly_prices, momentum_data)
+    if strategy == "daa":
+        return daa_target_weights(dates, momentum_data)
+    if strategy == "laa":
+        return laa_target_weights(dates, stock_data, daily_data)
+    raise ValueError(f"알 수 없는 전략입니다: {strategy}")
@@ -0,0 +1,266 @@
+# sweep.py
+"""
+여러 파라미터 조합의 백테스트를 한 번에 실행합니다.
+
+- 같은 (DB, 종목 집합, 일별 지표 여부) 조합은 시세 로딩/지표 계산을 한 번만 합니다.
+  (시작일이 다른 조합은 가장 이른 시작일 기준으로 읽은 데이터를 함께 사용합니다.)
+- 준비된 가격/지표 패널은 공유 메모리에 올리고, 작업 프로세스는 이를 복사 없이 참조합니다.
+  작업마다 전달되는 것은 파라미터뿐입니다.
+- 결과는 조합별 요약 지표 한 행씩으로 이루어진 DataFrame 입니다.
+- 작업은 먼저 현재 프로세스에서 실행하고, INLINE_SECONDS 안에 끝나지 않은 나머지만 프로세스 풀로 보냅니다.
+  (작은 배치는 작업 프로세스 시작 비용 없이 끝납니다.) 동시에 실행되는 배치들의 작업 프로세스 합계는
+  MAX_POOL_WORKERS 를 넘지 않으며, 남은 자리가 없으면 현재 프로세스에서 계속 실행합니다.
+
+사용 예:
+    python sweep.py grid.json --workers 4 --output sweep.csv
+
+grid.json 형식:
+    {"base": {"capital": 10000, "start_date": "2010-01-01", "stocks": ["SPY", "0.6", "AGG", "0.4"]},
+     "grid": {"interval": ["1ME", "3ME"], "periodic_investment": [0, 500]},
+     "configs": [{"strategy": "default"}, {"strategy": "haa", "stocks": null}]}
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import DAILY_DATA_STRATEGIES
+from backtest_engine import resolve_universe, load_backtest_data, timed_simulate, build_result
+from instrumentation import StageTimings
+from analytics import performance_metrics, metrics_dict
+
+# BacktestParams(main.py) 의 기본값과 같습니다.
+DEFAULT_PARAMS = {
+    "end_date": None, "db_path": "stock_price.db", "strategy": "default", "interval": "1M",
+    "periodic_investment": 0.0, "no_rebalance": False, "stocks": None,
+}
+CONFIG_COLUMNS = ["strategy", "stocks", "start_date", "end_date", "interval", "capital", "periodic_investment", "no_rebalance"]
+# 프로세스 풀로 넘기기 전에 현재 프로세스에서 작업을 실행할 시간(초)
+INLINE_SECONDS = 0.5
+# 이 프로세스의 모든 배치(/backtest/batch 동시 요청 포함)가 함께 사용하는 작업 프로세스 수 상한
+MAX_POOL_WORKERS = os.cpu_count() or 1
+_pool_slots = threading.BoundedSemaphore(MAX_POOL_WORKERS)
+SUMMARY_COLUMNS = [
+    "final_portfolio_value", "total_investment", "final_roi", "mdd", "cagr", "volatility", "sharpe", "sortino", "calmar", "trades", "error",
+]
+
+def expand_grid(base=None, grid=None, configs=None):
+    """base 에 configs 의 각 항목과 grid 의 모든 조합(데카르트 곱)을 덮어쓴 파라미터 목록을 만듭니다."""
+    grid = grid or {}
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return [{**DEFAULT_PARAMS, **(base or {}), **config, **combo} for config in (configs or [{}]) for combo in combos]
+
+# --- 공유 메모리 패널 ---
+# 패널은 (이름, DataFrame/Series) 목록이며, 값은 하나의 float64 공유 메모리 블록에 이어서 저장합니다.
+# 인덱스/컬럼 등 메타 정보는 작업 프로세스를 시작할 때 한 번만 전달됩니다.
+
+def _panel_items(data):
+    stock_data, monthly_prices, momentum_data, daily_data = data
+    items = [("stock_data", stock_data), ("monthly_prices", monthly_prices)]
+    items += [(f"momentum/{name}", frame) for name, frame in momentum_data.items()]
+    items += [(f"daily/{name}", series) for name, series in daily_data.items()]
+    return items
+
+def _panel_data(frames):
+    momentum_data = {name.split("/", 1)[1]: frame for name, frame in frames.items() if name.startswith("momentum/")}
+    daily_data = {name.split("/", 1)[1]: series for name, series in frames.items() if name.startswith("daily/")}
+    return frames["stock_data"], frames["monthly_prices"], momentum_data, daily_data
+
+def pack_panel(data):
+    """준비된 데이터를 공유 메모리에 복사하고 (SharedMemory, 메타 정보) 를 반환합니다."""
+    items = _panel_items(data)
+    values = [obj.to_numpy(dtype=np.float64) for _, obj in items]
+    shm = shared_memory.SharedMemory(create=True, size=max(sum(v.nbytes for v in values), 1))
+    layout, offset = [], 0
+    for (name, obj), array in zip(items, values):
+        np.ndarray(array.shape, dtype=np.float64, buffer=shm.buf, offset=offset)[...] = array
+        layout.append({
+            "name": name, "offset": offset, "shape": array.shape,
+            "index": obj.index,
+            "columns": list(obj.columns) if isinstance(obj, pd.DataFrame) else None,
+            "columns_name": obj.columns.name if isinstance(obj, pd.DataFrame) else None,
+            "series_name": obj.name if isinstance(obj, pd.Series) else None,
+        })
+        offset += array.nbytes
+    return shm, {"shm_name": shm.name, "layout": layout}
+
+def unpack_panel(buffer, meta):
+    """공유 메모리 버퍼 위에 복사 없이 (stock_data, monthly_prices, momentum_data, daily_data) 를 만듭니다."""
+    frames = {}
+    for item in meta["layout"]:
+        array = np.ndarray(item["shape"], dtype=np.float64, buffer=buffer, offset=item["offset"])
+        array.flags.writeable = False
+        if item["columns"] is None:
+            frames[item["name"]] = pd.Series(array, index=item["index"], name=item["series_name"], copy=False)
+        else:
+            columns = pd.Index(item["columns"], name=item["columns_name"])
+            frames[item["name"]] = pd.DataFrame(array, index=item["index"], columns=columns, copy=False)
+    return _panel_data(frames)
+
+# --- 작업 프로세스 ---
+_worker_panels = {}
+_worker_memory = []
+
+def _init_worker(panel_meta):
+    """작업 프로세스 시작 시 모든 패널의 공유 메모리에 연결합니다."""
+    for key, meta in panel_meta.items():
+        shm = shared_memory.SharedMemory(name=meta["shm_name"], track=False)
+        _worker_memory.append(shm)
+        _worker_panels[key] = unpack_panel(shm.buf, meta)
+
+def summarize(numeric_df, journal):
+    """시뮬레이션 결과를 요약 지표(최종 값, MDD, CAGR/변동성/샤프/소르티노/칼마 비율, 거래 건수) 딕셔너리로 만듭니다."""
+    if numeric_df is None:
+        return {"error": "시뮬레이션 결과가 없습니다."}
+    metrics = performance_metrics(numeric_df["Portfolio Value"].to_numpy(), numeric_df.index, numeric_df["Total Investment"].to_numpy())
+    return {
+        "final_portfolio_value": numeric_df["Portfolio Value"].iloc[-1],
+        "total_investment": numeric_df["Total Investment"].iloc[-1],
+        "final_roi": numeric_df["ROI"].iloc[-1],
+        **metrics_dict(metrics),
+        "trades": journal.n_trades,
+    }
+
+def _simulate_task(data, task):
+    """[내부 함수] 작업 하나를 시뮬레이션하여 요약 지표(summary_only) 또는 전체 결과를 반환합니다."""
+    params, _, tickers, original_target_weights, summary_only = task
+    try:
+        if summary_only:
+            # 요약 지표에는 거래 건수만 필요하므로 거래 기록은 합계만 남깁니다.
+            params = {**params, "log_level": "summary"}
+        timings = StageTimings()
+        numeric_df, journal = timed_simulate(params, tickers, original_target_weights, data, timings)
+        return summarize(numeric_df, journal) if summary_only else build_result(params, tickers, numeric_df, journal, timings)
+    except Exception as e:
+        return {"error": str(e)}
+
+def _run_task(task):
+    return _simulate_task(_worker_panels[task[1]], task)
+
+def _acquire_pool_slots(wanted):
+    """작업 프로세스 자리를 최대 wanted 개 가져옵니다. (기다리지 않음, 가져온 수 반환)"""
+    acquired = 0
+    while acquired < wanted and _pool_slots.acquire(blocking=False):
+        acquired += 1
+    return acquired
+
+def _release_pool_slots(count):
+    for _ in range(count):
+        _pool_slots.release()
+
+def _config_frame(param_sets):
+    rows = []
+    for params in param_sets:
+        row = {k: v for k, v in params.items() if k not in ("db_path", "rolling_window", "rolling_step")}
+        if row.get("stocks") is not None:
+            row["stocks"] = " ".join(map(str, row["stocks"]))
+        rows.append(row)
+    frame = pd.DataFrame(rows)
+    return frame[[c for c in CONFIG_COLUMNS if c in frame.columns] + [c for c in frame.columns if c not in CONFIG_COLUMNS]]
+
+def run_batch(param_sets, workers=None, summary_only=False):
+    """
+    파라미터 딕셔너리 목록으로 백테스트를 실행하고 입력 순서대로 결과 목록을 반환합니다.
+
+    각 결과는 run_backtest 와 같은 딕셔너리(summary_only 이면 요약 지표 딕셔너리)이며,
+    실패한 항목은 {"error": 메시지} 입니다. workers 가 1 이하이면 현재 프로세스에서 실행하고,
+    그 밖에는 INLINE_SECONDS 이후 남은 작업을 최대 workers 개(전체 상한 MAX_POOL_WORKERS 안에서)의 작업 프로세스로 실행합니다.
+    """
+    param_sets = [{**DEFAULT_PARAMS, **params} for params in param_sets]
+    workers = os.cpu_count() if workers is None else workers
+
+    # --- 1. 종목 집합별로 묶어 데이터는 한 번만 준비 ---
+    tasks, results, groups = [], [None] * len(param_sets), {}
+    for i, params in enumerate(param_sets):
+        try:
+            all_tickers, original_target_weights = resolve_universe(params)
+        except (ValueError, KeyError) as e:
+            results[i] = {"error": str(e)}
+            continue
+        key = (params["db_path"], frozenset(all_tickers), params["strategy"] in DAILY_DATA_STRATEGIES)
+        group = groups.setdefault(key, {"start_date": params["start_date"], "tickers": all_tickers, "strategy": params["strategy"]})
+        group["start_date"] = min(group["start_date"], params["start_date"])
+        tasks.append((i, key, list(all_tickers), original_target_weights))
+
+    panels = {}
+    for key, group in groups.items():
+        try:
+            panels[key] = load_backtest_data(key[0], group["tickers"], group["start_date"], group["strategy"])
+        except Exception as e:
+            panels[key] = e
+
+    # --- 2. 시뮬레이션 (공유 메모리 패널 + 프로세스 풀) ---
+    runnable = []
+    for i, key, tickers, original_target_weights in tasks:
+        if isinstance(panels[key], Exception):
+            results[i] = {"error": str(panels[key])}
+        else:
+            runnable.append((i, (param_sets[i], key, tickers, original_target_weights, summary_only)))
+
+    # 작은 배치는 작업 프로세스를 시작하지 않고 끝냅니다.
+    started = time.perf_counter()
+    while runnable and (workers <= 1 or time.perf_counter() - started < INLINE_SECONDS):
+        i, task = runnable.pop(0)
+        results[i] = _simulate_task(panels[task[1]], task)
+    slots = _acquire_pool_slots(min(workers, len(runnable))) if len(runnable) > 1 else 0
+    if slots <= 1:
+        _release_pool_slots(slots)
+        for i, task in runnable:
+            results[i] = _simulate_task(panels[task[1]], task)
+        return results
+
+    shared, panel_meta = [], {}
+    try:
+        for key, data in panels.items():
+            if not isinstance(data, Exception):
+                shm, panel_meta[key] = pack_panel(data)
+                shared.append(shm)
+        chunksize = max(1, len(runnable) // (slots * 4))
+        with ProcessPoolExecutor(max_workers=slots, initializer=_init_worker, initargs=(panel_meta,)) as pool:
+            for (i, _), result in zip(runnable, pool.map(_run_task, [task for _, task in runnable], chunksize=chunksize)):
+                results[i] = result
+    finally:
+        _release_pool_slots(slots)
+        for shm in shared:
+            shm.close()
+            shm.unlink()
+    return results
+
+def run_sweep(param_sets, workers=None):
+    """
+    파라미터 딕셔너리 목록으로 백테스트를 실행하고 조합별 요약 지표 DataFrame 을 반환합니다.
+
+    workers 가 1 이하이면 현재 프로세스에서 순서대로 실행합니다. 조합별 오류는 'error' 열에 기록됩니다.
+    """
+    param_sets = [{**DEFAULT_PARAMS, **params} for params in param_sets]
+    results = run_batch(param_sets, workers=workers, summary_only=True)
+    summary_df = pd.DataFrame(results).reindex(columns=SUMMARY_COLUMNS)
+    return pd.concat([_config_frame(param_sets), summary_df], axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="파라미터 조합별 백테스트 요약 지표를 계산합니다.")
+    parser.add_argument("grid_file", help="base/grid/configs 를 담은 JSON 파일")
+    parser.add_argument("--workers", type=int, default=None, help="작업 프로세스 수 (기본: CPU 수, 1 이면 단일 프로세스)")
+    parser.add_argument("--output", default=None, help="결과 CSV 저장 경로")
+    args = parser.parse_args()
+
+    with open(args.grid_file, encoding="utf-8") as f:
+        spec = json.load(f)
+    param_sets = expand_grid(spec.get("base"), spec.get("grid"), spec.get("configs"))
+    print(f"{len(param_sets)}개 조합 실행 중...", file=sys.stderr)
+    summary = run_sweep(param_sets, workers=args.workers)
+    if args.output:
+        summary.to_csv(args.output, index=False)
+        print(f"결과 저장: {args.output}", file=sys.stderr)
+    with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200):
+        print(summary.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# 합성 DB(synthetic_db.generate_database)를 쓰기 위해 저장소 루트를 import 경로 끝에 추가합니다.
+# (이름이 같은 모듈은 be 의 것이 먼저 찾아지도록 끝에 둡니다.)
+import os
+import sys
+
+sys.path.append(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
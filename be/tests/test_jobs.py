@@ -0,0 +1,206 @@
+# test_jobs.py
+"""
+JobStore 정리(TTL/작업 수/결과 용량), 시작 시 끝나지 못한 작업 처리, JobQueue 의 상태 갱신을 확인합니다.
+
+실행: python -m unittest (be 디렉터리에서)
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+import jobs
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, JobStore
+
+NOW = 1_000_000.0
+
+
+def _dead_pid():
+    """이미 끝나 회수된 프로세스의 pid."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class JobStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _add(self, store, name, status, updated, result_bytes=0, owner=None):
+        """updated 시각과 결과 크기를 정해 작업을 만듭니다. 작업 ID 를 반환합니다."""
+        job_id = f"{name:0>32}"
+        store.write(
+            job_id,
+            {
+                "id": job_id,
+                "status": status,
+                "created": updated,
+                "updated": updated,
+                "progress": {"done": 0, "total": None},
+                "error": None,
+                "params": {},
+                "owner": owner,
+            },
+        )
+        if result_bytes:
+            with open(store._result_path(job_id), "w", encoding="utf-8") as f:
+                f.write("x" * result_bytes)
+        return job_id
+
+    def _ids(self, store):
+        return sorted(job["id"] for job in store.jobs())
+
+
+class EvictTest(JobStoreTestCase):
+    def test_ttl(self):
+        store = JobStore(self.directory, ttl=100)
+        expired = self._add(store, "1", DONE, NOW - 200, result_bytes=10)
+        failed = self._add(store, "2", FAILED, NOW - 101)
+        fresh = self._add(store, "3", DONE, NOW - 50)
+        running = self._add(store, "4", RUNNING, NOW - 500)
+        queued = self._add(store, "5", QUEUED, NOW - 500)
+
+        store.evict(now=NOW)
+
+        self.assertEqual(self._ids(store), sorted([fresh, running, queued]))
+        self.assertFalse(os.path.exists(store._result_path(expired)))
+        self.assertIsNone(store.get(failed))
+
+    def test_max_jobs_removes_oldest_finished_first(self):
+        store = JobStore(self.directory, ttl=10_000, max_jobs=3)
+        finished = [self._add(store, str(i), DONE, NOW - 100 + i) for i in range(4)]
+        running = self._add(store, "9", RUNNING, NOW - 1000)
+
+        store.evict(now=NOW)
+
+        # 끝나지 않은 작업은 수에는 들어가지만 지우지 않습니다.
+        self.assertEqual(self._ids(store), sorted(finished[2:] + [running]))
+
+    def test_max_result_bytes_removes_oldest_finished_first(self):
+        store = JobStore(self.directory, ttl=10_000, max_result_bytes=250)
+        sizes = [100, 100, 100, 100]
+        finished = [
+            self._add(store, str(i), DONE, NOW - 100 + i, result_bytes=size)
+            for i, size in enumerate(sizes)
+        ]
+        no_result = self._add(store, "8", FAILED, NOW - 200)
+
+        store.evict(now=NOW)
+
+        # 가장 오래된 결과 없는 작업(0바이트)을 먼저 지우고, 그다음 오래된 결과부터 지웁니다.
+        self.assertEqual(self._ids(store), sorted(finished[2:]))
+        self.assertIsNone(store.get(no_result))
+
+    def test_evict_tolerates_missing_result_files(self):
+        store = JobStore(self.directory, ttl=100)
+        job_id = self._add(store, "1", DONE, NOW - 200, result_bytes=10)
+        os.remove(store._result_path(job_id))
+        store.evict(now=NOW)
+        store.delete(job_id)
+        self.assertEqual(self._ids(store), [])
+
+
+class FailUnfinishedTest(JobStoreTestCase):
+    def test_only_jobs_of_gone_owners_fail(self):
+        store = JobStore(self.directory)
+        host = socket.gethostname()
+        dead = self._add(
+            store, "1", RUNNING, NOW, owner={"host": host, "pid": _dead_pid()}
+        )
+        legacy = self._add(store, "2", QUEUED, NOW)
+        live = self._add(
+            store, "3", RUNNING, NOW, owner={"host": host, "pid": os.getpid()}
+        )
+        remote = self._add(
+            store, "4", QUEUED, NOW, owner={"host": host + "-other", "pid": 1}
+        )
+        done = self._add(
+            store, "5", DONE, NOW, owner={"host": host, "pid": _dead_pid()}
+        )
+
+        store.fail_unfinished("재시작")
+
+        for job_id in (dead, legacy):
+            self.assertEqual(store.get(job_id)["status"], FAILED)
+            self.assertEqual(store.get(job_id)["error"], "재시작")
+        self.assertEqual(store.get(live)["status"], RUNNING)
+        self.assertEqual(store.get(remote)["status"], QUEUED)
+        self.assertEqual(store.get(done)["status"], DONE)
+        self.assertIsNone(store.get(done)["error"])
+
+    def test_created_jobs_record_this_process(self):
+        store = JobStore(self.directory)
+        job_id = store.create({"strategy": "haa"})
+        self.assertEqual(
+            store.get(job_id)["owner"],
+            {"host": socket.gethostname(), "pid": os.getpid()},
+        )
+        # 이 프로세스가 다시 JobQueue 를 만들어도 자기 작업은 실패로 표시하지 않습니다.
+        JobQueue(store)
+        self.assertEqual(store.get(job_id)["status"], QUEUED)
+
+
+class JobQueueTest(JobStoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = JobStore(self.directory, ttl=100)
+        self.queue = JobQueue(self.store)
+
+    def test_on_done_marks_crashed_and_cancelled_jobs_failed(self):
+        crashed = self.store.create({})
+        future = Future()
+        future.set_exception(RuntimeError("작업 프로세스 종료"))
+        self.queue._on_done(crashed, future)
+        self.assertEqual(self.store.get(crashed)["status"], FAILED)
+        self.assertEqual(self.store.get(crashed)["error"], "작업 프로세스 종료")
+
+        cancelled = self.store.create({})
+        future = Future()
+        future.cancel()
+        self.queue._on_done(cancelled, future)
+        self.assertEqual(self.store.get(cancelled)["status"], FAILED)
+        self.assertEqual(self.store.get(cancelled)["error"], "작업이 취소되었습니다.")
+
+        # 정상 종료한 작업의 상태는 작업 프로세스가 기록한 그대로 둡니다.
+        finished = self.store.create({})
+        self.store.update(finished, status=DONE)
+        future = Future()
+        future.set_result(None)
+        self.queue._on_done(finished, future)
+        self.assertEqual(self.store.get(finished)["status"], DONE)
+
+    def test_status_polls_evict_at_most_once_per_interval(self):
+        expired = self._add(self.store, "1", DONE, 0.0)
+        with mock.patch.object(jobs.time, "monotonic", return_value=10_000.0):
+            self.assertIsNone(self.queue.status(expired))
+
+        # 간격 안의 다음 조회는 정리하지 않습니다.
+        expired = self._add(self.store, "2", DONE, 0.0)
+        with mock.patch.object(
+            jobs.time, "monotonic", return_value=10_000.0 + jobs.EVICT_INTERVAL / 2
+        ):
+            self.assertEqual(self.queue.status(expired)["status"], DONE)
+        with mock.patch.object(
+            jobs.time, "monotonic", return_value=10_000.0 + jobs.EVICT_INTERVAL
+        ):
+            self.assertIsNone(self.queue.status(expired))
+
+    def test_status_includes_result_of_done_jobs(self):
+        job_id = self.store.create({})
+        self.store.set_result(job_id, {"summary": {"final": 1}})
+        self.assertNotIn("result", self.queue.status(job_id))
+        self.store.update(job_id, status=DONE)
+        self.assertEqual(self.queue.status(job_id)["result"], {"summary": {"final": 1}})
+        self.assertNotIn("result", self.queue.status(job_id, include_result=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
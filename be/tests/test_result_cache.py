@@ -0,0 +1,105 @@
+# test_result_cache.py
+"""
+ResultCache 의 키가 DB 데이터 버전(MAX(rowid))을 따라가는지, 오류 결과를 저장하지 않는지 확인합니다.
+
+실행: python -m unittest (be 디렉터리에서)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from init_data_gemini import configure_connection, write_price_rows
+from result_cache import ResultCache
+from synthetic_db import generate_database
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "synthetic.db")
+        self.cache_dir = os.path.join(self.directory, "results")
+        generate_database(self.db_path, n_symbols=2, years=1, seed=7)
+        self.cache = ResultCache(directory=self.cache_dir)
+        self.params = {
+            "db_path": self.db_path,
+            "strategy": "haa",
+            "stocks": [],
+            "initial_investment": 10000,
+            "start_date": "2025-01-01",
+            "include_timings": False,
+        }
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _compute(self, params):
+        self.calls += 1
+        return {"value": self.calls}
+
+    def _ingest_existing_row(self):
+        """이미 있는 행을 같은 값으로 다시 기록합니다. (INSERT OR REPLACE 로 rowid 만 커짐)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            configure_connection(conn)
+            row = conn.execute(
+                "SELECT Symbol, Date, Open, High, Low, Close, Volume, Change "
+                "FROM stock_price ORDER BY Date LIMIT 1"
+            ).fetchone()
+            write_price_rows(conn, [row])
+        finally:
+            conn.close()
+
+    def test_key_changes_after_ingestion(self):
+        key = self.cache.key_for(self.params)
+        self.assertEqual(
+            self.cache.get_or_compute(self.params, self._compute), {"value": 1}
+        )
+        self.assertEqual(
+            self.cache.get_or_compute(self.params, self._compute), {"value": 1}
+        )
+        # 결과에 영향을 주지 않는 파라미터와 숫자형 차이는 같은 키입니다.
+        same = {**self.params, "initial_investment": 10000.0, "include_timings": True}
+        self.assertEqual(self.cache.key_for(same), key)
+
+        self._ingest_existing_row()
+        new_key = self.cache.key_for(self.params)
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(self.cache.get(new_key))
+        self.assertEqual(
+            self.cache.get_or_compute(self.params, self._compute), {"value": 2}
+        )
+        self.assertEqual(self.calls, 2)
+
+        # 디스크 계층도 같은 키를 사용합니다. (새 프로세스의 빈 메모리 계층)
+        reopened = ResultCache(directory=self.cache_dir)
+        self.assertEqual(reopened.get(key), {"value": 1})
+        self.assertEqual(reopened.get(new_key), {"value": 2})
+
+    def test_error_result_is_not_stored(self):
+        def failing(params):
+            self.calls += 1
+            return {"error": "데이터 없음"}
+
+        for _ in range(2):
+            self.assertEqual(
+                self.cache.get_or_compute(self.params, failing),
+                {"error": "데이터 없음"},
+            )
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats()["stores"], 0)
+        self.assertEqual(self.cache.stats()["memory_entries"], 0)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_missing_db_is_not_cached(self):
+        params = {**self.params, "db_path": os.path.join(self.directory, "none.db")}
+        self.assertIsNone(self.cache.key_for(params))
+        self.cache.get_or_compute(params, self._compute)
+        self.cache.get_or_compute(params, self._compute)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
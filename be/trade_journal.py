@@ -0,0 +1,328 @@
+# trade_journal.py
+
+"""
+백테스트 거래 기록(저널).
+
+거래/이벤트를 건마다 딕셔너리나 문자열로 만들지 않고, 타입이 정해진 컬럼형 버퍼
+(numpy 배열)에 기록한 뒤 필요할 때 한 번에 내보냅니다.
+
+기록 수준 (level)
+- off     : 아무것도 기록하지 않습니다. (거래당 추가 비용 없음)
+- summary : 거래 구분별 건수/금액/수수료 합계만 기록합니다.
+- trades  : summary + 체결된 거래 한 건씩
+- debug   : trades + 평가일 시작, 추가 입금, 안내 메시지 (기존 logs/출력과 동일)
+
+내보내기
+- records() : API 응답용 딕셔너리 목록 (기존 logs 형식)
+- lines()   : CLI 출력용 문자열 (기존 print 형식), write() 로 버퍼링하여 출력
+- to_frame() / to_csv() : 표 형식
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+
+OFF, SUMMARY, TRADES, DEBUG = 0, 1, 2, 3
+LEVELS = {"off": OFF, "summary": SUMMARY, "trades": TRADES, "debug": DEBUG}
+
+# 기록 종류
+EVALUATION, DEPOSIT, INFO, TRANSACTION = 0, 1, 2, 3
+KIND_NAMES = ["EVALUATION_START", "DEPOSIT", "INFO", "TRANSACTION"]
+
+# 거래 구분: (API action, CLI 설명, 매수 여부)
+INITIAL_BUY, REBALANCE_BUY, SELL_ALL, SELL_ADJUST, SWEEP_BUY, PERIODIC_BUY = range(6)
+ACTIONS = [
+    ("BUY", "초기 매수", True),
+    ("BUY", "매수/추가매수", True),
+    ("SELL_ALL", "전량 매도", False),
+    ("SELL_ADJUST", "비중조절 매도", False),
+    ("SWEEP_BUY", "잔여 현금 매수", True),
+    ("PERIODIC_BUY", "추가 매수", True),
+]
+
+# 안내 메시지: (API 메시지, CLI 출력). {amount} 는 기록된 금액으로 채워집니다.
+HOLD, SWEEP, PERIODIC, STATIC_REBALANCE = range(4)
+MESSAGES = [
+    (
+        "목표 포트폴리오를 결정할 수 없어 현재 상태 유지",
+        "목표 포트폴리오를 결정할 수 없어 현재 상태를 유지합니다.",
+    ),
+    ("잔여 현금({amount:,.2f}) 추가 매수 실행", "--- 잔여 현금({amount:,.2f}) 추가 매수 실행 ---"),
+    ("주기적 추가 매수 실행 (리밸런싱 없음)", "--- 주기적 추가 매수 (리밸런싱 없음) ---"),
+    ("정적 비중 리밸런싱 실행", None),
+]
+
+# 컬럼: (dtype, 기본값)
+_COLUMNS = {
+    "kind": (np.int8, -1),
+    "date": (np.int32, -1),
+    "dated": (np.bool_, False),
+    "action": (np.int8, -1),
+    "ticker": (np.int32, -1),
+    "shares": (np.int64, 0),
+    "price": (np.float64, np.nan),
+    "amount": (np.float64, np.nan),
+    "fee": (np.float64, np.nan),
+    "cash": (np.float64, np.nan),
+    "message": (np.int8, -1),
+}
+# to_frame() 결과 컬럼
+FRAME_COLUMNS = [
+    "date",
+    "type",
+    "action",
+    "ticker",
+    "shares",
+    "price",
+    "amount",
+    "fee",
+    "cash",
+    "message",
+]
+INITIAL_CAPACITY = 256
+WRITE_CHUNK_LINES = 4096
+
+
+def parse_level(level):
+    """'off'/'summary'/'trades'/'debug' 또는 정수 수준을 정수로 변환합니다."""
+    if isinstance(level, str):
+        if level not in LEVELS:
+            raise ValueError(f"알 수 없는 로그 수준입니다: {level} ({', '.join(LEVELS)})")
+        return LEVELS[level]
+    return int(level)
+
+
+class TradeJournal:
+    """평가일/종목 축을 공유하는 컬럼형 거래 기록."""
+
+    def __init__(self, level=DEBUG, dates=None, tickers=None):
+        self.level = parse_level(level)
+        self.dates = dates
+        self.tickers = list(tickers) if tickers is not None else []
+        self.date = -1
+        self.size = 0
+        self.columns = {}
+        if self.level >= TRADES:
+            self.columns = {
+                name: np.full(INITIAL_CAPACITY, default, dtype=dtype)
+                for name, (dtype, default) in _COLUMNS.items()
+            }
+        self.action_counts = np.zeros(len(ACTIONS), dtype=np.int64)
+        self.action_amounts = np.zeros(len(ACTIONS))
+        self.action_fees = np.zeros(len(ACTIONS))
+
+    # --- 기록 ---
+    def _append(self, n, **values):
+        capacity = len(self.columns["kind"])
+        if self.size + n > capacity:
+            new_capacity = max(capacity * 2, self.size + n)
+            for name, (dtype, default) in _COLUMNS.items():
+                grown = np.full(new_capacity, default, dtype=dtype)
+                grown[: self.size] = self.columns[name][: self.size]
+                self.columns[name] = grown
+        rows = slice(self.size, self.size + n)
+        for name, value in values.items():
+            self.columns[name][rows] = value
+        self.columns["date"][rows] = self.date
+        self.size += n
+
+    def start_date(self, index):
+        """index 번째 평가일의 기록을 시작합니다."""
+        self.date = index
+        if self.level >= DEBUG:
+            self._append(1, kind=EVALUATION, dated=True)
+
+    def deposit(self, amount, cash):
+        if self.level >= DEBUG:
+            self._append(1, kind=DEPOSIT, dated=True, amount=amount, cash=cash)
+
+    def info(self, message, amount=np.nan, dated=False):
+        if self.level >= DEBUG:
+            self._append(1, kind=INFO, dated=dated, message=message, amount=amount)
+
+    def trades(self, trades, actions, dated=False):
+        """
+        체결된 주문 배열(_execute_orders 의 반환값)을 기록합니다.
+
+        actions 는 거래 구분 코드 하나 또는 거래별 코드 배열입니다.
+        """
+        if self.level == OFF:
+            return
+        positions, shares, prices, amounts, fees, _ = trades
+        n = len(positions)
+        if n == 0:
+            return
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int8), (n,))
+        np.add.at(self.action_counts, actions, 1)
+        np.add.at(self.action_amounts, actions, amounts)
+        np.add.at(self.action_fees, actions, fees)
+        if self.level >= TRADES:
+            self._append(
+                n,
+                kind=TRANSACTION,
+                dated=dated,
+                action=actions,
+                ticker=positions,
+                shares=shares,
+                price=prices,
+                amount=amounts,
+                fee=fees,
+            )
+
+    # --- 내보내기 ---
+    @property
+    def n_trades(self):
+        return int(self.action_counts.sum())
+
+    def summary(self):
+        """거래 구분별 건수/금액/수수료 합계를 반환합니다. (API action 기준으로 합산)"""
+        by_action = {}
+        for code, (action, _, _) in enumerate(ACTIONS):
+            if self.action_counts[code] == 0:
+                continue
+            entry = by_action.setdefault(
+                action, {"count": 0, "amount": 0.0, "fees": 0.0}
+            )
+            entry["count"] += int(self.action_counts[code])
+            entry["amount"] += float(self.action_amounts[code])
+            entry["fees"] += float(self.action_fees[code])
+        return {
+            "trades": self.n_trades,
+            "total_fees": float(self.action_fees.sum()),
+            "by_action": by_action,
+        }
+
+    def _column_lists(self):
+        return {
+            name: column[: self.size].tolist() for name, column in self.columns.items()
+        }
+
+    def _date_labels(self):
+        if self.dates is None:
+            return []
+        return pd.DatetimeIndex(self.dates).strftime("%Y-%m-%d").tolist()
+
+    def _render_level(self, level):
+        # 기록한 수준보다 자세하게 내보낼 수는 없습니다.
+        return self.level if level is None else min(parse_level(level), self.level)
+
+    def records(self, level=None):
+        """API 응답용 기록 목록. (debug 수준이면 기존 logs 와 같은 형식/순서)"""
+        level = self._render_level(level)
+        if level < TRADES:
+            return []
+        c = self._column_lists()
+        labels = self._date_labels()
+        # trades 수준에서는 평가일 기록이 없으므로 모든 거래에 날짜를 붙입니다.
+        always_dated = level < DEBUG
+        records = []
+        for k in range(self.size):
+            kind = c["kind"][k]
+            if kind != TRANSACTION and level < DEBUG:
+                continue
+            entry = {"type": KIND_NAMES[kind]}
+            if kind == TRANSACTION:
+                entry.update(
+                    action=ACTIONS[c["action"][k]][0],
+                    ticker=self.tickers[c["ticker"][k]],
+                    shares=c["shares"][k],
+                    price=c["price"][k],
+                    amount=c["amount"][k],
+                    fee=c["fee"][k],
+                )
+            elif kind == DEPOSIT:
+                entry["amount"] = c["amount"][k]
+            elif kind == INFO:
+                template = MESSAGES[c["message"][k]][0]
+                entry["message"] = template.format(amount=c["amount"][k])
+            if c["dated"][k] or always_dated:
+                entry = {"date": labels[c["date"][k]], **entry}
+            records.append(entry)
+        return records
+
+    def lines(self, level=None):
+        """CLI 출력용 문자열 목록. (debug 수준이면 기존 출력과 동일, summary 수준이면 합계 표)"""
+        level = self._render_level(level)
+        if level == SUMMARY:
+            return self.summary_lines()
+        if level < TRADES:
+            return []
+        c = self._column_lists()
+        labels = self._date_labels()
+        lines = []
+        for k in range(self.size):
+            kind = c["kind"][k]
+            if kind != TRANSACTION and level < DEBUG:
+                continue
+            if kind == TRANSACTION:
+                _, label, is_buy = ACTIONS[c["action"][k]]
+                ticker, n = self.tickers[c["ticker"][k]], c["shares"][k]
+                prefix = "" if level >= DEBUG else f"[{labels[c['date'][k]]}] "
+                if is_buy:
+                    lines.append(
+                        f"{prefix}- {ticker}: {n:,}주 {label} (비용: {c['amount'][k]:,.2f}, 수수료: {c['fee'][k]:,.2f})"
+                    )
+                else:
+                    lines.append(
+                        f"{prefix}- {ticker}: {n:,}주 {label} (금액: {c['amount'][k]:,.2f}, 비용: {c['fee'][k]:,.2f})"
+                    )
+            elif kind == EVALUATION:
+                lines.append(f"\n--- 평가일: {labels[c['date'][k]]} ---")
+            elif kind == DEPOSIT:
+                lines.append(
+                    f"✅ 추가 투자금 입금: {c['amount'][k]:,.2f} | 조정 후 현금: {c['cash'][k]:,.2f}"
+                )
+            elif kind == INFO:
+                text = MESSAGES[c["message"][k]][1]
+                if text is not None:
+                    lines.append(text.format(amount=c["amount"][k]))
+        return lines
+
+    def summary_lines(self):
+        lines = ["\n--- 거래 요약 ---"]
+        for code, (_, label, _) in enumerate(ACTIONS):
+            if self.action_counts[code]:
+                lines.append(
+                    f"- {label}: {self.action_counts[code]:,}건 (금액: {self.action_amounts[code]:,.2f}, 수수료: {self.action_fees[code]:,.2f})"
+                )
+        lines.append(f"총 {self.n_trades:,}건, 수수료 합계: {self.action_fees.sum():,.2f}")
+        return lines
+
+    def write(self, stream=None, level=None):
+        """lines(level) 을 WRITE_CHUNK_LINES 줄씩 묶어 stream(기본: 표준 출력)에 씁니다."""
+        stream = sys.stdout if stream is None else stream
+        lines = self.lines(level)
+        for start in range(0, len(lines), WRITE_CHUNK_LINES):
+            stream.write("\n".join(lines[start : start + WRITE_CHUNK_LINES]) + "\n")
+        stream.flush()
+
+    def to_frame(self):
+        """기록을 DataFrame 으로 반환합니다. (trades 수준 이상)"""
+        n = self.size
+        if n == 0:
+            return pd.DataFrame(columns=FRAME_COLUMNS)
+        c = {name: column[:n] for name, column in self.columns.items()}
+        labels = np.array(self._date_labels() + [None], dtype=object)
+        tickers = np.array(self.tickers + [None], dtype=object)
+        actions = np.array([a[0] for a in ACTIONS] + [None], dtype=object)
+        messages = [
+            None if m < 0 else MESSAGES[m][0].format(amount=a)
+            for m, a in zip(c["message"].tolist(), c["amount"].tolist())
+        ]
+        return pd.DataFrame(
+            {
+                "date": labels[c["date"]],
+                "type": np.array(KIND_NAMES, dtype=object)[c["kind"]],
+                "action": actions[c["action"]],
+                "ticker": tickers[c["ticker"]],
+                "shares": c["shares"],
+                "price": c["price"],
+                "amount": c["amount"],
+                "fee": c["fee"],
+                "cash": c["cash"],
+                "message": messages,
+            }
+        )
+
+    def to_csv(self, path):
+        self.to_frame().to_csv(path, index=False)
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+합성 DB(synthetic_db.py)로 주요 경로의 실행 시간과 메모리를 측정합니다. 네트워크를 사용하지 않습니다.
+
+- 측정 대상: data_handler.load_data(일별/월말), data_handler.prepare_strategy_data,
+  be/backtest_engine.run_backtest, bt_gemini.process_single_symbol / process_symbol_block,
+  init_data_gemini.save_price_to_db
+- 규모(scale)별로 합성 DB 를 한 번 만들어 작업 디렉터리에 두고 다시 사용합니다.
+- 측정 항목마다 새로 띄운(spawn) 프로세스에서 준비 -> repeat 회 시간 측정 -> tracemalloc 1회를
+  실행하므로 항목 간 캐시/메모리 상태가 섞이지 않습니다. 첫 회는 디스크 캐시(지표 캐시 등)가 빈 상태입니다.
+- 결과는 JSON 으로 저장하며, --compare 로 이전 결과(다른 커밋)와 비교할 수 있습니다.
+  중앙값이 --threshold 비율보다 느려진 항목이 있으면 종료 코드 1 을 반환합니다.
+
+사용 예:
+    python benchmark.py --scales small medium --output bench.json
+    python benchmark.py --scales small --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional
+from pool_profiler import current_rss_bytes, peak_rss_bytes, reset_peak_rss
+
+ROOT_DIR: str = os.path.dirname(os.path.abspath(__file__))
+BE_DIR: str = os.path.join(ROOT_DIR, "be")
+DEFAULT_WORK_DIR: str = "benchmark_data"
+RESULT_FORMAT_VERSION: int = 1
+# 규모별 합성 DB 생성 인자 (synthetic_db.generate_database)
+SCALES: Dict[str, dict] = {
+    "small": {"n_symbols": 50, "years": 5},
+    "medium": {"n_symbols": 500, "years": 10},
+    "large": {"n_symbols": 3000, "years": 20},
+}
+SEED: int = 0
+# 합성 DB 의 마지막 날짜 (결과가 실행 날짜에 따라 달라지지 않도록 고정)
+END_DATE: str = "2025-12-31"
+# process_single_symbol / save_price_to_db 에서 한 번에 처리할 종목 수
+SYMBOLS_PER_RUN: int = 50
+# process_symbol_block 에서 한 번에 처리할 종목 수
+SYMBOLS_PER_BLOCK: int = 256
+# save_price_to_db 로 한 번에 기록할 새 거래일 수
+NEW_DAYS_PER_RUN: int = 20
+
+
+# --- 측정 항목 ---
+# 각 항목은 (DB 경로, 규모 인자) 를 받아 준비를 마치고, 측정할 인자 없는 함수를 반환합니다.
+# 준비 과정은 측정 시간에 포함되지 않습니다.
+
+
+def _backtest_start(scale: dict) -> str:
+    """지표 계산용 과거 구간(13개월)을 남긴 백테스트 시작일."""
+    import pandas as pd
+
+    start = pd.Timestamp(END_DATE) - pd.DateOffset(years=scale["years"])
+    return (start + pd.DateOffset(months=14)).strftime("%Y-%m-%d")
+
+
+def _strategy_tickers() -> List[str]:
+    from config import STRATEGY_ASSETS
+
+    return sorted(
+        {t for assets in STRATEGY_ASSETS.values() for group in assets.values() for t in group}
+    )
+
+
+def _clear_caches(db_path: str) -> None:
+    """DB 옆의 지표 캐시를 지워 첫 회 측정이 빈 캐시에서 시작되도록 합니다."""
+    from indicator_cache import get_cache_dir
+
+    shutil.rmtree(get_cache_dir(db_path), ignore_errors=True)
+
+
+def bench_load_data_daily(db_path: str, scale: dict) -> Callable[[], object]:
+    from data_handler import load_data
+
+    tickers, start = _strategy_tickers(), _backtest_start(scale)
+    return lambda: load_data(db_path, tickers, start)
+
+
+def bench_load_data_monthly(db_path: str, scale: dict) -> Callable[[], object]:
+    from data_handler import load_data
+
+    tickers, start = _strategy_tickers(), _backtest_start(scale)
+    return lambda: load_data(db_path, tickers, start, frequency="monthly")
+
+
+def bench_prepare_strategy_data(db_path: str, scale: dict) -> Callable[[], object]:
+    from data_handler import load_data, prepare_strategy_data
+
+    stock_data = load_data(db_path, _strategy_tickers(), _backtest_start(scale))
+    # 지표 캐시 없이 전체 계산 시간을 측정합니다.
+    return lambda: prepare_strategy_data(stock_data, include_daily=True)
+
+
+def _run_backtest_case(strategy: str, stocks: Optional[List[str]]):
+    def bench(db_path: str, scale: dict) -> Callable[[], object]:
+        # be 의 모듈(backtest_engine, portfolio_manager 등)이 루트의 같은 이름 모듈보다 먼저 import 되도록 합니다.
+        sys.path.insert(0, BE_DIR)
+        from backtest_engine import run_backtest
+
+        _clear_caches(db_path)
+        params = {
+            "capital": 10000.0,
+            "start_date": _backtest_start(scale),
+            "end_date": None,
+            "db_path": db_path,
+            "strategy": strategy,
+            "interval": "1ME",
+            "periodic_investment": 100.0,
+            "no_rebalance": False,
+            "stocks": stocks,
+            "rolling_window": 3,
+            "rolling_step": "1Y",
+            "log_level": "debug",
+            "response_format": "rows",
+        }
+        return lambda: run_backtest(params)
+
+    return bench
+
+
+def _attach_close_panel(db_path: str, scale: dict):
+    """bt_gemini 의 종가 패널을 읽어 공유 메모리에 올리고 워커처럼 연결합니다."""
+    import numpy as np
+    from multiprocessing import shared_memory
+    import pandas as pd
+    import bt_gemini
+
+    start = pd.Timestamp(END_DATE) - pd.DateOffset(years=scale["years"])
+    markets = ["NASDAQ", "NYSE", "ETF_US"]
+    dates, symbols, values = bt_gemini.load_close_panel(
+        db_path,
+        bt_gemini.get_all_symbols(db_path, *markets),
+        start.strftime("%Y-%m-%d"),
+        END_DATE,
+    )
+    purchase_rows, market_codes = bt_gemini.load_purchase_rows(
+        db_path, dates, symbols, markets
+    )
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf, order="F")[:] = values
+    bt_gemini._attach_panel(
+        shm.name, values.shape, dates, symbols, purchase_rows, market_codes
+    )
+    # 측정 프로세스가 끝나면 공유 메모리를 해제합니다.
+    _KEEP_ALIVE.append(shm)
+    return bt_gemini, symbols
+
+
+def bench_process_single_symbol(db_path: str, scale: dict) -> Callable[[], object]:
+    bt_gemini, symbols = _attach_close_panel(db_path, scale)
+    columns = range(min(SYMBOLS_PER_RUN, len(symbols)))
+    return lambda: [bt_gemini.process_single_symbol(symbols[c], c) for c in columns]
+
+
+def bench_process_symbol_block(db_path: str, scale: dict) -> Callable[[], object]:
+    bt_gemini, symbols = _attach_close_panel(db_path, scale)
+    return lambda: bt_gemini.process_symbol_block(0, min(SYMBOLS_PER_BLOCK, len(symbols)))
+
+
+def bench_save_price_to_db(db_path: str, scale: dict) -> Callable[[], object]:
+    """
+    DB 복사본에 SYMBOLS_PER_RUN 개 종목의 새 거래일(NEW_DAYS_PER_RUN 일)을 기록합니다.
+
+    회차마다 다음 구간의 날짜를 기록하므로 매번 실제 증분 수집과 같은 추가 기록이 됩니다.
+    """
+    import numpy as np
+    import pandas as pd
+    from init_data_gemini import save_price_to_db
+    from synthetic_db import remove_database
+
+    copy_path = db_path + ".bench-write.db"
+    remove_database(copy_path)
+    shutil.copyfile(db_path, copy_path)
+    _CLEANUP.append(lambda: remove_database(copy_path))
+
+    import bt_gemini
+
+    symbols = sorted(bt_gemini.get_all_symbols(copy_path, "NASDAQ", "NYSE"))[:SYMBOLS_PER_RUN]
+    rng = np.random.default_rng(SEED)
+    next_day = [pd.Timestamp(END_DATE) + pd.offsets.BDay(1)]
+
+    def frames() -> List[tuple]:
+        dates = pd.bdate_range(next_day[0], periods=NEW_DAYS_PER_RUN)
+        next_day[0] = dates[-1] + pd.offsets.BDay(1)
+        result = []
+        for symbol in symbols:
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+            result.append(
+                (
+                    symbol,
+                    pd.DataFrame(
+                        {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000},
+                        index=dates,
+                    ),
+                )
+            )
+        return result
+
+    # 측정에는 기록 시간만 포함되도록 회차별 데이터는 미리 만들어 둡니다.
+    batches = [frames() for _ in range(_MAX_RUNS[0])]
+
+    def run() -> None:
+        for symbol, df in batches.pop(0):
+            save_price_to_db(copy_path, symbol, df)
+
+    return run
+
+
+CASES: Dict[str, Callable[[str, dict], Callable[[], object]]] = {
+    "load_data_daily": bench_load_data_daily,
+    "load_data_monthly": bench_load_data_monthly,
+    "prepare_strategy_data": bench_prepare_strategy_data,
+    "run_backtest_default": _run_backtest_case("default", ["SPY", "0.6", "AGG", "0.4"]),
+    "run_backtest_haa": _run_backtest_case("haa", None),
+    "run_backtest_laa": _run_backtest_case("laa", None),
+    "process_single_symbol": bench_process_single_symbol,
+    "process_symbol_block": bench_process_symbol_block,
+    "save_price_to_db": bench_save_price_to_db,
+}
+
+# 측정 프로세스 안에서만 쓰는 상태 (공유 메모리 참조, 정리 작업, 전체 실행 횟수)
+_KEEP_ALIVE: list = []
+_CLEANUP: List[Callable[[], None]] = []
+_MAX_RUNS: List[int] = [1]
+
+
+def measure_case(case: str, db_path: str, scale: dict, repeat: int) -> dict:
+    """[측정 프로세스] 항목 하나를 준비하고 repeat 회 시간, 1회 tracemalloc 최대 할당량을 측정합니다."""
+    sys.path.insert(0, ROOT_DIR)
+    _MAX_RUNS[0] = repeat + 1
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            run = CASES[case](db_path, scale)
+            rss_after_setup = current_rss_bytes()
+            reset_peak_rss()
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - started)
+            rss_peak = peak_rss_bytes()
+            tracemalloc.start()
+            run()
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        for cleanup in _CLEANUP:
+            cleanup()
+        for shm in _KEEP_ALIVE:
+            shm.close()
+            shm.unlink()
+    return {
+        "times": times,
+        "first": times[0],
+        "min": min(times),
+        "median": statistics.median(times),
+        "traced_peak_bytes": traced_peak,
+        "rss_setup_bytes": rss_after_setup,
+        "rss_peak_bytes": rss_peak,
+    }
+
+
+def prepare_database(work_dir: str, scale_name: str) -> str:
+    """규모별 합성 DB 를 작업 디렉터리에 만들고 경로를 반환합니다. 같은 인자의 DB 가 있으면 다시 사용합니다."""
+    from synthetic_db import generate_database
+
+    scale = SCALES[scale_name]
+    tag = "-".join(f"{key}{value}" for key, value in sorted(scale.items()))
+    db_path = os.path.join(work_dir, f"synthetic-{scale_name}-{tag}-seed{SEED}.db")
+    if not os.path.exists(db_path):
+        os.makedirs(work_dir, exist_ok=True)
+        print(f"[{scale_name}] 합성 DB 생성 중: {db_path}", file=sys.stderr)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_database(db_path + ".tmp", end_date=END_DATE, seed=SEED, **scale)
+        os.replace(db_path + ".tmp", db_path)
+    return db_path
+
+
+def environment_info() -> dict:
+    """결과 비교에 필요한 실행 환경(커밋, 버전, CPU)을 기록합니다."""
+    import numpy as np
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(
+    scales: List[str], cases: List[str], repeat: int, work_dir: str
+) -> dict:
+    """규모 x 항목마다 새 프로세스에서 측정하고 결과 딕셔너리를 반환합니다. 실패한 항목은 error 를 기록합니다."""
+    results = []
+    for scale_name in scales:
+        db_path = os.path.abspath(prepare_database(work_dir, scale_name))
+        for case in cases:
+            entry = {"scale": scale_name, "case": case}
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                try:
+                    entry.update(
+                        pool.submit(
+                            measure_case, case, db_path, SCALES[scale_name], repeat
+                        ).result()
+                    )
+                except Exception as e:
+                    entry["error"] = f"{type(e).__name__}: {e}"
+            results.append(entry)
+            print(format_entry(entry), file=sys.stderr)
+    return {
+        "format_version": RESULT_FORMAT_VERSION,
+        "environment": environment_info(),
+        "repeat": repeat,
+        "scales": {name: SCALES[name] for name in scales},
+        "results": results,
+    }
+
+
+def format_entry(entry: dict) -> str:
+    label = f"[{entry['scale']}] {entry['case']:<24}"
+    if "error" in entry:
+        return f"{label} 오류: {entry['error']}"
+    return (
+        f"{label} 중앙값 {entry['median'] * 1000:9.1f} ms  첫 회 {entry['first'] * 1000:9.1f} ms  "
+        f"할당 최대 {entry['traced_peak_bytes'] / 2**20:8.1f} MB  RSS 최대 {entry['rss_peak_bytes'] / 2**20:8.1f} MB"
+    )
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """
+    두 결과에서 같은 (규모, 항목) 의 중앙값을 비교합니다.
+
+    각 항목은 {scale, case, baseline, current, ratio, regression} 이며,
+    current / baseline - 1 이 threshold 보다 크면 regression 입니다.
+    """
+    previous = {
+        (entry["scale"], entry["case"]): entry
+        for entry in baseline["results"]
+        if "error" not in entry
+    }
+    comparisons = []
+    for entry in current["results"]:
+        old = previous.get((entry["scale"], entry["case"]))
+        if old is None or "error" in entry:
+            continue
+        ratio = entry["median"] / old["median"] if old["median"] > 0 else float("inf")
+        comparisons.append(
+            {
+                "scale": entry["scale"],
+                "case": entry["case"],
+                "baseline": old["median"],
+                "current": entry["median"],
+                "ratio": ratio,
+                "regression": ratio - 1 > threshold,
+            }
+        )
+    return comparisons
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="합성 DB 로 주요 경로의 시간/메모리를 측정합니다.")
+    parser.add_argument("--scales", nargs="+", default=["small"], choices=list(SCALES), help="측정할 규모")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES), help="측정할 항목")
+    parser.add_argument("--repeat", type=int, default=3, help="항목별 시간 측정 횟수")
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="합성 DB 를 둘 디렉터리")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="느려짐으로 판단할 중앙값 증가 비율")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scales, args.cases, max(1, args.repeat), args.work_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparisons = compare_results(baseline, report, args.threshold)
+        print(f"\n--- 비교 기준: {baseline['environment'].get('commit')} ---")
+        for c in comparisons:
+            mark = "느려짐" if c["regression"] else ""
+            print(
+                f"[{c['scale']}] {c['case']:<24} {c['baseline'] * 1000:9.1f} ms -> "
+                f"{c['current'] * 1000:9.1f} ms  (x{c['ratio']:.2f}) {mark}"
+            )
+        if any(c["regression"] for c in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,36 @@
 'stock_price.db'의 통합 테이블을 사용하여 전체 시장 종목에 대한
 장기 적립식 투자 백테스트를 실행합니다. (멀티프로세싱, 손익률 추가)
 
-- DB에 있는 모든 종목에 대해 개별 백테스트 실행
-- 개별 종목의 월별 평가액, 보유 주식 수, 누적 투자금, 손익률을 추적하여 단일 CSV 파일로 저장
+- DB에 있는 모든 종목에 대해 백테스트 실행 (종목 묶음 단위 벡터화 엔진, dca_engine.py)
+- 개별 종목의 월별 평가액, 보유 주식 수, 누적 투자금, 손익률을 추적하여 작업이 끝나는 대로
+  파티션 출력(partitioned_output.py)에 기록하고, 마지막에 단일 CSV 파일로 내보냄
+- 실행이 중간에 끊기면 같은 설정으로 다시 실행할 때 완료된 종목을 건너뜀 (기간은 처음 실행 기준,
+  설정이 다른 체크포인트는 지우지 않고 --restart 를 지정해야 처음부터 다시 실행)
 """
 
+import argparse
 import os
 import sqlite3
+import time
 import pandas as pd
-import holidays
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Optional, Tuple
 from tqdm import tqdm
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import numpy as np
+from pool_profiler import PoolProfiler
+from price_store import get_data_version, load_price_matrix
+from dca_engine import (
+    RESULT_COLUMNS,
+    format_summary,
+    monthly_frame,
+    run_dca_arrays,
+    summary_records,
+)
+from partitioned_output import PartitionedResultWriter, export_csv, read_config
+from trading_calendar import load_symbol_markets, load_trading_days, market_positions
 
 # --- 백테스트 설정 ---
 DB_FILE: str = "stock_price.db"
@@ -25,10 +42,32 @@ DB_FILE: str = "stock_price.db"
 YEARS_TO_TEST: int = 10
 # 월별 투자 금액 (종목당)
 MONTHLY_INVESTMENT_PER_STOCK: float = 100_000
-# 매수 규칙: 'first' (월초), 'last' (월말)
+# 매수 규칙: 'first' (월 첫 거래일), 'last' (월 마지막 거래일)
+# 거래일은 종목이 속한 시장의 실제 시세일입니다. (trading_calendar.py)
 PURCHASE_RULE: str = "first"
-# 국가 코드 (공휴일 계산용): 'KR' (한국), 'US' (미국)
-COUNTRY_CODE: str = "KR"
+# 결과 파티션 출력/체크포인트 디렉터리와 마지막에 내보낼 CSV
+OUTPUT_DIR: str = "stock_monthly_summary.parts"
+OUTPUT_CSV: str = "stock_monthly_summary_with_roi.csv"
+# SQLite 대체 경로에서 한 번에 읽을 행 수
+PANEL_CHUNK_SIZE: int = 1_000_000
+# 워커 작업 하나(청크)가 벡터화 엔진으로 처리할 종목(열) 수:
+# 처음에는 INITIAL_CHUNK_SYMBOLS 로 시작하고, 완료된 작업의 종목당 계산 시간으로
+# 작업 하나가 TARGET_TASK_SECONDS 정도 걸리도록 조절합니다.
+INITIAL_CHUNK_SYMBOLS: int = 64
+MIN_CHUNK_SYMBOLS: int = 16
+# 엔진의 (날짜 x 종목) 임시 배열이 너무 커지지 않도록 하는 상한
+MAX_CHUNK_SYMBOLS: int = 1024
+TARGET_TASK_SECONDS: float = 0.5
+# 작업 프로세스당 동시에 제출해 두는 청크 수
+IN_FLIGHT_PER_WORKER: int = 2
+
+# 워커 프로세스에서 공유 메모리에 연결된 종가 패널 (initializer 에서 설정)
+_PANEL: Optional[np.ndarray] = None
+_PANEL_DATES: Optional[pd.DatetimeIndex] = None
+_PANEL_SYMBOLS: Optional[List[str]] = None
+_PANEL_PURCHASE_ROWS: Optional[np.ndarray] = None
+_PANEL_MARKET_CODES: Optional[np.ndarray] = None
+_PANEL_SHM: Optional[shared_memory.SharedMemory] = None
 
 
 def get_all_symbols(db_path: str, *markets: str) -> List[str]:
@@ -71,142 +110,265 @@ def get_all_symbols(db_path: str, *markets: str) -> List[str]:
         return []
 
 
-def get_stock_data(
-    symbol: str, db_path: str, start_date: str, end_date: str
-) -> Optional[pd.DataFrame]:
-    """SQLite DB에서 특정 종목의 시세 데이터를 DataFrame으로 불러옵니다."""
+def load_close_panel(
+    db_path: str, symbols: List[str], start_date: str, end_date: str
+) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """
+    대상 종목 전체의 종가 패널(날짜 x 종목)을 한 번에 불러옵니다.
+
+    컬럼형 저장소가 최신이면 그대로 사용하고, 아니면 SQLite 에서 기간 내 행을
+    청크 단위로 읽어 채웁니다. 종목에 시세가 없는 날짜는 NaN 입니다.
+    """
+    panel = load_price_matrix(db_path, symbols, start_date, end_date)
+    if panel is not None:
+        return panel.index, list(panel.columns), np.asfortranarray(panel.to_numpy())
+
+    symbol_index = pd.Index(sorted(set(symbols)))
+    codes, days, closes = [], [], []
     with sqlite3.connect(db_path) as conn:
-        query = f"""
-        SELECT Date, Close FROM stock_price 
-        WHERE Symbol = ? AND Date BETWEEN ? AND ?
-        ORDER BY Date ASC
+        conn.execute("CREATE TEMP TABLE target_symbols (Symbol TEXT PRIMARY KEY)")
+        conn.executemany(
+            "INSERT INTO target_symbols VALUES (?)", [(s,) for s in symbol_index]
+        )
+        query = """
+        SELECT p.Symbol, p.Date, p.Close FROM stock_price p
+        JOIN target_symbols t ON p.Symbol = t.Symbol
+        WHERE p.Date BETWEEN ? AND ?
         """
-        df = pd.read_sql_query(query, conn, params=(symbol, start_date, end_date))
+        for chunk in pd.read_sql_query(
+            query, conn, params=(start_date, end_date), chunksize=PANEL_CHUNK_SIZE
+        ):
+            codes.append(symbol_index.get_indexer(chunk["Symbol"]))
+            days.append(pd.to_datetime(chunk["Date"]).to_numpy())
+            closes.append(chunk["Close"].to_numpy(dtype=np.float64))
+
+    if not codes:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0), order="F")
+
+    dates, rows = np.unique(np.concatenate(days), return_inverse=True)
+    cols = np.concatenate(codes)
+    values = np.full((len(dates), len(symbol_index)), np.nan, order="F")
+    values[rows, cols] = np.concatenate(closes)
+
+    present = ~np.isnan(values).all(axis=0)
+    return (
+        pd.DatetimeIndex(dates),
+        list(symbol_index[present]),
+        np.asfortranarray(values[:, present]),
+    )
 
-    if df.empty:
-        return None
 
-    df["Date"] = pd.to_datetime(df["Date"])
-    df.set_index("Date", inplace=True)
-    return df
-
-
-def get_monthly_purchase_dates(
-    start_date: datetime, end_date: datetime, rule: str, country_code: str
-) -> List[datetime]:
-    """주어진 규칙에 따라 월별 매수 날짜(영업일) 리스트를 생성합니다."""
-    country_holidays = holidays.country_holidays(country_code)
-    purchase_dates: List[datetime] = []
-    current_date = start_date
-
-    while current_date <= end_date:
-        if rule == "first":
-            target_date = current_date.replace(day=1)
-        elif rule == "last":
-            next_month = current_date.replace(day=28) + relativedelta(days=4)
-            target_date = next_month - relativedelta(days=next_month.day)
-        else:
-            target_date = current_date.replace(day=1)
-
-        while target_date.weekday() >= 5 or target_date in country_holidays:
-            target_date += relativedelta(days=1)
-
-        purchase_dates.append(target_date)
-        current_date += relativedelta(months=1)
-
-    return purchase_dates
-
-
-def run_single_stock_backtest(
-    prices_df: pd.DataFrame, purchase_dates: List[datetime], monthly_investment: float
-) -> Optional[Dict[str, Any]]:
-    """단일 종목에 대한 백테스트를 실행하고, 시계열 데이터를 포함한 결과를 반환합니다."""
-    shares_ts = pd.Series(0.0, index=prices_df.index, dtype=float)
-
-    for date in purchase_dates:
-        try:
-            trade_date = prices_df.index.asof(date)
-            price = prices_df.loc[trade_date, "Close"]
-            if pd.isna(price) or price <= 0:
-                continue
-            shares_bought = monthly_investment / price
-            shares_ts.loc[trade_date:] += shares_bought
-        except (KeyError, IndexError):
-            continue
-
-    if shares_ts.sum() == 0:
-        return None
+def load_purchase_rows(
+    db_path: str, dates: pd.DatetimeIndex, symbols: List[str], markets: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    종목이 속한 시장의 거래일 달력으로 패널의 월별 매수 행 번호를 구합니다.
+
+    (시장별 매수 행 (월 x 시장), 종목별 시장 번호) 를 반환하며,
+    종목별 매수 행은 purchase_rows[:, market_codes] 입니다.
+    """
+    return market_positions(
+        dates,
+        symbols,
+        load_trading_days(db_path, markets),
+        load_symbol_markets(db_path, markets),
+        PURCHASE_RULE,
+    )
 
-    portfolio_ts = prices_df["Close"] * shares_ts
-    total_investment = len(purchase_dates) * monthly_investment
-    final_value = portfolio_ts.iloc[-1]
 
+def _attach_panel(
+    shm_name: str,
+    shape: Tuple[int, int],
+    dates: pd.DatetimeIndex,
+    symbols: List[str],
+    purchase_rows: np.ndarray,
+    market_codes: np.ndarray,
+) -> None:
+    """[워커 initializer] 부모가 만든 공유 메모리 종가 패널과 매수 행 번호에 연결합니다."""
+    global _PANEL, _PANEL_DATES, _PANEL_SYMBOLS, _PANEL_SHM
+    global _PANEL_PURCHASE_ROWS, _PANEL_MARKET_CODES
+    _PANEL_SHM = shared_memory.SharedMemory(name=shm_name, track=False)
+    _PANEL = np.ndarray(shape, dtype=np.float64, buffer=_PANEL_SHM.buf, order="F")
+    _PANEL_DATES = dates
+    _PANEL_SYMBOLS = symbols
+    _PANEL_PURCHASE_ROWS = purchase_rows
+    _PANEL_MARKET_CODES = market_codes
+
+
+def process_symbol_block(start: int, stop: int) -> dict:
+    """
+    공유 패널의 [start, stop) 열 종목들을 벡터화 엔진으로 한 번에 백테스트하는 워커 함수.
+
+    결과는 DataFrame 대신 열 배열({"monthly", "summary"}, 종목은 start 기준 열 번호)과
+    계산 시간("seconds")으로 돌려주어 프로세스 간 전송량을 줄입니다. (block_frames 로 변환)
+    """
+    started = time.perf_counter()
+    monthly, summary = run_dca_arrays(
+        _PANEL[:, start:stop],
+        _PANEL_DATES,
+        MONTHLY_INVESTMENT_PER_STOCK,
+        _PANEL_PURCHASE_ROWS[:, _PANEL_MARKET_CODES[start:stop]],
+    )
     return {
-        "total_investment": total_investment,
-        "final_value": final_value,
-        "roi": (final_value - total_investment) / total_investment * 100
-        if total_investment > 0
-        else 0,
-        "portfolio_ts": portfolio_ts.fillna(0),
-        "shares_ts": shares_ts.fillna(0),
+        "monthly": monthly,
+        "summary": summary,
+        "seconds": time.perf_counter() - started,
     }
 
 
-def process_single_symbol(symbol: str) -> Optional[pd.DataFrame]:
-    """단일 종목에 대한 전체 처리(데이터 로드, 백테스트, 결과 가공)를 수행하는 워커 함수."""
-    end_date = datetime.now()
-    start_date = end_date - relativedelta(years=YEARS_TO_TEST)
+def block_frames(result: dict, symbols: List[str]) -> Tuple[pd.DataFrame, List[str]]:
+    """process_symbol_block 결과를 (월별 결과 DataFrame, 종목별 요약 문자열 목록) 으로 바꿉니다."""
+    summaries = [
+        format_summary(row) for row in summary_records(result["summary"], symbols)
+    ]
+    return monthly_frame(result["monthly"], symbols), summaries
 
-    prices = get_stock_data(
-        symbol, DB_FILE, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
-    )
 
-    if prices is None or len(prices) < 20:
+def process_single_symbol(symbol: str, column: int) -> Optional[pd.DataFrame]:
+    """단일 종목의 월별 결과(Date 인덱스, 요약은 attrs["summary"])를 반환합니다."""
+    monthly_df, summaries = block_frames(
+        process_symbol_block(column, column + 1), [symbol]
+    )
+    if monthly_df.empty:
         return None
+    monthly_df = monthly_df.set_index("Date")
+    monthly_df.attrs["summary"] = summaries[0]
+    return monthly_df
 
-    dates_to_buy = get_monthly_purchase_dates(
-        prices.index.min(), prices.index.max(), PURCHASE_RULE, COUNTRY_CODE
+
+def iter_symbol_blocks(
+    executor: ProcessPoolExecutor,
+    profiler: PoolProfiler,
+    n_symbols: int,
+    max_workers: int,
+) -> Iterator[Tuple[int, int, dict]]:
+    """
+    패널의 종목을 청크로 나눠 제출하고 완료되는 순서대로 (start, stop, 결과) 를 내보냅니다.
+
+    - 동시에 제출해 두는 청크는 작업 프로세스당 IN_FLIGHT_PER_WORKER 개로 제한합니다.
+    - 청크 크기는 완료된 작업의 종목당 계산 시간(이동 평균)으로 TARGET_TASK_SECONDS 에 맞추고,
+      남은 종목이 적으면 모든 작업 프로세스에 고르게 나눠지도록 줄입니다.
+    """
+    max_in_flight = max_workers * IN_FLIGHT_PER_WORKER
+    chunk = INITIAL_CHUNK_SYMBOLS
+    seconds_per_symbol = None
+    next_start = 0
+    in_flight = {}
+    while next_start < n_symbols or in_flight:
+        while next_start < n_symbols and len(in_flight) < max_in_flight:
+            share = -(-(n_symbols - next_start) // max_workers)
+            size = min(chunk, max(share, MIN_CHUNK_SYMBOLS))
+            stop = min(next_start + size, n_symbols)
+            future = profiler.submit(executor, process_symbol_block, next_start, stop)
+            in_flight[future] = (next_start, stop)
+            next_start = stop
+
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            start, stop = in_flight.pop(future)
+            result = profiler.result(future.result())
+            cost = result["seconds"] / (stop - start)
+            seconds_per_symbol = (
+                cost if seconds_per_symbol is None else (seconds_per_symbol + cost) / 2
+            )
+            target = TARGET_TASK_SECONDS / max(seconds_per_symbol, 1e-9)
+            chunk = int(min(max(target, MIN_CHUNK_SYMBOLS), MAX_CHUNK_SYMBOLS))
+            yield start, stop, result
+
+
+def run_backtests(
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    markets: List[str],
+    writer: PartitionedResultWriter,
+    profiler: PoolProfiler,
+) -> None:
+    """symbols 의 종가 패널을 불러와 프로세스 풀로 백테스트하고, 작업 결과를 완료되는 대로 writer 에 기록합니다."""
+    print("대상 종목 전체의 종가 패널을 불러옵니다...")
+    dates, panel_symbols, values = load_close_panel(
+        DB_FILE, symbols, start_date, end_date
     )
-    result = run_single_stock_backtest(
-        prices, dates_to_buy, MONTHLY_INVESTMENT_PER_STOCK
+    # 기간 내 시세가 없는 종목도 완료로 기록해 다시 실행할 때 건너뜁니다.
+    no_data = sorted(set(symbols) - set(panel_symbols))
+    if no_data:
+        writer.write(no_data, pd.DataFrame(columns=RESULT_COLUMNS))
+    if not panel_symbols:
+        return
+    print("시장별 거래일 달력으로 매수일을 정합니다...")
+    purchase_rows, market_codes = load_purchase_rows(
+        DB_FILE, dates, panel_symbols, markets
     )
 
-    if result:
-        # 월별 데이터로 리샘플링
-        monthly_value = result["portfolio_ts"].resample("ME").last()
-        monthly_shares = result["shares_ts"].resample("ME").last()
-
-        # 월별 누적 투자 원금 계산
-        month_counts = pd.Series(
-            range(1, len(monthly_value) + 1), index=monthly_value.index
-        )
-        monthly_investment_ts = month_counts * MONTHLY_INVESTMENT_PER_STOCK
-
-        # 월별 손익률(ROI) 계산
-        roi_ts = (monthly_value - monthly_investment_ts) / monthly_investment_ts * 100
-        roi_ts = roi_ts.fillna(0).replace([float("inf"), -float("inf")], 0)
-
-        # 월별 데이터를 DataFrame으로 생성
-        monthly_df = pd.DataFrame(
-            {
-                "TotalInvestment": monthly_investment_ts,
-                "PortfolioValue": monthly_value,
-                "TotalShares": monthly_shares,
-                "ROI_Percent": roi_ts,
-            }
+    # 워커는 DB 에 접근하지 않고 공유 메모리 패널의 열 번호만 받습니다.
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf, order="F")
+    shared[:] = values
+    del values
+    try:
+        max_workers = os.cpu_count()
+        print(
+            f"{len(panel_symbols)}개 종목에 대한 백테스트를 시작합니다 (최대 {max_workers}개 프로세스 사용)..."
         )
-        monthly_df["Symbol"] = symbol
 
-        monthly_df.attrs["summary"] = (
-            f"[결과] 종목: {symbol} | 총투자: {result['total_investment']:,.0f}원 | "
-            f"최종평가액: {result['final_value']:,.0f}원 | 수익률: {result['roi']:.2f}%"
+        initializer, initargs = profiler.initializer(
+            _attach_panel,
+            (shm.name, shared.shape, dates, panel_symbols, purchase_rows, market_codes),
         )
-        return monthly_df
-    return None
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=initializer, initargs=initargs
+        ) as executor:
+            blocks = iter_symbol_blocks(
+                executor, profiler, len(panel_symbols), max_workers
+            )
+            with tqdm(total=len(panel_symbols), desc="백테스팅 진행") as progress:
+                for start, stop, result in blocks:
+                    result_df, summaries = block_frames(
+                        result, panel_symbols[start:stop]
+                    )
+                    writer.write(panel_symbols[start:stop], result_df)
+                    for summary in summaries:
+                        tqdm.write(summary)
+                    progress.update(stop - start)
+    finally:
+        del shared
+        shm.close()
+        shm.unlink()
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="전체 종목 적립식 투자 백테스트")
+    parser.add_argument(
+        "--output-dir",
+        default=OUTPUT_DIR,
+        help="종목별 결과를 완료되는 대로 기록할 파티션 출력/체크포인트 디렉터리",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="체크포인트를 무시하고 처음부터 다시 실행합니다.",
+    )
+    parser.add_argument(
+        "--csv",
+        default=OUTPUT_CSV,
+        help="마지막에 결과 전체를 내보낼 CSV 경로",
+    )
+    parser.add_argument(
+        "--no-csv", action="store_true", help="CSV 내보내기를 건너뜁니다."
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="작업 프로세스별 프로파일(샘플링, tracemalloc, 최대 RSS, 작업 대기/계산 시간)을 기록합니다.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default="bt_profile.json",
+        help="--profile 보고서(JSON) 경로",
+    )
+    args = parser.parse_args(argv)
+
     # 백테스트를 원하는 시장을 직접 지정
     # target_markets = ["ETF/US"]
     target_markets = ["KRX", "ETF_US", "NYSE", "NASDAQ"]
@@ -219,52 +381,54 @@ def main():
         print("오류: 지정된 시장에서 종목을 찾을 수 없습니다.")
         return
 
-    all_stocks_monthly_data = []
-    max_workers = os.cpu_count()
-    print(
-        f"{len(all_symbols)}개 종목에 대한 백테스트를 시작합니다 (최대 {max_workers}개 프로세스 사용)..."
-    )
-
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(process_single_symbol, symbol): symbol
-            for symbol in all_symbols
-        }
-
-        for future in tqdm(
-            as_completed(futures), total=len(all_symbols), desc="백테스팅 진행"
-        ):
-            result_df = future.result()
-            if result_df is not None:
-                all_stocks_monthly_data.append(result_df)
-                tqdm.write(result_df.attrs["summary"])
-
-    if all_stocks_monthly_data:
-        final_summary_df = pd.concat(all_stocks_monthly_data)
-        final_summary_df.reset_index(inplace=True)
-        # 컬럼 순서 재정렬
-        final_summary_df = final_summary_df[
-            [
-                "Symbol",
-                "Date",
-                "TotalInvestment",
-                "PortfolioValue",
-                "TotalShares",
-                "ROI_Percent",
-            ]
-        ]
-
-        output_filename = "stock_monthly_summary_with_roi.csv"
-        final_summary_df.to_csv(output_filename, index=False, float_format="%.2f")
-
-        print("\n" + "=" * 60)
+    # 설정이 같을 때만 체크포인트를 이어서 사용합니다.
+    config = {
+        "db_path": os.path.abspath(DB_FILE),
+        "data_version": get_data_version(DB_FILE),
+        "markets": target_markets,
+        "monthly_investment": MONTHLY_INVESTMENT_PER_STOCK,
+        "purchase_rule": PURCHASE_RULE,
+    }
+    previous = None if args.restart else read_config(args.output_dir)
+    if previous and all(previous.get(name) == value for name, value in config.items()):
+        # 이어서 실행할 때는 날짜가 바뀌었어도(자정 이후 재실행 등) 처음 실행의 기간을 사용합니다.
+        start_date, end_date = previous["start_date"], previous["end_date"]
+    else:
+        end_date = datetime.now()
+        start_date = end_date - relativedelta(years=YEARS_TO_TEST)
+        start_date = start_date.strftime("%Y-%m-%d")
+        end_date = end_date.strftime("%Y-%m-%d")
+    config.update(start_date=start_date, end_date=end_date)
+    try:
+        writer = PartitionedResultWriter(
+            args.output_dir, config, resume=not args.restart
+        )
+    except FileExistsError as e:
+        print(f"오류: {e}")
+        return
+    pending = sorted(set(all_symbols) - writer.completed_symbols)
+    if writer.resumed:
         print(
-            "💰 종목별 월별 투자 결과(손익률 포함)가 CSV 파일로 성공적으로 저장되었습니다."
+            f"체크포인트에서 이어서 실행합니다: 완료 {len(writer.completed_symbols)}개, "
+            f"남은 종목 {len(pending)}개"
         )
-        print(f"   - 파일명: {output_filename}")
-        print("=" * 60)
-    else:
+
+    profiler = PoolProfiler(enabled=args.profile)
+    if pending:
+        run_backtests(pending, start_date, end_date, target_markets, writer, profiler)
+        profiler.report(args.profile_output)
+
+    if writer.rows == 0:
         print("\n백테스트를 완료할 수 있는 데이터가 부족합니다.")
+        return
+
+    print("\n" + "=" * 60)
+    print(f"💰 종목별 월별 투자 결과(손익률 포함) {writer.rows:,}행이 저장되었습니다.")
+    print(f"   - 파티션 출력: {args.output_dir}")
+    if not args.no_csv:
+        export_csv(args.output_dir, args.csv)
+        print(f"   - CSV 파일: {args.csv}")
+    print("=" * 60)
 
 
 if __name__ == "__main__":
@@ -55,3 +55,5 @@ STRATEGY_ASSETS = {
         "canary": ["SPY"],
     },
 }
+# 일별 시세가 필요한 전략 (나머지는 월말 종가만으로 계산)
+DAILY_DATA_STRATEGIES = ["laa"]
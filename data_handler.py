@@ -5,14 +5,63 @@ import sys
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import pandas as pd
+from price_store import load_price_matrix
+from indicator_cache import cached_strategy_data
 
+MONTHLY_TABLE = "stock_price_monthly"
 
-def load_data(db_path, tickers, start_date_str, history_months=13):
-    """DB에서 데이터를 로드하고, 지표 계산을 위해 충분한 과거 데이터를 포함합니다."""
+
+def load_monthly_data(db_path, tickers, load_start_date):
+    """
+    월말 종가 테이블(stock_price_monthly)에서 (월말 x 종목) 종가 행렬을 읽습니다.
+
+    일별 데이터를 ffill 후 resample("ME").last() 한 결과와 같으며, 테이블이 없거나
+    해당 종목의 행이 없으면 None 을 반환합니다.
+    """
+    with sqlite3.connect(db_path) as con:
+        exists = con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+            (MONTHLY_TABLE,),
+        ).fetchone()
+        if not exists:
+            return None
+        placeholders = ", ".join("?" for _ in tickers)
+        query = f"SELECT Month, Symbol, Close FROM {MONTHLY_TABLE} WHERE Symbol IN ({placeholders}) AND Date >= ?"
+        df = pd.read_sql_query(
+            query,
+            con,
+            params=list(tickers) + [load_start_date.strftime("%Y-%m-%d")],
+        )
+    if df.empty:
+        return None
+    df["date"] = pd.to_datetime(df["Month"], format="%Y-%m") + pd.offsets.MonthEnd(0)
+    pivot_df = df.pivot(index="date", columns="Symbol", values="Close")
+    pivot_df.columns.name = "ticker"
+    return pivot_df.sort_index().ffill()
+
+
+def load_data(db_path, tickers, start_date_str, history_months=13, frequency="daily"):
+    """
+    DB에서 데이터를 로드하고, 지표 계산을 위해 충분한 과거 데이터를 포함합니다.
+
+    frequency="monthly" 이면 월말 종가만 읽어서 월말 날짜 인덱스로 반환합니다.
+    (일별 데이터가 필요 없는 전략용. 월말 테이블이 없으면 일별 데이터를 리샘플링)
+    """
     try:
         start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
         load_start_date = start_date - relativedelta(months=history_months)
 
+        if frequency == "monthly":
+            monthly_df = load_monthly_data(db_path, tickers, load_start_date)
+            if monthly_df is not None:
+                return monthly_df
+            return load_data(db_path, tickers, start_date_str, history_months).resample("ME").last()
+
+        # 컬럼형 저장소가 최신이면 행 파싱/피벗 없이 종가 행렬을 바로 사용
+        pivot_df = load_price_matrix(db_path, tickers, load_start_date)
+        if pivot_df is not None:
+            return pivot_df.ffill()
+
         with sqlite3.connect(db_path) as con:
             placeholders = ", ".join("?" for _ in tickers)
             query = f"SELECT Date, Symbol, Close FROM stock_price WHERE Symbol IN ({placeholders}) AND Date >= ? ORDER BY Date"
@@ -34,8 +83,21 @@ def load_data(db_path, tickers, start_date_str, history_months=13):
         sys.exit(f"데이터 로딩 중 오류 발생: {e}")
 
 
-def prepare_strategy_data(stock_data):
-    """전략에 필요한 모든 지표(모멘텀, 이동평균선 등)를 미리 계산합니다."""
+def prepare_strategy_data(stock_data, include_daily=True, db_path=None):
+    """
+    전략에 필요한 모든 지표(모멘텀, 이동평균선 등)를 미리 계산합니다.
+
+    stock_data 가 월말 데이터(load_data(frequency="monthly"))이면 include_daily=False 로
+    일별 지표 계산을 건너뜁니다. db_path 를 주면 DB 데이터 버전 기준의 지표 캐시를
+    사용하여 새로 들어온 구간만 계산합니다.
+    """
+    if db_path is not None:
+        return cached_strategy_data(db_path, stock_data, include_daily, compute_strategy_data)
+    return compute_strategy_data(stock_data, include_daily)
+
+
+def compute_strategy_data(stock_data, include_daily=True):
+    """prepare_strategy_data 의 실제 지표 계산 (캐시 없음)."""
     print("전략 데이터 사전 계산 중 (모멘텀, 이동평균선 등)...")
 
     monthly_prices = stock_data.resample("ME").last()
@@ -53,7 +115,7 @@ def prepare_strategy_data(stock_data):
     momentum_data["sma_12_month"] = monthly_prices.rolling(window=12).mean()
 
     daily_data = {}
-    if "SPY" in stock_data.columns:
+    if include_daily and "SPY" in stock_data.columns:
         daily_data["sma_200_day"] = stock_data["SPY"].rolling(window=200).mean()
 
     return monthly_prices, momentum_data, daily_data
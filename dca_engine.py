@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+(날짜 x 종목) 종가 행렬 전체에 대해 월별 적립식 매수 백테스트를 한 번에 계산합니다.
+
+종목마다 매수일을 순회하며 이후 구간의 보유 수량을 갱신하던 방식 대신,
+- 매수일은 거래일 달력(trading_calendar.py)이 미리 정한 월별 행 번호로 받고
+- 종목별 체결 행은 '해당 행 이전의 마지막 시세 행' 누적 최대값으로 구하며
+- 보유 수량은 매수 수량의 누적합을 체결 행부터 앞으로 채워서 계산합니다.
+결과는 종목별 월별 투자 원금, 평가액, 보유 수량, 손익률(%) 입니다.
+"""
+
+import calendar
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from trading_calendar import month_number
+
+# 결과 컬럼 순서 (stock_monthly_summary_with_roi.csv 와 동일)
+RESULT_COLUMNS = [
+    "Symbol",
+    "Date",
+    "TotalInvestment",
+    "PortfolioValue",
+    "TotalShares",
+    "ROI_Percent",
+]
+# 종목별 요약 컬럼 순서 (format_summary 입력)
+SUMMARY_COLUMNS = ["Symbol", "total_investment", "final_value", "roi"]
+
+
+def count_purchase_months(first_date: pd.Timestamp, last_date: pd.Timestamp) -> int:
+    """
+    첫 시세일부터 한 달씩 더해 가며 마지막 시세일을 넘지 않는 월 수를 셉니다.
+
+    relativedelta 로 반복해서 더하면 일자가 짧은 달에서 잘린 뒤 회복되지 않으므로
+    (예: 1/31 -> 2/28 -> 3/28) 마지막 달의 포함 여부를 같은 규칙으로 판단합니다.
+    """
+    first_month = first_date.year * 12 + first_date.month - 1
+    last_month = last_date.year * 12 + last_date.month - 1
+    if first_month == last_month:
+        return 1
+    day = first_date.day
+    month = first_month + 1
+    while day > 28 and month <= last_month:
+        year, month0 = divmod(month, 12)
+        day = min(day, calendar.monthrange(year, month0 + 1)[1])
+        month += 1
+    months = last_month - first_month
+    return months + 1 if day <= last_date.day else months
+
+
+def _empty_results() -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    monthly = {"column": np.empty(0, dtype=np.int32)}
+    monthly["Date"] = np.empty(0, dtype="datetime64[D]")
+    monthly.update({name: np.empty(0) for name in RESULT_COLUMNS[2:]})
+    summary = {"column": np.empty(0, dtype=np.int32)}
+    summary.update({name: np.empty(0) for name in SUMMARY_COLUMNS[1:]})
+    return monthly, summary
+
+
+def run_dca_arrays(
+    values: np.ndarray,
+    dates: pd.DatetimeIndex,
+    monthly_investment: float,
+    purchase_rows: np.ndarray,
+    min_rows: int = 20,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    (날짜 x 종목) 종가 행렬로 모든 종목의 적립식 매수 결과를 계산합니다.
+
+    시세가 없는 칸은 NaN 이어야 하며, 시세 행이 min_rows 보다 적거나 한 번도
+    매수하지 못한 종목은 제외됩니다.
+    purchase_rows 는 dates 의 첫 월부터 마지막 월까지 각 월의 매수일 행 번호(없으면 -1)로,
+    모든 종목 공통이면 (월,) 배열, 종목별로 다르면 (월 x 종목) 배열입니다.
+    (trading_calendar.month_positions / market_positions)
+
+    결과는 종목 이름 대신 values 의 열 번호("column")를 담은 열 배열 딕셔너리 두 개
+    (월별 결과: "column", "Date" 와 RESULT_COLUMNS[2:], 종목별 요약: "column" 과
+    SUMMARY_COLUMNS[1:]) 로, 프로세스 사이에 DataFrame 보다 작게 주고받을 수 있습니다.
+    monthly_frame / summary_records / results_to_frames 로 DataFrame 등으로 바꿀 수 있습니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    keep = valid.sum(axis=0) >= min_rows
+    kept_columns = np.flatnonzero(keep).astype(np.int32)
+    values, valid = values[:, keep], valid[:, keep]
+    purchase_rows = np.asarray(purchase_rows, dtype=np.int64)
+    if purchase_rows.ndim == 1:
+        purchase_rows = purchase_rows[:, None]
+    else:
+        purchase_rows = purchase_rows[:, keep]
+    n_dates, n_symbols = values.shape
+    if n_symbols == 0:
+        return _empty_results()
+
+    rows = np.arange(n_dates)
+    cols = np.arange(n_symbols)
+    first_row = valid.argmax(axis=0)
+    last_row = n_dates - 1 - valid[::-1].argmax(axis=0)
+    # last_valid[r, s]: r 행 이전(포함) 종목 s 의 마지막 시세 행 (없으면 -1) -> index.asof 와 동일
+    last_valid = np.maximum.accumulate(np.where(valid, rows[:, None], -1), axis=0)
+
+    # --- 1. 종목별 매수 월 구간 및 월별 매수 행 ---
+    row_months = month_number(dates)
+    first_months = row_months[first_row]
+    purchase_counts = np.array(
+        [count_purchase_months(dates[f], dates[l]) for f, l in zip(first_row, last_row)]
+    )
+    last_purchase_months = first_months + purchase_counts - 1
+    month_lo, month_hi = first_months.min(), last_purchase_months.max()
+    target_rows = purchase_rows[month_lo - row_months[0] : month_hi - row_months[0] + 1]
+
+    # --- 2. 월별 체결 행, 매수 수량 및 누적 보유 수량 ---
+    n_months = month_hi - month_lo + 1
+    month_numbers = np.arange(month_lo, month_hi + 1)
+    in_range = (month_numbers[:, None] >= first_months) & (
+        month_numbers[:, None] <= last_purchase_months
+    )
+    trade_rows = np.where(
+        target_rows >= 0, last_valid[np.maximum(target_rows, 0), cols], -1
+    )
+    trade_prices = values[np.maximum(trade_rows, 0), cols]
+    bought = in_range & (trade_rows >= 0) & (trade_prices > 0)
+    shares_bought = np.zeros((n_months, n_symbols))
+    np.divide(monthly_investment, trade_prices, out=shares_bought, where=bought)
+    cumulative_shares = np.cumsum(shares_bought, axis=0)
+
+    shares_at = np.zeros((n_dates, n_symbols))
+    filled = np.zeros((n_dates, n_symbols), dtype=bool)
+    for m in range(n_months):
+        sel = bought[m]
+        if sel.any():
+            shares_at[trade_rows[m, sel], cols[sel]] = cumulative_shares[m, sel]
+            filled[trade_rows[m, sel], cols[sel]] = True
+    fill_rows = np.maximum.accumulate(np.where(filled, rows[:, None], -1), axis=0)
+    shares = np.where(fill_rows >= 0, shares_at[np.maximum(fill_rows, 0), cols], 0.0)
+    portfolio = values * shares
+
+    has_purchase = bought.any(axis=0)
+
+    # --- 3. 월말 집계 (resample("ME").last() 와 동일: 월 내 마지막 시세 행) ---
+    bin_months = np.arange(row_months[0], row_months[-1] + 1)
+    bin_first = np.searchsorted(row_months, bin_months, side="left")
+    bin_last = np.searchsorted(row_months, bin_months, side="right") - 1
+    last_in_bin = np.where(
+        (bin_last >= 0)[:, None], last_valid[np.maximum(bin_last, 0)], -1
+    )
+    has_row = last_in_bin >= bin_first[:, None]
+    monthly_value = np.where(has_row, portfolio[np.maximum(last_in_bin, 0), cols], np.nan)
+    monthly_shares = np.where(has_row, shares[np.maximum(last_in_bin, 0), cols], np.nan)
+
+    # 종목별 출력 월: 첫 시세 월 ~ 마지막 시세 월
+    bin_first_month = first_months - bin_months[0]
+    bin_last_month = row_months[last_row] - bin_months[0]
+    month_index = np.arange(len(bin_months))[:, None]
+    in_output = (
+        (month_index >= bin_first_month) & (month_index <= bin_last_month) & has_purchase
+    )
+    month_count = month_index - bin_first_month + 1
+    total_investment = month_count * monthly_investment
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = (monthly_value - total_investment) / total_investment * 100
+    roi[~np.isfinite(roi)] = 0
+
+    # 열 우선으로 펼쳐서 종목 -> 날짜 순으로 정렬된 긴 형식 결과를 만듭니다.
+    bin_dates = (
+        pd.DatetimeIndex(
+            [pd.Timestamp(year=m // 12, month=m % 12 + 1, day=1) for m in bin_months]
+        )
+        + pd.offsets.MonthEnd(0)
+    ).to_numpy(dtype="datetime64[D]")
+    out_mask = in_output.T
+    symbol_pos, month_pos = np.nonzero(out_mask)
+    monthly = {
+        "column": kept_columns[symbol_pos],
+        "Date": bin_dates[month_pos],
+        "TotalInvestment": total_investment.T[out_mask],
+        "PortfolioValue": monthly_value.T[out_mask],
+        "TotalShares": monthly_shares.T[out_mask],
+        "ROI_Percent": roi.T[out_mask],
+    }
+
+    invested = purchase_counts * monthly_investment
+    final_value = portfolio[last_row, cols]
+    summary = {
+        "column": kept_columns[has_purchase],
+        "total_investment": invested[has_purchase],
+        "final_value": final_value[has_purchase],
+        "roi": np.where(
+            invested > 0, (final_value - invested) / invested * 100, 0
+        )[has_purchase],
+    }
+    return monthly, summary
+
+
+def monthly_frame(monthly: Dict[str, np.ndarray], symbols) -> pd.DataFrame:
+    """run_dca_arrays 의 월별 결과를 symbols(열 번호 순 종목 코드)로 DataFrame 으로 바꿉니다."""
+    symbols = np.asarray(symbols, dtype=object)
+    return pd.DataFrame(
+        {
+            "Symbol": symbols[monthly["column"]],
+            "Date": monthly["Date"].astype("datetime64[ns]"),
+            **{name: monthly[name] for name in RESULT_COLUMNS[2:]},
+        },
+        columns=RESULT_COLUMNS,
+    )
+
+
+def summary_records(summary: Dict[str, np.ndarray], symbols) -> List[Dict]:
+    """run_dca_arrays 의 종목별 요약을 format_summary 에 넘길 딕셔너리 목록으로 바꿉니다."""
+    symbols = np.asarray(symbols, dtype=object)
+    columns = [symbols[summary["column"]].tolist()]
+    columns += [summary[name].tolist() for name in SUMMARY_COLUMNS[1:]]
+    return [dict(zip(SUMMARY_COLUMNS, values)) for values in zip(*columns)]
+
+
+def results_to_frames(
+    monthly: Dict[str, np.ndarray], summary: Dict[str, np.ndarray], symbols
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """run_dca_arrays 의 결과를 (월별 결과, 종목별 요약) DataFrame 으로 바꿉니다."""
+    summary_df = pd.DataFrame(
+        summary_records(summary, symbols), columns=SUMMARY_COLUMNS
+    )
+    return monthly_frame(monthly, symbols), summary_df
+
+
+def run_dca_backtest(
+    values: np.ndarray,
+    dates: pd.DatetimeIndex,
+    symbols,
+    monthly_investment: float,
+    purchase_rows: np.ndarray,
+    min_rows: int = 20,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """run_dca_arrays 를 실행하고 결과를 (월별 결과, 종목별 요약) DataFrame 으로 반환합니다."""
+    monthly, summary = run_dca_arrays(
+        values, dates, monthly_investment, purchase_rows, min_rows
+    )
+    return results_to_frames(monthly, summary, symbols)
+
+
+def format_summary(row: Dict) -> str:
+    """종목별 요약 한 줄을 bt_gemini 의 기존 출력 형식으로 만듭니다."""
+    return (
+        f"[결과] 종목: {row['Symbol']} | 총투자: {row['total_investment']:,.0f}원 | "
+        f"최종평가액: {row['final_value']:,.0f}원 | 수익률: {row['roi']:.2f}%"
+    )
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+시세 수집용 asyncio 스케줄러.
+
+- 토큰 버킷으로 요청 시작 속도(초당 요청 수)를 제한합니다.
+- 요청마다 실제 마감 시간을 적용합니다. (시간 초과 시 결과를 기다리지 않고 다음으로 진행)
+  마감 시간은 요청 스레드가 시작된 때부터 잽니다. 시간 초과된 스레드도 끝날 때까지
+  동시 요청 한 자리를 계속 차지하므로 새 요청은 그 뒤에 줄 섭니다. 모든 자리가 시간 초과된
+  스레드에 묶인 채 stall_timeout 초 동안 풀리지 않으면 기다리던 작업은 TimeoutError 로 실패합니다.
+- 실패/시간 초과 요청은 지터가 섞인 지수 백오프로 재시도합니다.
+- 관측된 지연 시간과 오류율에 따라 동시 요청 수를 늘리거나 줄입니다. (AIMD)
+
+fetcher 는 (symbol, start_date) -> Optional[pd.DataFrame] 형태의 블로킹 함수이며
+요청마다 데몬 스레드에서 실행됩니다. (멈춘 스레드가 인터프리터 종료를 막지 않습니다.) 오프라인 검증용으로 기록된 CSV 를 재생하는 fetcher 를 제공합니다.
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+
+Fetcher = Callable[[str, str], Optional[pd.DataFrame]]
+ResultHandler = Callable[[str, Optional[pd.DataFrame], Optional[BaseException]], Awaitable[None]]
+
+# --- 기본 설정 ---
+DEFAULT_RATE: float = 10.0
+DEFAULT_BURST: int = 10
+DEFAULT_RETRIES: int = 2
+BACKOFF_BASE: float = 0.5
+BACKOFF_MAX: float = 30.0
+# 동시성 조절: 완료 WINDOW 건마다 평가, 오류율/지연이 기준을 넘으면 DECREASE 배로 감소
+CONTROL_WINDOW: int = 20
+TARGET_LATENCY: float = 2.0
+MAX_ERROR_RATE: float = 0.1
+DECREASE_FACTOR: float = 0.7
+
+
+class TokenBucket:
+    """초당 rate 개씩 채워지고 최대 burst 개까지 쌓이는 토큰으로 요청 시작을 제한합니다."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    동시 요청 수 상한을 AIMD 로 조절합니다.
+
+    window 건이 완료될 때마다 오류율이 max_error_rate 를 넘거나 지연 시간 중앙값이
+    target_latency 를 넘으면 상한을 decrease_factor 배로 줄이고, 아니면 1 늘립니다.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        target_latency: float = TARGET_LATENCY,
+        max_error_rate: float = MAX_ERROR_RATE,
+        window: int = CONTROL_WINDOW,
+        decrease_factor: float = DECREASE_FACTOR,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.window = window
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        # 마감 시간이 지났지만 아직 끝나지 않은 요청 수 (in_flight 에 포함)
+        self.stalled = 0
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self, stall_timeout: float) -> None:
+        """
+        동시 요청 자리를 얻습니다. 모든 자리가 멈춘 요청에 묶여 있는 동안
+        stall_timeout 초 안에 상태가 바뀌지 않으면 TimeoutError 를 냅니다.
+        """
+        async with self.condition:
+            while self.in_flight >= self.limit:
+                if self.stalled < self.limit:
+                    await self.condition.wait()
+                    continue
+                try:
+                    await asyncio.wait_for(self.condition.wait(), stall_timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"동시 요청 {self.limit}자리가 모두 멈춘 요청에 묶여 있습니다"
+                    ) from None
+            self.in_flight += 1
+
+    async def mark_stalled(self) -> None:
+        """마감 시간이 지난 요청을 기록합니다. 스레드가 끝나면 release(stalled=True) 로 반납합니다."""
+        self.stalled += 1
+        async with self.condition:
+            self.condition.notify_all()
+
+    async def release(self, latency: float, ok: bool, stalled: bool = False) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            self.stalled -= 1 if stalled else 0
+            self.latencies.append(latency)
+            self.errors += 0 if ok else 1
+            if len(self.latencies) >= self.window:
+                self._adjust()
+            self.condition.notify_all()
+
+    def _adjust(self) -> None:
+        error_rate = self.errors / len(self.latencies)
+        latency = statistics.median(self.latencies)
+        if error_rate > self.max_error_rate or latency > self.target_latency:
+            self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+        self.latencies, self.errors = [], 0
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """attempt 번째 재시도 전 대기 시간 (지수 백오프 + 0.5~1.5배 지터)."""
+    return min(cap, base * (2**attempt)) * random.uniform(0.5, 1.5)
+
+
+def _start_fetch(
+    loop: asyncio.AbstractEventLoop,
+    fetcher: Fetcher,
+    symbol: str,
+    start_date: str,
+    on_done: Callable[[float, Optional[BaseException]], None],
+) -> Tuple[asyncio.Event, asyncio.Future]:
+    """
+    fetcher 를 데몬 스레드에서 실행하고 (시작 이벤트, 결과 future) 를 반환합니다.
+
+    on_done(실행 시간, 오류) 은 스레드가 실제로 끝난 뒤 이벤트 루프에서 호출됩니다.
+    (결과를 더 기다리지 않는 시간 초과 요청도 포함, 루프가 이미 닫혔으면 호출하지 않음)
+    """
+    started = asyncio.Event()
+    future = loop.create_future()
+
+    def finish(latency: float, df, error: Optional[BaseException]) -> None:
+        if not future.done():
+            if error is None:
+                future.set_result(df)
+            else:
+                future.set_exception(error)
+        on_done(latency, error)
+
+    def run() -> None:
+        began = time.monotonic()
+        df, error = None, None
+        try:
+            loop.call_soon_threadsafe(started.set)
+            df = fetcher(symbol, start_date)
+        except Exception as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(finish, time.monotonic() - began, df, error)
+        except RuntimeError:
+            pass  # fetch_all 이 끝나 루프가 닫힌 뒤 끝난 스레드
+
+    threading.Thread(target=run, name=f"fetch-{symbol}", daemon=True).start()
+    return started, future
+
+
+async def fetch_all(
+    jobs: List[Tuple[str, str]],
+    fetcher: Fetcher,
+    on_result: ResultHandler,
+    timeout: float,
+    rate: float = DEFAULT_RATE,
+    burst: int = DEFAULT_BURST,
+    retries: int = DEFAULT_RETRIES,
+    initial_concurrency: int = 3,
+    max_concurrency: int = 16,
+    stall_timeout: Optional[float] = None,
+) -> Dict[str, float]:
+    """
+    (종목, 시작일) 작업 목록을 fetcher 로 수집하고 종목마다 on_result 를 호출합니다.
+
+    on_result(symbol, df, error) 는 성공 시 df(빈 응답이면 None), 재시도까지 모두
+    실패하면 error 를 받습니다. 모든 동시 요청 자리가 시간 초과된 스레드에 묶인 채
+    stall_timeout 초(기본값: timeout)가 지나면 남은 작업은 재시도 없이 TimeoutError 로
+    실패하므로, 끝나지 않는 요청이 있어도 반환됩니다. 수집 통계를 딕셔너리로 반환합니다.
+    """
+    stall_timeout = timeout if stall_timeout is None else stall_timeout
+    bucket = TokenBucket(rate, burst)
+    limiter = AdaptiveConcurrency(initial_concurrency, 1, max_concurrency)
+    loop = asyncio.get_running_loop()
+    stats = {
+        "requests": 0,
+        "timeouts": 0,
+        "errors": 0,
+        "retries": 0,
+        "failed": 0,
+        "stalled": 0,
+    }
+
+    async def attempt_fetch(symbol: str, start_date: str) -> Optional[pd.DataFrame]:
+        """요청 하나를 실행합니다. 동시 요청 자리는 스레드가 끝날 때 반납됩니다."""
+        timed_out = False
+
+        def on_done(latency: float, error: Optional[BaseException]) -> None:
+            ok = error is None and not timed_out
+            loop.create_task(limiter.release(latency, ok=ok, stalled=timed_out))
+
+        started, future = _start_fetch(loop, fetcher, symbol, start_date, on_done)
+        await started.wait()
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await limiter.mark_stalled()
+            raise
+
+    async def run_job(symbol: str, start_date: str) -> None:
+        error: Optional[BaseException] = None
+        for attempt in range(retries + 1):
+            if attempt > 0:
+                stats["retries"] += 1
+                await asyncio.sleep(backoff_delay(attempt - 1))
+            try:
+                await limiter.acquire(stall_timeout)
+            except TimeoutError as e:
+                # 멈춘 요청이 풀리기를 더 기다리지 않고 실패로 처리합니다.
+                stats["stalled"] += 1
+                error = e
+                break
+            await bucket.acquire()
+            stats["requests"] += 1
+            try:
+                df = await attempt_fetch(symbol, start_date)
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                error = TimeoutError(f"요청 시간 초과({timeout}초)")
+            except Exception as e:
+                stats["errors"] += 1
+                error = e
+            else:
+                await on_result(symbol, df, None)
+                return
+        stats["failed"] += 1
+        await on_result(symbol, None, error)
+
+    await asyncio.gather(*(run_job(symbol, start) for symbol, start in jobs))
+    stats["concurrency"] = limiter.limit
+    return stats
+
+
+def _frame_path(directory: str, symbol: str) -> str:
+    return os.path.join(directory, symbol.replace("/", "_") + ".csv")
+
+
+def make_replay_fetcher(directory: str, latency: float = 0.0) -> Fetcher:
+    """기록된 '<종목>.csv' 파일을 재생하는 오프라인 fetcher 를 만듭니다. 파일이 없으면 빈 응답입니다."""
+
+    def fetch(symbol: str, start_date: str) -> Optional[pd.DataFrame]:
+        if latency:
+            time.sleep(latency)
+        path = _frame_path(directory, symbol)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df = df[df.index >= pd.Timestamp(start_date)]
+        return None if df.empty else df
+
+    return fetch
+
+
+def make_recording_fetcher(fetcher: Fetcher, directory: str) -> Fetcher:
+    """fetcher 의 응답을 '<종목>.csv' 로 기록하여 나중에 재생할 수 있게 합니다."""
+    os.makedirs(directory, exist_ok=True)
+
+    def fetch(symbol: str, start_date: str) -> Optional[pd.DataFrame]:
+        df = fetcher(symbol, start_date)
+        if df is not None and not df.empty:
+            df.to_csv(_frame_path(directory, symbol))
+        return df
+
+    return fetch
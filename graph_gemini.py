@@ -10,6 +10,7 @@
 - 멀티프로세싱을 사용하여 생성 속도를 개선합니다.
 """
 
+import argparse
 import os
 import sqlite3
 import pandas as pd
@@ -18,7 +19,8 @@ import matplotlib.ticker as mticker
 import matplotlib.font_manager as fm
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional
+from pool_profiler import PoolProfiler
 
 # --- 설정 ---
 INPUT_CSV = "stock_monthly_summary_with_roi.csv"
@@ -135,8 +137,21 @@ def create_chart(args: Tuple[str, pd.DataFrame, Dict[str, str]]) -> str:
     return symbol
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="종목별 투자 성과 그래프 생성")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="작업 프로세스별 프로파일(샘플링, tracemalloc, 최대 RSS, 작업 대기/계산 시간)을 기록합니다.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default="graph_profile.json",
+        help="--profile 보고서(JSON) 경로",
+    )
+    args = parser.parse_args(argv)
+
     if not os.path.exists(INPUT_CSV):
         print(f"오류: 입력 파일 '{INPUT_CSV}'을 찾을 수 없습니다.")
         return
@@ -157,14 +172,19 @@ def main():
     print(f"{len(tasks)}개 종목에 대한 그래프 생성을 시작합니다...")
     max_workers = os.cpu_count()
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    profiler = PoolProfiler(enabled=args.profile)
+    initializer, initargs = profiler.initializer()
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=initializer, initargs=initargs
+    ) as executor:
         list(
             tqdm(
-                executor.map(create_chart, tasks),
+                profiler.map(executor, create_chart, tasks),
                 total=len(tasks),
                 desc="그래프 생성 중",
             )
         )
+    profiler.report(args.profile_output)
 
     print("\n" + "=" * 50)
     print(f"✅ 모든 그래프 생성이 완료되었습니다.")
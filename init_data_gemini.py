@@ -5,39 +5,155 @@ FinanceDataReader를 사용하여 다수 시장의 종목 정보 및 주가 데
 SQLite DB에 저장합니다. (종목 정보 테이블 분리 저장)
 """
 
+import asyncio
 import os
+import queue
 import sqlite3
+import threading
+import time
+import holidays
 import pandas as pd
 import FinanceDataReader as fdr
-from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
 from tqdm import tqdm
 import argparse
 import sys
 import re
+from price_store import update_price_store
+from fetch_engine import (
+    DEFAULT_RATE,
+    DEFAULT_RETRIES,
+    fetch_all,
+    make_recording_fetcher,
+    make_replay_fetcher,
+)
 
 # --- 상수 정의 ---
 DB_FILE: str = "stock_price.db"
 # [수정] DB_PATH 전역 변수 제거 (main 함수에서 동적으로 생성)
 DEFAULT_START_DATE: str = "2008-01-01"
+# 동시 요청 수: MAX_WORKERS 에서 시작하여 지연/오류율에 따라 MAX_CONCURRENCY 까지 조절
 MAX_WORKERS: int = 3
+MAX_CONCURRENCY: int = 16
 REQUEST_TIMEOUT: int = 5
+# 단일 기록 스레드 설정: 한 트랜잭션에 묶을 종목 수, 수집-기록 사이 큐 크기
+WRITE_BATCH_SIZE: int = 50
+WRITE_QUEUE_SIZE: int = 64
+# 대량 적재(--bulk-load) 시 한 트랜잭션에 묶을 종목 수
+BULK_BATCH_SIZE: int = 500
+STAGING_TABLE: str = "stock_price_staging"
+MONTHLY_TABLE: str = "stock_price_monthly"
+# 큐가 비어 있을 때 쌓인 배치를 커밋하기까지 기다리는 시간(초)
+WRITE_FLUSH_INTERVAL: float = 2.0
+# 최신 거래일 계산에 사용할 시장별 국가 코드 (공휴일)
+MARKET_COUNTRY_CODES: Dict[str, str] = {
+    "KRX": "KR",
+    "KOSPI": "KR",
+    "KOSDAQ": "KR",
+    "KONEX": "KR",
+    "ETF/KR": "KR",
+    "NASDAQ": "US",
+    "NYSE": "US",
+    "AMEX": "US",
+    "S&P500": "US",
+    "ETF/US": "US",
+}
+# 빈 응답/오류가 이어진 종목의 재요청 대기일: BASE * 2^(연속 실패 수 - 1), 최대 MAX 일
+FETCH_BACKOFF_BASE_DAYS: int = 1
+FETCH_BACKOFF_MAX_DAYS: int = 90
+# 저장된 시세가 있는 종목의 증분 요청이 비어 있어도, 요청 구간의 평일 수가 이 값 이하이면
+# (달력에 없는 휴장일, 하루 늦는 제공처 등) 빈 응답으로 세지 않고 다음 실행에 다시 요청합니다.
+EMPTY_WINDOW_TRADING_DAYS: int = 5
+PRICE_COLUMNS: List[str] = [
+    "Symbol",
+    "Date",
+    "Open",
+    "High",
+    "Low",
+    "Close",
+    "Volume",
+    "Change",
+]
+FETCH_STATUS_COLUMNS: List[str] = [
+    "Symbol",
+    "LastAttempt",
+    "LastSuccess",
+    "ConsecutiveFailures",
+    "EmptyResponses",
+    "NextAttempt",
+]
+
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    """WAL 모드와 쓰기 성능용 PRAGMA 를 설정합니다."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA busy_timeout=30000")
 
 
 def setup_database(db_path: str) -> None:
     """주가 데이터를 저장할 통합 테이블을 초기화합니다."""
     with sqlite3.connect(db_path) as conn:
+        configure_connection(conn)
         cursor = conn.cursor()
+        has_monthly = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+            (MONTHLY_TABLE,),
+        ).fetchone()
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS stock_price (
             Symbol TEXT, Date TEXT, Open REAL, High REAL, Low REAL, Close REAL,
             Volume INTEGER, Change REAL, PRIMARY KEY (Symbol, Date)
         )
         """)
+        # 종목별 수집 이력: 빈 응답/오류가 이어지는 종목(상장폐지 등)은 재요청을 미룹니다.
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fetch_status (
+            Symbol TEXT PRIMARY KEY, LastAttempt TEXT, LastSuccess TEXT,
+            ConsecutiveFailures INTEGER DEFAULT 0, EmptyResponses INTEGER DEFAULT 0,
+            NextAttempt TEXT
+        )
+        """)
+        # 종목별 월말(해당 월 마지막 거래일) 종가: 월 단위 전략은 이 테이블만 읽습니다.
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MONTHLY_TABLE} (
+            Symbol TEXT, Month TEXT, Date TEXT, Close REAL,
+            PRIMARY KEY (Symbol, Month)
+        )
+        """)
+        if not has_monthly:
+            # 기존 DB 에는 처음 한 번 전체 시세로부터 월말 테이블을 만듭니다.
+            refresh_monthly_prices(conn)
         conn.commit()
 
 
+def refresh_monthly_prices(
+    conn: sqlite3.Connection, since: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    stock_price 로부터 월말 종가 테이블을 갱신합니다. (트랜잭션은 호출 측에서 관리)
+
+    since 가 {종목: 가장 이른 변경일} 이면 해당 종목의 그 달 이후만 다시 계산하고,
+    None 이면 전체를 다시 만듭니다. 그룹의 MAX(Date) 와 함께 조회한 Close 는
+    SQLite 규칙에 따라 마지막 거래일 행의 값입니다.
+    """
+    select = f"""
+        INSERT OR REPLACE INTO {MONTHLY_TABLE} (Symbol, Month, Date, Close)
+        SELECT Symbol, substr(Date, 1, 7), MAX(Date), Close FROM stock_price
+    """
+    if since is None:
+        conn.execute(f"DELETE FROM {MONTHLY_TABLE}")
+        conn.execute(select + " GROUP BY Symbol, substr(Date, 1, 7)")
+        return
+    conn.executemany(
+        select + " WHERE Symbol = ? AND Date >= ? GROUP BY substr(Date, 1, 7)",
+        [(symbol, first_date[:7] + "-01") for symbol, first_date in since.items()],
+    )
+
+
 def sanitize_table_name(name):
     """테이블 이름에 사용할 수 없는 문자를 '_'로 변경합니다."""
     return re.sub(r"[^A-Za-z0-9_]", "_", name)
@@ -48,77 +164,297 @@ def save_market_info_to_db(db_path: str, market_name: str, df: pd.DataFrame) ->
     지정된 시장의 종목 목록 전체를 해당 시장 이름의 테이블에 저장합니다.
     테이블이 이미 존재하면 내용을 모두 지우고 새로 덮어씁니다.
     """
-    with sqlite3.connect(db_path) as conn:
-        safe_market_name = sanitize_table_name(market_name)
-        # [수정] KRX 종목은 Symbol을 인덱스로 사용하지 않도록 index=False 추가
-        df.to_sql(safe_market_name, conn, if_exists="replace", index=False)
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            safe_market_name = sanitize_table_name(market_name)
+            # [수정] KRX 종목은 Symbol을 인덱스로 사용하지 않도록 index=False 추가
+            df.to_sql(safe_market_name, conn, if_exists="replace", index=False)
+    finally:
+        # pandas 가 연결을 참조로 잡고 있어 명시적으로 닫지 않으면 WAL 이 정리되지 않습니다.
+        conn.close()
     print(f"[{market_name}] 시장의 종목 정보 {len(df)}개를 DB에 저장했습니다.")
 
 
-def get_last_date(db_path: str, symbol: str) -> Optional[str]:
-    """DB에서 특정 종목의 가장 마지막 날짜를 조회합니다."""
+def get_last_dates(db_path: str, market_table: str) -> Dict[str, str]:
+    """시장 테이블의 모든 종목에 대해 DB에 저장된 마지막 날짜를 한 번의 그룹 쿼리로 조회합니다."""
     with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(Date) FROM stock_price WHERE Symbol = ?", (symbol,))
-        result = cursor.fetchone()
-        return result[0] if result and result[0] else None
+        cursor = conn.execute(
+            f"""
+            SELECT Symbol, MAX(Date) FROM stock_price
+            WHERE Symbol IN (SELECT Symbol FROM "{market_table}")
+            GROUP BY Symbol
+            """
+        )
+        return {symbol: last_date for symbol, last_date in cursor if last_date}
+
+
+def get_fetch_status(db_path: str, market_table: str) -> Dict[str, dict]:
+    """시장 테이블 종목들의 수집 이력(fetch_status)을 종목별 딕셔너리로 조회합니다."""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.execute(
+            f"""
+            SELECT {", ".join(FETCH_STATUS_COLUMNS)} FROM fetch_status
+            WHERE Symbol IN (SELECT Symbol FROM "{market_table}")
+            """
+        )
+        return {row[0]: dict(zip(FETCH_STATUS_COLUMNS, row)) for row in cursor}
+
+
+def next_fetch_status(
+    symbol: str, previous: Optional[dict], outcome: str, now: datetime
+) -> tuple:
+    """
+    수집 결과(outcome: 'ok', 'empty', 'error', 'pending')를 반영한 fetch_status 행을 만듭니다.
+
+    성공하면 실패 횟수를 초기화하고, 빈 응답/오류가 이어지면 연속 횟수에 따라
+    다음 요청일(NextAttempt, 'YYYY-MM-DD')을 지수적으로 늦춥니다.
+    'pending'(아직 새 시세가 없는 짧은 증분 구간)은 횟수를 그대로 두고 미루지 않습니다.
+    """
+    previous = previous or {}
+    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
+    if outcome == "ok":
+        return (symbol, now_str, now_str, 0, 0, None)
+
+    failures = previous.get("ConsecutiveFailures") or 0
+    empties = previous.get("EmptyResponses") or 0
+    if outcome == "pending":
+        return (symbol, now_str, previous.get("LastSuccess"), failures, empties, None)
+    if outcome == "empty":
+        empties += 1
+    else:
+        failures += 1
+    delay_days = min(
+        FETCH_BACKOFF_MAX_DAYS, FETCH_BACKOFF_BASE_DAYS * 2 ** (failures + empties - 1)
+    )
+    next_attempt = (now.date() + timedelta(days=delay_days)).strftime("%Y-%m-%d")
+    return (symbol, now_str, previous.get("LastSuccess"), failures, empties, next_attempt)
+
+
+def is_short_window(start_date: str, latest_trading_day: str) -> bool:
+    """수집 구간 [start_date, latest_trading_day] 의 평일 수가 EMPTY_WINDOW_TRADING_DAYS 이하인지."""
+    weekdays = pd.bdate_range(start_date, latest_trading_day)
+    return len(weekdays) <= EMPTY_WINDOW_TRADING_DAYS
+
+
+def get_latest_trading_day(market: str, today: Optional[date] = None) -> str:
+    """
+    시장의 마지막 완료 거래일(오늘 이전의 가장 최근 영업일)을 'YYYY-MM-DD'로 반환합니다.
+
+    주말과 해당 국가 공휴일을 건너뛰며, 국가를 알 수 없는 시장은 주말만 제외합니다.
+    """
+    today = today or datetime.now().date()
+    country_code = MARKET_COUNTRY_CODES.get(market)
+    country_holidays = holidays.country_holidays(country_code) if country_code else {}
+    day = today - timedelta(days=1)
+    while day.weekday() >= 5 or day in country_holidays:
+        day -= timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
 
 
-def fetch_stock_data(
-    symbol: str, start_date: str
-) -> Optional[Tuple[str, pd.DataFrame]]:
-    """단일 종목의 시세 데이터를 가져옵니다."""
+def fetch_stock_data(symbol: str, start_date: str) -> Optional[pd.DataFrame]:
+    """단일 종목의 시세 데이터를 가져옵니다. 데이터가 없으면 None 을 반환합니다."""
     df = fdr.DataReader(symbol, start=start_date)
     if df.empty:
         return None
-    return symbol, df
+    return df
+
+
+def price_rows(symbol: str, df: pd.DataFrame) -> List[tuple]:
+    """DataReader 결과를 'stock_price' 테이블 컬럼 순서의 행 튜플 목록으로 변환합니다."""
+    df_to_save = df.reset_index()
+    if "index" in df_to_save.columns:
+        df_to_save.rename(columns={"index": "Date"}, inplace=True)
+    df_to_save["Symbol"] = symbol
+    if "Change" not in df_to_save.columns:
+        df_to_save["Change"] = df_to_save["Close"].pct_change().fillna(0)
+
+    # 누락된 컬럼이 있다면 0으로 채움
+    for col in PRICE_COLUMNS:
+        if col not in df_to_save.columns:
+            df_to_save[col] = 0
+
+    df_to_save = df_to_save[PRICE_COLUMNS].copy()
+    df_to_save["Date"] = pd.to_datetime(df_to_save["Date"]).dt.strftime("%Y-%m-%d")
+    df_to_save.fillna(0, inplace=True)
+    return [tuple(x) for x in df_to_save.to_numpy()]
+
+
+def write_price_rows(
+    conn: sqlite3.Connection,
+    rows: List[tuple],
+    status_rows: List[tuple] = (),
+    table: str = "stock_price",
+) -> None:
+    """
+    행 목록을 하나의 트랜잭션으로 table(기본 'stock_price')에 기록합니다 (INSERT OR REPLACE).
+
+    status_rows 가 있으면 같은 트랜잭션에서 'fetch_status' 테이블도 갱신합니다.
+    stock_price 에 기록할 때는 변경된 달의 월말 종가 테이블도 함께 갱신합니다.
+    """
+    with conn:
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO {table} ({", ".join(PRICE_COLUMNS)}) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            rows,
+        )
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO fetch_status ({", ".join(FETCH_STATUS_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            status_rows,
+        )
+        if table == "stock_price" and rows:
+            since: Dict[str, str] = {}
+            for row in rows:
+                symbol, row_date = row[0], row[1]
+                if row_date < since.get(symbol, "9999"):
+                    since[symbol] = row_date
+            refresh_monthly_prices(conn, since)
 
 
 def save_price_to_db(db_path: str, symbol: str, df: pd.DataFrame) -> None:
     """주가 데이터를 'stock_price' 테이블에 저장합니다 (INSERT OR REPLACE 사용)."""
     with sqlite3.connect(db_path) as conn:
-        df_to_save = df.reset_index()
-        if "index" in df_to_save.columns:
-            df_to_save.rename(columns={"index": "Date"}, inplace=True)
-        df_to_save["Symbol"] = symbol
-        if "Change" not in df_to_save.columns:
-            df_to_save["Change"] = df_to_save["Close"].pct_change().fillna(0)
-
-        required_cols = [
-            "Symbol",
-            "Date",
-            "Open",
-            "High",
-            "Low",
-            "Close",
-            "Volume",
-            "Change",
-        ]
-        # 누락된 컬럼이 있다면 0으로 채움
-        for col in required_cols:
-            if col not in df_to_save.columns:
-                df_to_save[col] = 0
+        configure_connection(conn)
+        write_price_rows(conn, price_rows(symbol, df))
 
-        df_to_save = df_to_save[required_cols].copy()
-        df_to_save["Date"] = pd.to_datetime(df_to_save["Date"]).dt.strftime("%Y-%m-%d")
-        df_to_save.fillna(0, inplace=True)
 
-        cursor = conn.cursor()
-        data_tuples = [tuple(x) for x in df_to_save.to_numpy()]
-        cursor.executemany(
-            f"""
-            INSERT OR REPLACE INTO stock_price ({", ".join(required_cols)}) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            data_tuples,
+def price_writer(
+    db_path: str,
+    write_queue: queue.Queue,
+    batch_size: int,
+    stats: dict,
+    table: str = "stock_price",
+) -> None:
+    """
+    [기록 스레드] 큐에 쌓인 (종목, 행 목록, 수집 이력 행) 을 모아 여러 종목을 한 트랜잭션으로 기록합니다.
+
+    DB 쓰기는 이 스레드만 수행하므로 쓰기 잠금 경합이 없습니다.
+    큐에서 None 을 받으면 남은 배치를 기록하고 종료합니다.
+    """
+    conn = sqlite3.connect(db_path)
+    configure_connection(conn)
+    pending_rows: List[tuple] = []
+    pending_status: List[tuple] = []
+    pending_symbols = 0
+
+    def flush():
+        nonlocal pending_rows, pending_status, pending_symbols
+        if pending_rows or pending_status:
+            write_price_rows(conn, pending_rows, pending_status, table)
+            stats["rows"] += len(pending_rows)
+            stats["commits"] += 1
+        stats["symbols"] += pending_symbols
+        pending_rows, pending_status, pending_symbols = [], [], 0
+
+    try:
+        while True:
+            try:
+                item = write_queue.get(timeout=WRITE_FLUSH_INTERVAL)
+            except queue.Empty:
+                flush()
+                continue
+            if item is None:
+                break
+            _, rows, status_row = item
+            pending_rows.extend(rows)
+            pending_status.append(status_row)
+            pending_symbols += 1 if rows else 0
+            if len(pending_status) >= batch_size:
+                flush()
+        flush()
+    except Exception as e:
+        stats["error"] = e
+        # 수집 스레드가 가득 찬 큐에서 멈추지 않도록 남은 항목을 비웁니다.
+        while write_queue.get() is not None:
+            pass
+    finally:
+        conn.close()
+
+
+def create_staging_table(db_path: str) -> None:
+    """대량 적재용 임시 적재 테이블(키/인덱스 없음)을 만듭니다."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STAGING_TABLE} (
+            Symbol TEXT, Date TEXT, Open REAL, High REAL, Low REAL, Close REAL,
+            Volume INTEGER, Change REAL
         )
-        conn.commit()
+        """)
 
 
-def process_single_symbol(symbol_info: dict, db_path: str):
-    """단일 종목에 대한 증분 업데이트를 처리하는 워커 함수."""
-    symbol = symbol_info["Symbol"]
-    last_date_str = get_last_date(db_path, symbol)
+def finalize_bulk_load(db_path: str) -> int:
+    """
+    적재 테이블의 행을 (Symbol, Date) 순으로 정렬하여 'stock_price' 에 옮기고 적재 테이블을 삭제합니다.
+
+    같은 (Symbol, Date) 가 여러 번 적재되었으면 나중에 적재된 행을 사용합니다.
+    stock_price 가 비어 있으면 같은 스키마(PRIMARY KEY (Symbol, Date))의 새 테이블에 키 순서대로
+    채운 뒤 이름을 바꿔 교체하고, 기존 데이터가 있으면 키 순서대로 INSERT OR REPLACE 합니다.
+    교체/삽입과 월말 종가 갱신은 하나의 트랜잭션이므로 실패하면 적재 전 상태로 돌아갑니다.
+    옮긴 행 수를 반환합니다.
+    """
+    columns = ", ".join(PRICE_COLUMNS)
+    latest_rows = f"""
+        SELECT {columns} FROM {STAGING_TABLE}
+        WHERE rowid IN (SELECT MAX(rowid) FROM {STAGING_TABLE} GROUP BY Symbol, Date)
+        ORDER BY Symbol, Date
+    """
+    # DDL 도 트랜잭션에 포함되도록 트랜잭션을 직접 관리합니다.
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        configure_connection(conn)
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+            (STAGING_TABLE,),
+        ).fetchone()
+        if not exists:
+            return 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            is_empty = (
+                conn.execute("SELECT 1 FROM stock_price LIMIT 1").fetchone() is None
+            )
+            if is_empty:
+                # 정렬된 순서로 넣으므로 기본 키 인덱스도 끝에 덧붙이기만 합니다.
+                conn.execute("DROP TABLE IF EXISTS stock_price_new")
+                conn.execute("""
+                CREATE TABLE stock_price_new (
+                    Symbol TEXT, Date TEXT, Open REAL, High REAL, Low REAL, Close REAL,
+                    Volume INTEGER, Change REAL, PRIMARY KEY (Symbol, Date)
+                )
+                """)
+                n_rows = conn.execute(
+                    f"INSERT INTO stock_price_new ({columns}) {latest_rows}"
+                ).rowcount
+                conn.execute("DROP TABLE stock_price")
+                conn.execute("ALTER TABLE stock_price_new RENAME TO stock_price")
+                refresh_monthly_prices(conn)
+            else:
+                n_rows = conn.execute(
+                    f"INSERT OR REPLACE INTO stock_price ({columns}) {latest_rows}"
+                ).rowcount
+                since = dict(
+                    conn.execute(
+                        f"SELECT Symbol, MIN(Date) FROM {STAGING_TABLE} GROUP BY Symbol"
+                    ).fetchall()
+                )
+                refresh_monthly_prices(conn, since)
+            conn.execute(f"DROP TABLE {STAGING_TABLE}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return n_rows
+    finally:
+        conn.close()
+
+
+def get_fetch_start(last_date_str: Optional[str]) -> Optional[str]:
+    """마지막 저장일 다음 날을 수집 시작일로 반환합니다. 받을 구간이 없으면 None."""
     start_date = (
         (datetime.strptime(last_date_str, "%Y-%m-%d") + timedelta(days=1)).strftime(
             "%Y-%m-%d"
@@ -127,11 +463,8 @@ def process_single_symbol(symbol_info: dict, db_path: str):
         else DEFAULT_START_DATE
     )
     if start_date >= datetime.now().strftime("%Y-%m-%d"):
-        return
-    result = fetch_stock_data(symbol, start_date)
-    if result:
-        _, df = result
-        save_price_to_db(db_path, symbol, df)
+        return None
+    return start_date
 
 
 def update_symbols(market: str, db_path: str) -> None:
@@ -149,8 +482,34 @@ def update_symbols(market: str, db_path: str) -> None:
     save_market_info_to_db(db_path, market, symbols_df)
 
 
-def update_prices(market: str, db_path: str, start_year: Optional[int] = None) -> None:
-    """지정된 거래소의 종목 시세를 'stock_prices' 테이블에 추가합니다."""
+def update_prices(
+    market: str,
+    db_path: str,
+    start_year: Optional[int] = None,
+    workers: int = MAX_CONCURRENCY,
+    batch_size: int = WRITE_BATCH_SIZE,
+    queue_size: int = WRITE_QUEUE_SIZE,
+    rate: float = DEFAULT_RATE,
+    timeout: float = REQUEST_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    fetcher=fetch_stock_data,
+    ignore_backoff: bool = False,
+    bulk_load: bool = False,
+) -> None:
+    """
+    지정된 거래소의 종목 시세를 'stock_prices' 테이블에 추가합니다.
+
+    asyncio 스케줄러(fetch_engine)가 초당 rate 건 이하로 요청하며, 동시 요청 수는
+    MAX_WORKERS 에서 시작해 지연/오류율에 따라 최대 workers 까지 조절됩니다.
+    받은 시세는 제한된 크기의 큐에 넣고, 단일 기록 스레드가 batch_size 개
+    종목씩 한 트랜잭션으로 기록합니다.
+
+    빈 응답/오류가 이어진 종목은 fetch_status 의 다음 요청 시각 전까지 건너뛰고
+    (ignore_backoff=True 이면 모두 요청), 요청하더라도 작업 순서의 뒤로 보냅니다.
+
+    bulk_load=True 이면 시세를 키 없는 적재 테이블에 기록하며, 모든 시장을 받은 뒤
+    finalize_bulk_load 로 stock_price 에 옮겨야 합니다.
+    """
     print(f"[{market}] 종목별 시세 데이터 업데이트를 시작합니다.")
     table_name = sanitize_table_name(market)
 
@@ -171,29 +530,125 @@ def update_prices(market: str, db_path: str, start_year: Optional[int] = None) -
     if start_year:
         DEFAULT_START_DATE = f"{start_year}-01-01"
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(process_single_symbol, symbol_info, db_path): symbol_info
-            for symbol_info in symbol_list
-        }
-        for future in tqdm(
-            as_completed(futures),
-            total=len(symbol_list),
-            desc=f"Processing Prices in {market}",
-        ):
-            symbol_info = futures[future]
-            try:
-                future.result(timeout=REQUEST_TIMEOUT)
-            except TimeoutError:
-                tqdm.write(
-                    f"오류: 종목 '{symbol_info['Symbol']}' 데이터 요청 시간 초과({REQUEST_TIMEOUT}초). 건너뜁니다."
-                )
-            except Exception as e:
-                tqdm.write(
-                    f"오류: 종목 '{symbol_info['Symbol']}' 처리 중 문제 발생 - {type(e).__name__}: {e}"
-                )
+    # 마지막 저장일을 한 번에 조회하고, 이미 최신 거래일까지 받은 종목은 작업에서 제외
+    last_dates = get_last_dates(db_path, table_name)
+    latest_trading_day = get_latest_trading_day(market)
+    total_symbols = len(symbol_list)
+    symbol_list = [
+        info
+        for info in symbol_list
+        if last_dates.get(info["Symbol"], "") < latest_trading_day
+    ]
+    print(
+        f"[{market}] 최신 거래일 {latest_trading_day} 기준 "
+        f"{total_symbols - len(symbol_list):,}개 종목은 이미 최신입니다. "
+        f"{len(symbol_list):,}개 종목을 갱신합니다."
+    )
+
+    statuses = get_fetch_status(db_path, table_name)
+    if not ignore_backoff:
+        # 다음 요청일은 날짜로 비교합니다. (하루 한 번 실행하는 작업이 몇 초 차이로 건너뛰지 않도록)
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        waiting = [
+            info
+            for info in symbol_list
+            if (statuses.get(info["Symbol"], {}).get("NextAttempt") or "")[:10]
+            > today_str
+        ]
+        if waiting:
+            print(
+                f"[{market}] 빈 응답/오류가 이어진 {len(waiting):,}개 종목은 "
+                f"재요청 대기 중이므로 건너뜁니다."
+            )
+            waiting_symbols = {info["Symbol"] for info in waiting}
+            symbol_list = [
+                info for info in symbol_list if info["Symbol"] not in waiting_symbols
+            ]
+    if not symbol_list:
+        print(f"[{market}] 시장 시세 데이터 수집 완료.")
+        return
 
-    print(f"[{market}] 시장 시세 데이터 수집 완료.")
+    write_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stats = {"rows": 0, "symbols": 0, "commits": 0, "error": None}
+    table = STAGING_TABLE if bulk_load else "stock_price"
+    if bulk_load:
+        create_staging_table(db_path)
+    writer = threading.Thread(
+        target=price_writer,
+        args=(db_path, write_queue, batch_size, stats, table),
+        name="price-writer",
+    )
+    started = time.perf_counter()
+    writer.start()
+
+    jobs = []
+    for info in symbol_list:
+        start_date = get_fetch_start(last_dates.get(info["Symbol"]))
+        if start_date is not None:
+            jobs.append((info["Symbol"], start_date))
+    # 최근 실패가 적은 종목부터 요청 (정렬은 안정적이므로 나머지 순서는 유지)
+    jobs.sort(
+        key=lambda job: (statuses.get(job[0], {}).get("ConsecutiveFailures") or 0)
+        + (statuses.get(job[0], {}).get("EmptyResponses") or 0)
+    )
+
+    job_starts = dict(jobs)
+    progress = tqdm(total=len(jobs), desc=f"Processing Prices in {market}")
+
+    async def on_result(symbol, df, error):
+        if error is not None:
+            tqdm.write(
+                f"오류: 종목 '{symbol}' 처리 중 문제 발생 - {type(error).__name__}: {error}"
+            )
+            outcome, rows = "error", []
+        elif df is None:
+            # 저장된 시세가 있는 종목의 짧은 증분 구간이 비어 있으면 미루지 않습니다.
+            pending = symbol in last_dates and is_short_window(
+                job_starts[symbol], latest_trading_day
+            )
+            outcome, rows = ("pending" if pending else "empty"), []
+        else:
+            outcome, rows = "ok", price_rows(symbol, df)
+        status_row = next_fetch_status(
+            symbol, statuses.get(symbol), outcome, datetime.now()
+        )
+        # 큐가 가득 차면 기록 스레드를 기다리되 이벤트 루프는 막지 않습니다.
+        await asyncio.to_thread(write_queue.put, (symbol, rows, status_row))
+        progress.update(1)
+
+    try:
+        fetch_stats = asyncio.run(
+            fetch_all(
+                jobs,
+                fetcher,
+                on_result,
+                timeout=timeout,
+                rate=rate,
+                retries=retries,
+                initial_concurrency=min(MAX_WORKERS, workers),
+                max_concurrency=workers,
+            )
+        )
+    finally:
+        progress.close()
+        write_queue.put(None)
+        writer.join()
+    if stats["error"] is not None:
+        raise stats["error"]
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"[{market}] 시장 시세 데이터 수집 완료. "
+        f"({stats['symbols']:,}개 종목, {stats['rows']:,}행, 커밋 {stats['commits']:,}회, "
+        f"{elapsed:.1f}초, {stats['rows'] / max(elapsed, 1e-9):,.0f}행/초)"
+    )
+    print(
+        f"[{market}] 요청 {fetch_stats['requests']:,}건 "
+        f"(시간 초과 {fetch_stats['timeouts']:,}, 오류 {fetch_stats['errors']:,}, "
+        f"재시도 {fetch_stats['retries']:,}, 실패 종목 {fetch_stats['failed']:,}, "
+        f"멈춘 요청 대기로 실패 {fetch_stats['stalled']:,}), "
+        f"최종 동시 요청 수 {fetch_stats['concurrency']}"
+    )
 
 
 def main():
@@ -222,18 +677,85 @@ def main():
         type=int,
         help=f"시세 데이터를 받아올 시작 연도 (기본값: {DEFAULT_START_DATE.split('-')[0]})",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_CONCURRENCY,
+        help=f"동시 요청 수 상한 (기본값: {MAX_CONCURRENCY}, {MAX_WORKERS}에서 시작하여 자동 조절)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"초당 최대 요청 수 (기본값: {DEFAULT_RATE})",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=REQUEST_TIMEOUT,
+        help=f"요청별 마감 시간(초) (기본값: {REQUEST_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"실패/시간 초과 요청 재시도 횟수 (기본값: {DEFAULT_RETRIES})",
+    )
+    parser.add_argument(
+        "--replay-dir",
+        help="네트워크 대신 디렉터리의 '<종목>.csv' 기록을 재생하여 시세를 수집합니다. (오프라인 검증용)",
+    )
+    parser.add_argument(
+        "--record-dir",
+        help="받아온 시세를 디렉터리에 '<종목>.csv' 로 기록합니다. (--replay-dir 로 재생 가능)",
+    )
+    parser.add_argument(
+        "--bulk-load",
+        action="store_true",
+        help="초기 적재용: 시세를 키 없는 적재 테이블에 모은 뒤 정렬하여 한 번에 옮기고\n"
+        "키를 만듭니다. 비어 있거나 거의 빈 DB 에 사용하세요.",
+    )
+    parser.add_argument(
+        "--ignore-backoff",
+        action="store_true",
+        help="빈 응답/오류가 이어져 재요청 대기 중인 종목도 모두 요청합니다.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help=f"한 트랜잭션으로 기록할 종목 수 (기본값: {WRITE_BATCH_SIZE}, --bulk-load 시 {BULK_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=WRITE_QUEUE_SIZE,
+        help=f"수집 스레드와 기록 스레드 사이 큐 크기 (기본값: {WRITE_QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--rebuild-store",
+        action="store_true",
+        help="컬럼형 시세 저장소(stock_price.colstore)를 처음부터 다시 만듭니다.",
+    )
     args = parser.parse_args()
 
-    if not args.update_symbols and not args.update_prices:
+    if not args.update_symbols and not args.update_prices and not args.rebuild_store:
         parser.print_help()
         sys.exit(
-            "\n오류: --update-symbols 와 --update-prices 중 하나 이상의 작업을 선택해야 합니다."
+            "\n오류: --update-symbols, --update-prices, --rebuild-store 중 하나 이상의 작업을 선택해야 합니다."
         )
 
     # [수정] 스크립트 위치를 기준으로 정확한 DB 파일 경로 생성
     script_dir = os.path.dirname(os.path.abspath(__file__))
     db_path = os.path.join(script_dir, DB_FILE)
     setup_database(db_path)
+    if args.batch_size is None:
+        args.batch_size = BULK_BATCH_SIZE if args.bulk_load else WRITE_BATCH_SIZE
+
+    fetcher = fetch_stock_data
+    if args.replay_dir:
+        fetcher = make_replay_fetcher(args.replay_dir)
+    if args.record_dir:
+        fetcher = make_recording_fetcher(fetcher, args.record_dir)
 
     for market in args.markets:
         print(f"\n===== '{market}' 거래소 작업 시작 =====")
@@ -243,9 +765,38 @@ def main():
 
         if args.update_prices:
             # [수정] 정확한 db_path 전달
-            update_prices(market, db_path, args.start_year)
+            update_prices(
+                market,
+                db_path,
+                args.start_year,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                queue_size=args.queue_size,
+                rate=args.rate,
+                timeout=args.timeout,
+                retries=args.retries,
+                fetcher=fetcher,
+                ignore_backoff=args.ignore_backoff,
+                bulk_load=args.bulk_load,
+            )
         print(f"===== '{market}' 거래소 작업 완료 =====\n")
 
+    if args.update_prices and args.bulk_load:
+        print("적재 테이블의 시세를 정렬하여 'stock_price' 테이블로 옮깁니다...")
+        started = time.perf_counter()
+        n_rows = finalize_bulk_load(db_path)
+        elapsed = time.perf_counter() - started
+        print(
+            f"대량 적재 완료 ({n_rows:,}행, {elapsed:.1f}초, "
+            f"{n_rows / max(elapsed, 1e-9):,.0f}행/초)."
+        )
+
+    if args.update_prices or args.rebuild_store:
+        # 시세 변경분(rowid 기준)만 컬럼형 저장소에 증분 반영
+        print("컬럼형 시세 저장소를 갱신합니다...")
+        n_rows = update_price_store(db_path, rebuild=args.rebuild_store)
+        print(f"컬럼형 시세 저장소 갱신 완료 ({n_rows:,}행 반영).")
+
 
 if __name__ == "__main__":
     main()
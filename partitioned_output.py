@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+종목별 월별 결과를 완료되는 대로 기록하는 파티션 컬럼형 출력과 재시작용 체크포인트.
+
+출력 디렉터리 구성:
+- manifest.jsonl : 첫 줄은 실행 설정(header), 이후 줄마다 완료된 작업 하나
+  ({"symbols": 작업 대상 종목, "parts": 기록한 파일, "rows": 행 수})
+- p<번호>/part-<순번>.npz : 종목 해시(crc32 % partitions)로 나눈 결과 파일.
+  RESULT_COLUMNS 순서의 열을 각각 (원래 자료형의) numpy 배열로 저장합니다.
+
+작업 결과는 파일을 먼저 기록한 뒤 manifest 에 한 줄을 덧붙이므로, 실행이 중간에 끊겨도
+manifest 에 기록된 작업까지는 그대로 남습니다. 같은 설정으로 다시 실행하면 completed_symbols 에
+있는 종목을 건너뛸 수 있습니다. 설정(기간, 매수 규칙, 데이터 버전 등)이 다른 체크포인트는 지우지 않고
+오류를 내며, resume=False 일 때만 지우고 처음부터 다시 기록합니다.
+부모 프로세스는 결과를 모아 두지 않으므로 메모리 사용량은 작업 하나의 결과 크기로 제한됩니다.
+"""
+
+import json
+import os
+import shutil
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import numpy as np
+import pandas as pd
+from dca_engine import RESULT_COLUMNS
+
+OUTPUT_FORMAT_VERSION: int = 1
+MANIFEST_FILE: str = "manifest.jsonl"
+DEFAULT_PARTITIONS: int = 16
+CSV_FLOAT_FORMAT: str = "%.2f"
+
+
+def symbol_partition(symbol: str, partitions: int) -> int:
+    """종목 코드의 파티션 번호 (실행/프로세스와 관계없이 항상 같은 값)."""
+    return zlib.crc32(symbol.encode("utf-8")) % partitions
+
+
+def _read_manifest(path: str) -> Optional[List[dict]]:
+    """manifest 의 줄 목록. 기록 중 끊겨 불완전한 마지막 줄은 무시합니다."""
+    if not os.path.exists(path):
+        return None
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return entries
+
+
+def read_config(output_dir: str) -> Optional[dict]:
+    """output_dir 의 manifest 에 기록된 실행 설정(config). 결과 출력 디렉터리가 아니면 None."""
+    entries = _read_manifest(os.path.join(output_dir, MANIFEST_FILE))
+    if not entries:
+        return None
+    return entries[0].get("config")
+
+
+class PartitionedResultWriter:
+    """
+    작업 단위 결과를 파티션 파일로 기록하고 manifest 에 완료를 표시합니다.
+
+    resume 이 True 이고 output_dir 에 같은 설정(config)의 manifest 가 있으면 이어서 기록하며,
+    이미 완료된 종목은 completed_symbols 로 확인할 수 있습니다. 다른 설정의 manifest 가 있으면
+    resume 이 True 일 때는 FileExistsError 를 내고, False 일 때만 지우고 새로 기록합니다.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        config: dict,
+        partitions: int = DEFAULT_PARTITIONS,
+        resume: bool = True,
+    ):
+        self.output_dir = output_dir
+        self.header = {
+            "format": OUTPUT_FORMAT_VERSION,
+            "config": config,
+            "partitions": partitions,
+        }
+        self.partitions = partitions
+        self.completed_symbols: Set[str] = set()
+        self.rows = 0
+        self.tasks = 0
+        # 다음 결과 파일 순번 (manifest 에 남은 파일과 겹치지 않게 정합니다.)
+        self._next_part = 0
+
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        entries = _read_manifest(manifest_path)
+        if entries and resume and entries[0] == self.header:
+            for entry in entries[1:]:
+                if all(os.path.exists(self._path(part)) for part in entry["parts"]):
+                    self.completed_symbols.update(entry["symbols"])
+                    self.rows += entry["rows"]
+                    self.tasks += 1
+                    for part in entry["parts"]:
+                        sequence = int(part.rsplit("-", 1)[1].split(".")[0])
+                        self._next_part = max(self._next_part, sequence + 1)
+            # 파일이 없는 작업이나 끊긴 마지막 줄을 뺀 manifest 로 다시 쓰고 이어서 기록합니다.
+            self._rewrite_manifest(entries)
+        else:
+            if entries and resume:
+                raise FileExistsError(
+                    f"'{output_dir}' 에 다른 설정으로 실행한 체크포인트가 있습니다. "
+                    "처음부터 다시 실행하려면 --restart 를 지정하세요."
+                )
+            if entries is not None:
+                shutil.rmtree(output_dir)
+            elif os.path.isdir(output_dir) and os.listdir(output_dir):
+                raise FileExistsError(
+                    f"'{output_dir}' 는 결과 출력 디렉터리가 아닌데 비어 있지 않습니다."
+                )
+            os.makedirs(output_dir, exist_ok=True)
+            self._rewrite_manifest([self.header])
+        self.resumed = bool(self.completed_symbols)
+
+    def _path(self, part: str) -> str:
+        return os.path.join(self.output_dir, part)
+
+    def _rewrite_manifest(self, entries: List[dict]) -> None:
+        valid = [self.header] + [
+            entry
+            for entry in entries[1:]
+            if all(os.path.exists(self._path(part)) for part in entry["parts"])
+        ]
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for entry in valid:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(path + ".tmp", path)
+
+    def write(self, symbols: Iterable[str], monthly_df: pd.DataFrame) -> None:
+        """
+        작업 하나의 결과를 기록하고 symbols(작업 대상 종목 전체)를 완료로 표시합니다.
+
+        결과가 없는 종목(데이터 부족 등)도 완료로 표시되어 다시 실행하지 않습니다.
+        """
+        symbols = list(symbols)
+        parts = []
+        if not monthly_df.empty:
+            codes = np.array(
+                [symbol_partition(s, self.partitions) for s in monthly_df["Symbol"]]
+            )
+            for partition in np.unique(codes):
+                part = f"p{partition:03d}/part-{self._next_part:06d}.npz"
+                rows = monthly_df[codes == partition]
+                self._write_part(part, rows)
+                parts.append(part)
+        entry = {"symbols": symbols, "parts": parts, "rows": len(monthly_df)}
+        with open(
+            os.path.join(self.output_dir, MANIFEST_FILE), "a", encoding="utf-8"
+        ) as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed_symbols.update(symbols)
+        self.rows += len(monthly_df)
+        self.tasks += 1
+        self._next_part += 1
+
+    def _write_part(self, part: str, rows: pd.DataFrame) -> None:
+        path = self._path(part)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        columns = {
+            "Symbol": rows["Symbol"].to_numpy(dtype=str),
+            "Date": rows["Date"].to_numpy().astype("datetime64[D]"),
+        }
+        for column in RESULT_COLUMNS[2:]:
+            columns[column] = rows[column].to_numpy()
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, **columns)
+        os.replace(path + ".tmp", path)
+
+
+def _load_part(path: str) -> pd.DataFrame:
+    with np.load(path, allow_pickle=False) as data:
+        columns: Dict[str, np.ndarray] = {name: data[name] for name in RESULT_COLUMNS}
+    columns["Symbol"] = columns["Symbol"].astype(object)
+    columns["Date"] = columns["Date"].astype("datetime64[ns]")
+    return pd.DataFrame(columns, columns=RESULT_COLUMNS)
+
+
+def iter_partitions(output_dir: str) -> Iterator[pd.DataFrame]:
+    """manifest 에 기록된 결과를 파티션 단위 DataFrame(종목, 날짜 순 정렬)으로 하나씩 내보냅니다."""
+    entries = _read_manifest(os.path.join(output_dir, MANIFEST_FILE))
+    if not entries:
+        return
+    by_partition: Dict[str, List[str]] = {}
+    for entry in entries[1:]:
+        for part in entry["parts"]:
+            by_partition.setdefault(os.path.dirname(part), []).append(part)
+    for partition in sorted(by_partition):
+        frame = pd.concat(
+            [
+                _load_part(os.path.join(output_dir, part))
+                for part in by_partition[partition]
+            ],
+            ignore_index=True,
+        )
+        yield frame.sort_values(["Symbol", "Date"], kind="stable", ignore_index=True)
+
+
+def load_results(output_dir: str) -> pd.DataFrame:
+    """기록된 결과 전체를 하나의 DataFrame 으로 읽습니다. (작은 결과나 확인용)"""
+    frames = list(iter_partitions(output_dir))
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_csv(output_dir: str, csv_path: str) -> int:
+    """기록된 결과를 파티션 단위로 읽어 CSV 한 파일로 내보내고 행 수를 반환합니다."""
+    n_rows = 0
+    tmp_path = csv_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for frame in iter_partitions(output_dir):
+            frame.to_csv(
+                f, index=False, header=n_rows == 0, float_format=CSV_FLOAT_FORMAT
+            )
+            n_rows += len(frame)
+        if n_rows == 0:
+            f.write(",".join(RESULT_COLUMNS) + "\n")
+    os.replace(tmp_path, csv_path)
+    return n_rows
@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+"""
+ProcessPoolExecutor 작업 프로세스용 선택적(opt-in) 프로파일러.
+
+PoolProfiler(enabled=False) 는 아무것도 하지 않고 원래 함수/인자를 그대로 넘기므로,
+호출 측은 프로파일 여부와 관계없이 같은 코드로 풀을 사용합니다.
+
+활성화하면 작업 프로세스마다 다음을 기록합니다.
+- 샘플링 프로파일러: 별도 스레드가 SAMPLE_INTERVAL 마다 작업 중인 메인 스레드의 호출 스택을 기록합니다.
+  (작업 대기 중에는 기록하지 않습니다. C 함수 안의 시간은 그 함수를 부른 파이썬 프레임에 기록됩니다.)
+- tracemalloc 최대 할당량과 할당이 많은 위치 상위 목록, 최대 RSS
+- 작업별 대기 시간(제출 -> 시작)과 계산 시간(시작 -> 끝)
+
+tracemalloc 때문에 할당이 많은 작업(차트 그리기 등)은 몇 배 느려질 수 있으므로 절대 시간보다
+함수/라이브러리별 비율과 대기/계산 비율을 보는 용도로 사용합니다. (샘플링 자체의 부담은 작습니다.)
+
+작업 프로세스는 종료할 때 기록을 임시 디렉터리에 남기고, report() 가 이를 하나의 보고서로 합칩니다.
+샘플은 스택의 바깥쪽에서 처음 만나는 라이브러리(SQLite, pandas, numpy, matplotlib 등)로도 분류하여
+어느 쪽에 시간이 쓰이는지 보여줍니다.
+"""
+
+import json
+import os
+import re
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from itertools import repeat
+from multiprocessing import util
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ROOT_DIR: str = os.path.dirname(os.path.abspath(__file__))
+# 스택 샘플 간격(초)
+SAMPLE_INTERVAL: float = 0.005
+# 기록할 최대 스택 깊이
+MAX_STACK_DEPTH: int = 64
+# tracemalloc 이 할당 위치마다 저장할 프레임 수
+TRACEMALLOC_FRAMES: int = 1
+# 보고서에 담을 상위 항목 수
+TOP_N: int = 20
+# 샘플 분류: 경로에 해당 문자열이 들어간 프레임을 그 라이브러리로 봅니다. (앞의 항목 우선)
+CATEGORY_PATTERNS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("sqlite", ("/sqlite3/", "/pandas/io/sql.py")),
+    ("matplotlib", ("/matplotlib/", "/PIL/")),
+    ("pandas", ("/pandas/",)),
+    ("numpy", ("/numpy/",)),
+]
+OTHER_CATEGORY: str = "python"
+
+
+# --- 메모리 측정 ---
+
+
+def _proc_status_bytes(field: str) -> Optional[int]:
+    """/proc/self/status 의 메모리 항목(VmRSS, VmHWM 등)을 바이트로 읽습니다. Linux 가 아니면 None."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> None:
+    """최대 RSS(VmHWM)를 현재 값으로 초기화합니다. (Linux 4.0 이상, 그 밖에는 무시)"""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes() -> int:
+    """
+    프로세스의 최대 RSS(바이트).
+
+    getrusage 의 ru_maxrss 는 fork 시점의 부모 값을 이어받으므로 Linux 에서는 VmHWM 을 사용합니다.
+    (ru_maxrss 는 Linux 에서 KB, macOS 에서 바이트 단위)
+    """
+    peak = _proc_status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def current_rss_bytes() -> int:
+    """현재 RSS(바이트). Linux 가 아니면 최대 RSS 를 반환합니다."""
+    return _proc_status_bytes("VmRSS") or peak_rss_bytes()
+
+
+# --- 작업 프로세스 쪽 ---
+
+# 작업 프로세스 안의 프로파일 상태 (initializer 에서 설정)
+_WORKER: Optional[dict] = None
+
+
+# 코드 객체별 '경로:줄:함수' 문자열 (샘플마다 새로 만들지 않도록 재사용)
+_FRAME_KEYS: Dict[Any, str] = {}
+
+
+def _frame_key(code) -> str:
+    key = _FRAME_KEYS.get(code)
+    if key is None:
+        key = _FRAME_KEYS[code] = (
+            f"{code.co_filename}:{code.co_firstlineno}:{code.co_name}"
+        )
+    return key
+
+
+def _sampler(state: dict, thread_id: int, interval: float) -> None:
+    """
+    [샘플링 스레드] 작업 중인 메인 스레드의 스택(바깥 -> 안쪽)마다 샘플 수와 시간을 더합니다.
+
+    메인 스레드가 GIL 을 오래 잡고 있으면 샘플 간격이 벌어지므로,
+    각 샘플에는 직전 샘플 이후 실제로 흐른 시간을 더합니다.
+    """
+    samples: Dict[tuple, list] = state["samples"]
+    last = time.perf_counter()
+    while not state["stop"].wait(interval):
+        now = time.perf_counter()
+        elapsed, last = now - last, now
+        if not state["active"]:
+            continue
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(_frame_key(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            entry = samples.setdefault(tuple(reversed(stack)), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+def _dump_worker() -> None:
+    """[작업 프로세스 종료 시] 기록을 '<디렉터리>/worker-<pid>.json' 으로 남깁니다."""
+    state = _WORKER
+    if state is None:
+        return
+    state["stop"].set()
+    top_allocations = []
+    traced_peak = 0
+    if tracemalloc.is_tracing():
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        # 프로파일러 자신의 샘플 기록은 할당 상위 목록에서 뺍니다.
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ]
+        )
+        for stat in snapshot.statistics("lineno")[: state["top_n"]]:
+            frame = stat.traceback[0]
+            top_allocations.append(
+                {
+                    "location": f"{frame.filename}:{frame.lineno}",
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                }
+            )
+        tracemalloc.stop()
+    record = {
+        "pid": os.getpid(),
+        "tasks": state["tasks"],
+        "compute_seconds": state["compute_seconds"],
+        "peak_rss_bytes": peak_rss_bytes(),
+        "traced_peak_bytes": traced_peak,
+        "top_allocations": top_allocations,
+        "samples": [
+            [list(stack), count, seconds]
+            for stack, (count, seconds) in state["samples"].items()
+        ],
+    }
+    path = os.path.join(state["directory"], f"worker-{os.getpid()}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(path + ".tmp", path)
+
+
+def _init_worker(
+    directory: str,
+    interval: float,
+    top_n: int,
+    initializer: Optional[Callable],
+    initargs: tuple,
+) -> None:
+    """[작업 프로세스 initializer] 프로파일러를 시작한 뒤 원래 initializer 를 실행합니다."""
+    global _WORKER
+    _WORKER = {
+        "directory": directory,
+        "top_n": top_n,
+        "samples": {},
+        "active": False,
+        "stop": threading.Event(),
+        "tasks": 0,
+        "compute_seconds": 0.0,
+    }
+    reset_peak_rss()
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    threading.Thread(
+        target=_sampler,
+        args=(_WORKER, threading.main_thread().ident, interval),
+        daemon=True,
+    ).start()
+    # 작업 프로세스는 atexit 대신 multiprocessing 의 종료 처리기(Finalize)를 실행합니다.
+    util.Finalize(None, _dump_worker, exitpriority=100)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+class ProfiledTask:
+    """작업 함수를 감싸 (원래 결과, 작업 기록) 을 반환합니다. 첫 인자는 제출 시각(time.time())입니다."""
+
+    def __init__(self, fn: Callable):
+        self.fn = fn
+
+    def __call__(self, submitted_at: float, *args) -> Tuple[Any, dict]:
+        started = time.time()
+        state = _WORKER
+        if state is not None:
+            state["active"] = True
+        try:
+            result = self.fn(*args)
+        finally:
+            finished = time.time()
+            if state is not None:
+                state["active"] = False
+                state["tasks"] += 1
+                state["compute_seconds"] += finished - started
+        return result, {
+            "pid": os.getpid(),
+            "wait_seconds": max(0.0, started - submitted_at),
+            "compute_seconds": finished - started,
+        }
+
+
+# --- 부모 프로세스 쪽 ---
+
+
+def _category(stack: List[str]) -> str:
+    """스택의 바깥쪽부터 처음 만나는 라이브러리 프레임으로 샘플을 분류합니다."""
+    for key in stack:
+        for category, patterns in CATEGORY_PATTERNS:
+            if any(pattern in key for pattern in patterns):
+                return category
+    return OTHER_CATEGORY
+
+
+def _short_path(path: str) -> str:
+    """site-packages, 표준 라이브러리, 이 저장소 경로의 앞부분을 줄입니다."""
+    if path.startswith(ROOT_DIR + os.sep):
+        return os.path.relpath(path, ROOT_DIR)
+    return re.sub(r"^.*/(site-packages|lib/python[\d.]+)/", "", path)
+
+
+def _short_key(key: str) -> str:
+    """'경로:줄:함수' 를 '짧은 경로:줄(함수)' 로 바꿉니다."""
+    path, line, name = key.rsplit(":", 2)
+    return f"{_short_path(path)}:{line}({name})"
+
+
+def _distribution(values: List[float]) -> dict:
+    if not values:
+        return {"total": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "total": sum(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+class PoolProfiler:
+    """
+    ProcessPoolExecutor 작업 프로세스 프로파일러.
+
+    사용법:
+        profiler = PoolProfiler(enabled=args.profile)
+        initializer, initargs = profiler.initializer(원래 initializer, 원래 initargs)
+        with ProcessPoolExecutor(initializer=initializer, initargs=initargs) as executor:
+            future = profiler.submit(executor, fn, *args)
+            result = profiler.result(future.result())
+            # 또는 for result in profiler.map(executor, fn, items): ...
+        profiler.report(path)  # 풀이 종료된 뒤 호출
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        interval: float = SAMPLE_INTERVAL,
+        top_n: int = TOP_N,
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.top_n = top_n
+        self.task_records: List[dict] = []
+        self.directory = tempfile.mkdtemp(prefix="pool-profile-") if enabled else None
+
+    def initializer(
+        self, initializer: Optional[Callable] = None, initargs: tuple = ()
+    ) -> Tuple[Optional[Callable], tuple]:
+        """ProcessPoolExecutor 에 넘길 (initializer, initargs) 를 반환합니다."""
+        if not self.enabled:
+            return initializer, initargs
+        return _init_worker, (
+            self.directory,
+            self.interval,
+            self.top_n,
+            initializer,
+            initargs,
+        )
+
+    def submit(self, executor, fn: Callable, *args):
+        if not self.enabled:
+            return executor.submit(fn, *args)
+        return executor.submit(ProfiledTask(fn), time.time(), *args)
+
+    def result(self, value):
+        """submit 한 작업의 future.result() 에서 원래 결과를 꺼내고 작업 기록을 모읍니다."""
+        if not self.enabled:
+            return value
+        result, record = value
+        self.task_records.append(record)
+        return result
+
+    def map(self, executor, fn: Callable, items: Iterable) -> Iterator:
+        """executor.map 과 같이 결과를 입력 순서대로 내보냅니다."""
+        if not self.enabled:
+            yield from executor.map(fn, items)
+            return
+        for value in executor.map(ProfiledTask(fn), repeat(time.time()), items):
+            yield self.result(value)
+
+    def _worker_records(self) -> List[dict]:
+        records = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("worker-") and name.endswith(".json"):
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    records.append(json.load(f))
+        return records
+
+    def build_report(self) -> dict:
+        """작업 프로세스 기록과 작업 기록을 하나의 보고서 딕셔너리로 합칩니다. (풀 종료 후 호출)"""
+        workers = self._worker_records()
+        self_seconds: Counter = Counter()
+        cumulative_seconds: Counter = Counter()
+        category_seconds: Counter = Counter()
+        n_samples = 0
+        for worker in workers:
+            for stack, count, seconds in worker.pop("samples"):
+                n_samples += count
+                self_seconds[stack[-1]] += seconds
+                for key in set(stack):
+                    cumulative_seconds[key] += seconds
+                category_seconds[_category(stack)] += seconds
+            for allocation in worker["top_allocations"]:
+                path, line = allocation["location"].rsplit(":", 1)
+                allocation["location"] = f"{_short_path(path)}:{line}"
+        sampled = sum(category_seconds.values())
+
+        def top(counter: Counter, key_name: str, shorten=_short_key) -> List[dict]:
+            return [
+                {key_name: shorten(key), "seconds": seconds, "share": seconds / sampled}
+                for key, seconds in counter.most_common(self.top_n)
+            ]
+
+        waits = [record["wait_seconds"] for record in self.task_records]
+        computes = [record["compute_seconds"] for record in self.task_records]
+        busy = sum(waits) + sum(computes)
+        return {
+            "tasks": {
+                "count": len(self.task_records),
+                "wait_seconds": _distribution(waits),
+                "compute_seconds": _distribution(computes),
+                "wait_share": sum(waits) / busy if busy else 0.0,
+                "records": self.task_records,
+            },
+            "workers": workers,
+            "profile": {
+                "interval_seconds": self.interval,
+                "samples": n_samples,
+                "sampled_seconds": sampled,
+                "categories": top(category_seconds, "category", str) if sampled else [],
+                "top_self": top(self_seconds, "function") if sampled else [],
+                "top_cumulative": (
+                    top(cumulative_seconds, "function") if sampled else []
+                ),
+            },
+        }
+
+    def report(self, path: Optional[str] = None, stream=sys.stdout) -> Optional[dict]:
+        """보고서를 만들어 path(JSON) 에 저장하고 요약을 stream 에 출력한 뒤 임시 디렉터리를 지웁니다."""
+        if not self.enabled:
+            return None
+        try:
+            report = self.build_report()
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        for line in format_report(report):
+            print(line, file=stream)
+        if path:
+            print(f"   - 프로파일 보고서: {path}", file=stream)
+        return report
+
+
+def format_report(report: dict, top_n: int = 10) -> List[str]:
+    """보고서 요약을 출력용 줄 목록으로 만듭니다."""
+    tasks, profile = report["tasks"], report["profile"]
+    wait, compute = tasks["wait_seconds"], tasks["compute_seconds"]
+    lines = [
+        "\n--- 작업 프로세스 프로파일 ---",
+        f"작업 {tasks['count']}개: "
+        f"대기 합계 {wait['total']:.2f}s (p95 {wait['p95']:.3f}s), "
+        f"계산 합계 {compute['total']:.2f}s (p95 {compute['p95']:.3f}s), "
+        f"대기 비율 {tasks['wait_share']:.1%}",
+    ]
+    for worker in report["workers"]:
+        lines.append(
+            f"- pid {worker['pid']}: 작업 {worker['tasks']}개, "
+            f"계산 {worker['compute_seconds']:.2f}s, "
+            f"최대 RSS {worker['peak_rss_bytes'] / 2**20:.1f} MB, "
+            f"tracemalloc 최대 {worker['traced_peak_bytes'] / 2**20:.1f} MB"
+        )
+    if profile["samples"]:
+        lines.append(
+            f"샘플 {profile['samples']}개 ({profile['sampled_seconds']:.2f}s), "
+            "라이브러리별 시간:"
+        )
+        for entry in profile["categories"]:
+            lines.append(f"  {entry['category']:<12} {entry['share']:6.1%}")
+        lines.append("자체 시간 상위 함수:")
+        for entry in profile["top_self"][:top_n]:
+            lines.append(f"  {entry['share']:6.1%}  {entry['function']}")
+    return lines
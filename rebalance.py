@@ -7,16 +7,24 @@
 
 import argparse
 import sys
+import numpy as np
 import pandas as pd
-from config import STRATEGY_ASSETS, BUY_COMMISSION_RATE
+from config import STRATEGY_ASSETS, DAILY_DATA_STRATEGIES
 from data_handler import load_data, prepare_strategy_data
-from strategies import decide_haa_portfolio, decide_daa_portfolio, decide_laa_portfolio
+from strategies import strategy_target_weights
 from portfolio_manager import (
+    make_ticker_index,
+    price_matrix,
+    target_arrays,
+    row_targets,
+    execute_initial_buy,
     execute_rebalancing,
     evaluate_portfolio_state,
     execute_periodic_buy,
+    evaluation_frame,
 )
 from reporting import print_final_report, generate_plot
+from trade_journal import TradeJournal, LEVELS, HOLD
 
 
 def main():
@@ -51,6 +59,13 @@ def main():
         action="store_true",
         help="[기본 전략용] 리밸런싱(매도) 없이 추가 매수만 진행",
     )
+    parser.add_argument(
+        "--log-level",
+        default="debug",
+        choices=list(LEVELS),
+        help="거래 기록 출력 수준 (off, summary: 합계, trades: 거래만, debug: 전체)",
+    )
+    parser.add_argument("--trade-log-csv", help="거래 기록을 저장할 CSV 경로")
     args = parser.parse_args()
 
     # --- [수정] 1. 전략 & 그래프 제목 준비 ---
@@ -79,8 +94,17 @@ def main():
         graph_title = f"{args.strategy.upper()} Strategy"
 
     # ... (나머지 로직은 동일) ...
-    stock_data = load_data(args.db_path, all_tickers, args.start_date)
-    monthly_prices, momentum_data, daily_data = prepare_strategy_data(stock_data)
+    # 평가일은 항상 월말이므로 일별 지표가 필요 없는 전략은 월말 종가만 읽습니다.
+    needs_daily = args.strategy in DAILY_DATA_STRATEGIES
+    stock_data = load_data(
+        args.db_path,
+        all_tickers,
+        args.start_date,
+        frequency="daily" if needs_daily else "monthly",
+    )
+    monthly_prices, momentum_data, daily_data = prepare_strategy_data(
+        stock_data, include_daily=needs_daily, db_path=args.db_path
+    )
     sim_start_date = pd.to_datetime(args.start_date)
     theoretical_dates = pd.date_range(
         start=sim_start_date, end=monthly_prices.index[-1], freq=args.interval
@@ -89,65 +113,87 @@ def main():
     unique_indices = sorted(list(set(date_indices)))
     evaluation_dates = monthly_prices.index[unique_indices]
     evaluation_dates = evaluation_dates[evaluation_dates >= sim_start_date]
+    # 종목 순서를 고정하고 보유 수량/가격/평가 결과를 배열로 관리합니다.
+    tickers = list(all_tickers)
+    ticker_index = make_ticker_index(tickers)
+    prices_by_date = price_matrix(stock_data, tickers)
+    price_rows = stock_data.index.searchsorted(evaluation_dates, side="right") - 1
+    if args.strategy == "default":
+        default_positions, default_weights = target_arrays(target_weights, ticker_index)
+    else:
+        # 전 평가일의 목표 비중/매매 순서를 한 번에 계산
+        strategy_weights, strategy_order = strategy_target_weights(
+            args.strategy,
+            evaluation_dates,
+            stock_data,
+            monthly_prices,
+            momentum_data,
+            daily_data,
+        )
+        weight_matrix = strategy_weights.reindex(
+            columns=tickers, fill_value=0.0
+        ).to_numpy(dtype=np.float64)
+        order_matrix = strategy_order.reindex(columns=tickers, fill_value=-1).to_numpy()
+    n_dates, n_tickers = len(evaluation_dates), len(tickers)
     cash = args.capital
-    holdings = {ticker: 0 for ticker in all_tickers}
+    holdings = np.zeros(n_tickers, dtype=np.int64)
     total_investment = args.capital
-    results = []
+    # 누적 투자금은 입력 금액의 자료형(정수 입력이면 정수)을 유지하도록 목록으로 기록합니다.
+    cash_history, investment_history = np.empty(n_dates), []
+    holdings_history = np.empty((n_dates, n_tickers), dtype=np.int64)
+    value_history = np.empty((n_dates, n_tickers))
+    weight_history = np.empty((n_dates, n_tickers))
+    # CSV 로 저장할 때는 출력 수준과 관계없이 거래를 모두 기록합니다.
+    journal = TradeJournal(
+        "debug" if args.trade_log_csv else args.log_level, evaluation_dates, tickers
+    )
     for i, date in enumerate(evaluation_dates):
-        print(f"\n--- 평가일: {date.strftime('%Y-%m-%d')} ---")
+        journal.start_date(i)
         if i > 0 and args.periodic_investment > 0:
             cash += args.periodic_investment
             total_investment += args.periodic_investment
-            print(
-                f"✅ 추가 투자금 입금: {args.periodic_investment:,.2f} | 조정 후 현금: {cash:,.2f}"
-            )
-        current_prices = stock_data.loc[stock_data.index.asof(date)]
-        if args.strategy == "haa":
-            target_portfolio = decide_haa_portfolio(date, monthly_prices, momentum_data)
-        elif args.strategy == "daa":
-            target_portfolio = decide_daa_portfolio(date, momentum_data)
-        elif args.strategy == "laa":
-            target_portfolio = decide_laa_portfolio(date, current_prices, daily_data)
+            journal.deposit(args.periodic_investment, cash)
+        prices = prices_by_date[price_rows[i]]
+        if args.strategy == "default":
+            positions, weights = default_positions, default_weights
         else:
-            target_portfolio = target_weights
-        if not target_portfolio:
-            print("목표 포트폴리오를 결정할 수 없어 현재 상태를 유지합니다.")
+            positions, weights = row_targets(weight_matrix[i], order_matrix[i])
+        if len(positions) == 0:
+            journal.info(HOLD, dated=True)
         else:
             if i == 0:
-                initial_portfolio_value = cash
-                for ticker, weight in target_portfolio.items():
-                    price = current_prices.get(ticker)
-                    if price is not None and price > 0:
-                        allocation = initial_portfolio_value * weight
-                        shares_to_buy = int(
-                            allocation / (price * (1 + BUY_COMMISSION_RATE))
-                        )
-                        if shares_to_buy > 0:
-                            base_cost = shares_to_buy * price
-                            commission = base_cost * BUY_COMMISSION_RATE
-                            total_cost = base_cost + commission
-                            if cash >= total_cost:
-                                holdings[ticker] = shares_to_buy
-                                cash -= total_cost
-                                print(
-                                    f"- {ticker}: {shares_to_buy:,}주 초기 매수 (비용: {base_cost:,.2f}, 수수료: {commission:,.2f})"
-                                )
+                holdings, cash = execute_initial_buy(
+                    holdings, cash, positions, weights, prices, journal
+                )
             else:
                 if args.strategy == "default" and args.no_rebalance:
                     holdings, cash = execute_periodic_buy(
-                        holdings.copy(), cash, target_weights, current_prices
+                        holdings, cash, positions, weights, prices, journal
                     )
                 else:
                     holdings, cash = execute_rebalancing(
-                        holdings.copy(), cash, target_portfolio, current_prices
+                        holdings, cash, positions, weights, prices, journal
                     )
-        eval_result = evaluate_portfolio_state(
-            date, holdings, cash, current_prices, all_tickers
+        value_history[i], weight_history[i] = evaluate_portfolio_state(
+            holdings, cash, prices
         )
-        eval_result["Total Investment"] = total_investment
-        results.append(eval_result)
-    if results:
-        numeric_df = pd.DataFrame(results).fillna(0)
+        holdings_history[i] = holdings
+        cash_history[i] = cash
+        investment_history.append(total_investment)
+    if args.trade_log_csv:
+        journal.to_csv(args.trade_log_csv)
+    journal.write(level=args.log_level)
+    if n_dates > 0:
+        numeric_df = evaluation_frame(
+            evaluation_dates,
+            tickers,
+            cash_history,
+            holdings_history,
+            prices_by_date[price_rows],
+            value_history,
+            weight_history,
+            np.asarray(investment_history),
+        ).fillna(0)
         numeric_df.set_index("Date", inplace=True)
         value_columns = [
             f"{t} Value" for t in all_tickers if f"{t} Value" in numeric_df.columns
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+네트워크 없이 테스트/벤치마크용 합성 주가 DB 를 만듭니다.
+
+init_data_gemini.py 와 같은 스키마(stock_price, fetch_status, 월말 종가 테이블, 시장별 종목 목록
+테이블)를 같은 대량 적재 경로로 채우므로, 실제 DB 를 읽는 코드를 그대로 실행해 볼 수 있습니다.
+같은 인자와 시드로 만들면 항상 같은 내용이 만들어집니다.
+
+- 거래일: 평일에서 해마다 임의의 휴장일을 뺀 공통 달력
+- 종목: config.TICKER_NAMES 의 ETF(전 기간 상장, ETF/US 시장) + n_symbols 개의 합성 종목
+  (NASDAQ/NYSE 시장에 번갈아 배정)
+- 상장/상장폐지: listing_rate / delisting_rate 비율의 종목은 기간 중간에 상장되거나 폐지됩니다.
+- 결측: 종목별로 gap_rate 비율의 거래일이 빠지고, halt_rate 비율의 종목은 거래 정지 구간이 생깁니다.
+
+사용 예:
+    python synthetic_db.py synthetic.db --symbols 500 --years 10 --seed 1
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from config import TICKER_NAMES
+from indicator_cache import get_cache_dir
+from price_store import get_store_dir, update_price_store
+from trading_calendar import get_calendar_path
+from init_data_gemini import (
+    BULK_BATCH_SIZE,
+    PRICE_COLUMNS,
+    STAGING_TABLE,
+    configure_connection,
+    create_staging_table,
+    finalize_bulk_load,
+    save_market_info_to_db,
+    setup_database,
+)
+
+DEFAULT_END_DATE: str = "2025-12-31"
+# 해마다 평일 중 휴장일로 뺄 날 수
+HOLIDAYS_PER_YEAR: int = 9
+# 상장/폐지 종목의 최소 상장 기간 (거래일)
+MIN_LISTED_DAYS: int = 60
+# 거래 정지 구간 길이 (거래일)
+HALT_DAYS_RANGE = (5, 60)
+SYNTHETIC_MARKETS: List[str] = ["NASDAQ", "NYSE"]
+ETF_MARKET: str = "ETF/US"
+
+
+def trading_calendar(
+    rng: np.random.Generator, years: int, end_date: str
+) -> pd.DatetimeIndex:
+    """end_date 까지 years 년 동안의 평일에서 해마다 임의의 휴장일을 뺀 거래일 달력을 만듭니다."""
+    end = pd.Timestamp(end_date)
+    weekdays = pd.bdate_range(end - pd.DateOffset(years=years), end)
+    n_holidays = min(len(weekdays) - 1, HOLIDAYS_PER_YEAR * years)
+    holidays = rng.choice(len(weekdays), size=n_holidays, replace=False)
+    return weekdays.delete(holidays)
+
+
+def listed_range(
+    rng: np.random.Generator,
+    n_days: int,
+    listing_rate: float,
+    delisting_rate: float,
+) -> tuple:
+    """종목의 상장 구간 [first, last) 을 거래일 위치로 정합니다."""
+    first, last = 0, n_days
+    span = max(n_days - 2 * MIN_LISTED_DAYS, 1)
+    if rng.random() < listing_rate:
+        first = int(rng.integers(0, span))
+    if rng.random() < delisting_rate:
+        last = int(rng.integers(min(first + MIN_LISTED_DAYS, n_days - 1), n_days)) + 1
+    return first, last
+
+
+def symbol_prices(rng: np.random.Generator, n_days: int) -> Dict[str, np.ndarray]:
+    """기하 브라운 운동으로 한 종목의 OHLCV/등락률 배열을 만듭니다."""
+    drift = rng.normal(0.0003, 0.0003)
+    volatility = rng.uniform(0.008, 0.035)
+    close = rng.uniform(5, 500) * np.exp(
+        np.cumsum(rng.normal(drift, volatility, n_days))
+    )
+    previous = np.concatenate(([close[0]], close[:-1]))
+    open_ = previous * np.exp(rng.normal(0, volatility / 4, n_days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, n_days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, n_days)))
+    volume = rng.lognormal(12, 1.5, n_days).astype(np.int64)
+    return {
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": volume,
+        "Change": close / previous - 1,
+    }
+
+
+def symbol_rows(
+    rng: np.random.Generator,
+    symbol: str,
+    date_strings: np.ndarray,
+    first: int,
+    last: int,
+    gap_rate: float,
+    halt_rate: float,
+) -> List[tuple]:
+    """상장 구간에서 결측/거래 정지일을 뺀 거래일의 stock_price 행 목록을 만듭니다."""
+    n_days = last - first
+    keep = rng.random(n_days) >= gap_rate
+    if rng.random() < halt_rate and n_days > HALT_DAYS_RANGE[1] * 2:
+        length = int(rng.integers(*HALT_DAYS_RANGE))
+        start = int(rng.integers(1, n_days - length))
+        keep[start : start + length] = False
+    keep[0] = True
+    prices = symbol_prices(rng, int(keep.sum()))
+    return list(
+        zip(
+            [symbol] * len(prices["Close"]),
+            date_strings[first:last][keep].tolist(),
+            *(prices[column].tolist() for column in PRICE_COLUMNS[2:]),
+        )
+    )
+
+
+def remove_database(db_path: str) -> None:
+    """DB 파일과 WAL 파일, 옆에 만들어진 거래일 달력과 컬럼형 저장소/지표 캐시 디렉터리를 지웁니다."""
+    for path in (db_path, db_path + "-wal", db_path + "-shm", get_calendar_path(db_path)):
+        if os.path.exists(path):
+            os.remove(path)
+    for directory in (get_store_dir(db_path), get_cache_dir(db_path)):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def generate_database(
+    db_path: str,
+    n_symbols: int = 100,
+    years: int = 10,
+    end_date: str = DEFAULT_END_DATE,
+    gap_rate: float = 0.01,
+    halt_rate: float = 0.05,
+    listing_rate: float = 0.3,
+    delisting_rate: float = 0.1,
+    seed: int = 0,
+    build_price_store: bool = False,
+) -> Dict[str, int]:
+    """
+    합성 주가 DB 를 db_path 에 새로 만들고 {종목 수, 행 수, 거래일 수} 를 반환합니다.
+
+    db_path 에 이미 DB 가 있으면 (옆의 저장소/캐시 디렉터리와 함께) 지우고 다시 만듭니다.
+    build_price_store 가 True 이면 컬럼형 가격 저장소도 함께 만듭니다.
+    """
+    rng = np.random.default_rng(seed)
+    dates = trading_calendar(rng, years, end_date)
+    date_strings = np.asarray(dates.strftime("%Y-%m-%d"))
+
+    remove_database(db_path)
+    setup_database(db_path)
+    create_staging_table(db_path)
+
+    etfs = list(TICKER_NAMES)
+    synthetic = [f"SYN{i:05d}" for i in range(n_symbols)]
+    listings: Dict[str, List[dict]] = {ETF_MARKET: []}
+    listings.update({market: [] for market in SYNTHETIC_MARKETS})
+
+    n_rows = 0
+    conn = sqlite3.connect(db_path)
+    try:
+        configure_connection(conn)
+        insert = f"""
+            INSERT INTO {STAGING_TABLE} ({", ".join(PRICE_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        pending: List[tuple] = []
+        for i, symbol in enumerate(etfs + synthetic):
+            is_etf = i < len(etfs)
+            if is_etf:
+                # 전략 백테스트가 전 기간 데이터를 쓸 수 있도록 ETF 는 상장/폐지 없이 만듭니다.
+                first, last = 0, len(dates)
+                market, name = ETF_MARKET, TICKER_NAMES[symbol]
+            else:
+                first, last = listed_range(
+                    rng, len(dates), listing_rate, delisting_rate
+                )
+                market = SYNTHETIC_MARKETS[i % len(SYNTHETIC_MARKETS)]
+                name = f"Synthetic {symbol[3:]}"
+            pending.extend(
+                symbol_rows(
+                    rng,
+                    symbol,
+                    date_strings,
+                    first,
+                    last,
+                    gap_rate,
+                    0.0 if is_etf else halt_rate,
+                )
+            )
+            listings[market].append(
+                {
+                    "Symbol": symbol,
+                    "Name": name,
+                    "ListingDate": date_strings[first],
+                    "DelistingDate": (
+                        date_strings[last - 1] if last < len(dates) else None
+                    ),
+                }
+            )
+            if (i + 1) % BULK_BATCH_SIZE == 0:
+                with conn:
+                    conn.executemany(insert, pending)
+                n_rows += len(pending)
+                pending = []
+        with conn:
+            conn.executemany(insert, pending)
+        n_rows += len(pending)
+    finally:
+        conn.close()
+
+    finalize_bulk_load(db_path)
+    for market, rows in listings.items():
+        save_market_info_to_db(db_path, market, pd.DataFrame(rows))
+    # WAL 에 남은 내용을 DB 파일에 반영하고 단일 파일로 바꿔 복사/이동해도 내용이 빠지지 않게 합니다.
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+    if build_price_store:
+        update_price_store(db_path)
+    return {
+        "symbols": len(etfs) + len(synthetic),
+        "rows": n_rows,
+        "trading_days": len(dates),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="테스트/벤치마크용 합성 주가 DB 를 만듭니다.")
+    parser.add_argument("db_path", help="만들 DB 파일 경로")
+    parser.add_argument("--symbols", type=int, default=100, help="합성 종목 수 (ETF 제외)")
+    parser.add_argument("--years", type=int, default=10, help="기간 (년)")
+    parser.add_argument("--end-date", default=DEFAULT_END_DATE, help="마지막 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--gap-rate", type=float, default=0.01, help="종목별 결측 거래일 비율")
+    parser.add_argument("--halt-rate", type=float, default=0.05, help="거래 정지 구간이 있는 종목 비율")
+    parser.add_argument("--listing-rate", type=float, default=0.3, help="기간 중 상장 종목 비율")
+    parser.add_argument("--delisting-rate", type=float, default=0.1, help="기간 중 상장폐지 종목 비율")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument("--price-store", action="store_true", help="컬럼형 가격 저장소도 만듭니다.")
+    parser.add_argument("--force", action="store_true", help="이미 있는 DB 를 지우고 다시 만듭니다.")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db_path) and not args.force:
+        print(f"오류: '{args.db_path}' 가 이미 있습니다. 다시 만들려면 --force 를 사용하세요.")
+        sys.exit(1)
+    stats = generate_database(
+        args.db_path,
+        n_symbols=args.symbols,
+        years=args.years,
+        end_date=args.end_date,
+        gap_rate=args.gap_rate,
+        halt_rate=args.halt_rate,
+        listing_rate=args.listing_rate,
+        delisting_rate=args.delisting_rate,
+        seed=args.seed,
+        build_price_store=args.price_store,
+    )
+    print(
+        f"합성 DB 생성 완료: {args.db_path} "
+        f"(종목 {stats['symbols']}개, 거래일 {stats['trading_days']}일, 행 {stats['rows']:,}개)"
+    )
+
+
+if __name__ == "__main__":
+    main()
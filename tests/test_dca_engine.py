@@ -0,0 +1,220 @@
+# test_dca_engine.py
+"""
+벡터화 적립식 엔진(run_dca_arrays)이 종목별로 매수일을 순회하던 기존 방식과 같은 결과를 내는지
+합성 DB(synthetic_db.generate_database)로 확인합니다.
+
+기존 방식(_reference_backtest)은 종목마다 첫 시세일부터 relativedelta 로 한 달씩 더해 매수일을 정하고,
+index.asof 로 체결한 수량을 이후 구간에 더한 뒤 월말로 리샘플링합니다. 매수일은 엔진과 같은
+거래일 달력(trading_calendar)에서 그 달의 첫/마지막 거래일을 사용합니다.
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from bt_gemini import load_close_panel
+from dca_engine import (
+    count_purchase_months,
+    monthly_frame,
+    run_dca_arrays,
+    summary_records,
+)
+from synthetic_db import SYNTHETIC_MARKETS, generate_database
+from trading_calendar import load_symbol_markets, load_trading_days, market_positions
+
+MONTHLY_INVESTMENT = 100_000
+WINDOW = ("2023-01-01", "2025-12-31")
+
+
+def _purchase_dates(prices, trading_days, rule):
+    """첫 시세일부터 한 달씩 더해 가며 각 달의 첫/마지막 거래일을 매수일로 정합니다."""
+    purchase_dates = []
+    current = prices.index.min()
+    while current <= prices.index.max():
+        month = trading_days[
+            (trading_days.year == current.year) & (trading_days.month == current.month)
+        ]
+        # 거래일이 없는 달도 투자 원금에는 포함합니다. (체결하지 못하는 날짜)
+        purchase_dates.append(
+            (month[0] if rule == "first" else month[-1]) if len(month) else pd.NaT
+        )
+        current += relativedelta(months=1)
+    return purchase_dates
+
+
+def _reference_backtest(prices, purchase_dates):
+    """기존 run_single_stock_backtest 와 월별 결과 가공 (종목 하나)."""
+    shares_ts = pd.Series(0.0, index=prices.index, dtype=float)
+    for date in purchase_dates:
+        if pd.isna(date):
+            continue
+        trade_date = prices.index.asof(date)
+        if pd.isna(trade_date):
+            continue
+        price = prices.loc[trade_date, "Close"]
+        if pd.isna(price) or price <= 0:
+            continue
+        shares_ts.loc[trade_date:] += MONTHLY_INVESTMENT / price
+    if shares_ts.sum() == 0:
+        return None
+
+    portfolio_ts = prices["Close"] * shares_ts
+    total_investment = len(purchase_dates) * MONTHLY_INVESTMENT
+    final_value = portfolio_ts.iloc[-1]
+    summary = {
+        "total_investment": total_investment,
+        "final_value": final_value,
+        "roi": (final_value - total_investment) / total_investment * 100,
+    }
+
+    monthly_value = portfolio_ts.resample("ME").last()
+    monthly_shares = shares_ts.resample("ME").last()
+    month_counts = pd.Series(
+        range(1, len(monthly_value) + 1), index=monthly_value.index
+    )
+    monthly_investment_ts = month_counts * MONTHLY_INVESTMENT
+    roi_ts = (monthly_value - monthly_investment_ts) / monthly_investment_ts * 100
+    roi_ts = roi_ts.fillna(0).replace([float("inf"), -float("inf")], 0)
+    monthly_df = pd.DataFrame(
+        {
+            "TotalInvestment": monthly_investment_ts,
+            "PortfolioValue": monthly_value,
+            "TotalShares": monthly_shares,
+            "ROI_Percent": roi_ts,
+        }
+    )
+    return monthly_df, summary
+
+
+class RunDcaArraysTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.db_path = os.path.join(cls.directory, "synthetic.db")
+        generate_database(
+            cls.db_path,
+            n_symbols=12,
+            years=4,
+            listing_rate=0.5,
+            delisting_rate=0.5,
+            halt_rate=0.3,
+            seed=17,
+        )
+        with sqlite3.connect(cls.db_path) as conn:
+            cls.listings = pd.concat(
+                [
+                    pd.read_sql_query(
+                        f'SELECT Symbol, ListingDate, DelistingDate FROM "{market}"',
+                        conn,
+                    )
+                    for market in SYNTHETIC_MARKETS
+                ],
+                ignore_index=True,
+            )
+        symbols = sorted(cls.listings["Symbol"]) + ["SPY"]
+        cls.dates, cls.symbols, cls.values = load_close_panel(
+            cls.db_path, symbols, *WINDOW
+        )
+        cls.trading_days = load_trading_days(cls.db_path, SYNTHETIC_MARKETS)
+        cls.symbol_markets = load_symbol_markets(cls.db_path, SYNTHETIC_MARKETS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def test_window_has_listing_and_delisting(self):
+        listed = self.listings["ListingDate"] > WINDOW[0]
+        delisted = self.listings["DelistingDate"].notna() & (
+            self.listings["DelistingDate"] < WINDOW[1]
+        )
+        self.assertTrue(listed.any())
+        self.assertTrue(delisted.any())
+        self.assertTrue(set(self.listings["Symbol"][listed]) <= set(self.symbols))
+
+    def _check_rule(self, rule):
+        positions, codes = market_positions(
+            self.dates, self.symbols, self.trading_days, self.symbol_markets, rule
+        )
+        monthly, summary = run_dca_arrays(
+            self.values, self.dates, MONTHLY_INVESTMENT, positions[:, codes]
+        )
+        actual = monthly_frame(monthly, self.symbols)
+        summaries = {
+            row["Symbol"]: row for row in summary_records(summary, self.symbols)
+        }
+
+        compared = 0
+        for column, symbol in enumerate(self.symbols):
+            prices = pd.DataFrame(
+                {"Close": self.values[:, column]},
+                index=self.dates.astype("datetime64[ns]"),
+            ).dropna()
+            market = self.symbol_markets.get(symbol)
+            trading_days = self.trading_days.get(market, self.dates)
+            expected = None
+            if len(prices) >= 20:
+                expected = _reference_backtest(
+                    prices, _purchase_dates(prices, trading_days, rule)
+                )
+            with self.subTest(rule=rule, symbol=symbol):
+                rows = actual[actual["Symbol"] == symbol]
+                if expected is None:
+                    self.assertTrue(rows.empty)
+                    self.assertNotIn(symbol, summaries)
+                    continue
+                compared += 1
+                expected_monthly, expected_summary = expected
+                pd.testing.assert_frame_equal(
+                    rows.drop(columns="Symbol").set_index("Date"),
+                    expected_monthly,
+                    check_dtype=False,
+                    check_freq=False,
+                    check_names=False,
+                )
+                for name, value in expected_summary.items():
+                    self.assertAlmostEqual(summaries[symbol][name], value, places=6)
+        self.assertGreater(compared, len(self.symbols) // 2)
+
+    def test_first_trading_day_purchases(self):
+        self._check_rule("first")
+
+    def test_last_trading_day_purchases(self):
+        self._check_rule("last")
+
+
+class CountPurchaseMonthsTest(unittest.TestCase):
+    @staticmethod
+    def _stepped(first, last):
+        count, current = 0, first
+        while current <= last:
+            count += 1
+            current += relativedelta(months=1)
+        return count
+
+    def test_matches_relativedelta_stepping(self):
+        month_ends = pd.date_range("2019-01-31", "2021-12-31", freq="ME")
+        starts = list(month_ends) + [
+            pd.Timestamp(day)
+            for day in ("2020-01-30", "2020-02-28", "2020-03-30", "2019-05-15")
+        ]
+        ends = list(month_ends) + list(month_ends - pd.Timedelta(days=1))
+        ends += [
+            pd.Timestamp(day) for day in ("2020-02-28", "2020-02-29", "2021-02-28")
+        ]
+        for first in starts:
+            for last in ends:
+                if last < first:
+                    continue
+                with self.subTest(first=first.date(), last=last.date()):
+                    self.assertEqual(
+                        count_purchase_months(first, last), self._stepped(first, last)
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
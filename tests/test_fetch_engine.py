@@ -0,0 +1,88 @@
+# test_fetch_engine.py
+"""
+fetch_engine.fetch_all 이 끝나지 않는 요청이 있어도 반환되는지 확인합니다.
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+import pandas as pd
+from fetch_engine import fetch_all
+
+SYMBOLS = [f"S{i}" for i in range(8)]
+
+
+class FetchAllStallTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        # 멈춘 fetcher 스레드를 끝냅니다.
+        self.release.set()
+
+    def _run(self, fetcher, timeout=0.2, retries=1):
+        results = {}
+
+        async def on_result(symbol, df, error):
+            results[symbol] = (df, error)
+
+        started = time.monotonic()
+        stats = asyncio.run(
+            fetch_all(
+                [(symbol, "2020-01-01") for symbol in SYMBOLS],
+                fetcher,
+                on_result,
+                timeout=timeout,
+                rate=1000.0,
+                burst=100,
+                retries=retries,
+                initial_concurrency=3,
+                max_concurrency=3,
+            )
+        )
+        return results, stats, time.monotonic() - started
+
+    def test_hung_fetchers_filling_every_slot(self):
+        hung = set(SYMBOLS[:3])
+
+        def fetcher(symbol, start_date):
+            if symbol in hung:
+                self.release.wait()
+            return pd.DataFrame({"Close": [1.0]})
+
+        results, stats, elapsed = self._run(fetcher)
+        self.assertLess(elapsed, 10)
+        self.assertEqual(sorted(results), SYMBOLS)
+        for symbol, (df, error) in results.items():
+            with self.subTest(symbol=symbol):
+                self.assertIsNone(df)
+                self.assertIsInstance(error, TimeoutError)
+        self.assertEqual(stats["failed"], len(SYMBOLS))
+        self.assertGreater(stats["stalled"], 0)
+
+    def test_slow_fetchers_free_their_slots(self):
+        """시간 초과 후에라도 끝나는 요청은 자리를 돌려주므로 다른 작업은 실패하지 않습니다."""
+        slow = set(SYMBOLS[:3])
+
+        def fetcher(symbol, start_date):
+            if symbol in slow:
+                time.sleep(0.25)
+            return pd.DataFrame({"Close": [1.0]})
+
+        results, stats, _ = self._run(fetcher, retries=0)
+        self.assertEqual(sorted(results), SYMBOLS)
+        for symbol, (df, error) in results.items():
+            with self.subTest(symbol=symbol):
+                if symbol in slow:
+                    self.assertIsInstance(error, TimeoutError)
+                else:
+                    self.assertIsNone(error)
+                    self.assertIsNotNone(df)
+        self.assertEqual(stats["stalled"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
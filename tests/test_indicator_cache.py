@@ -0,0 +1,122 @@
+# test_indicator_cache.py
+"""
+cached_strategy_data 가 DB 변경 후 꼬리 구간만 다시 계산해도 전체 계산(compute_strategy_data)과
+같은 결과를 내는지 합성 DB(synthetic_db.generate_database)로 확인합니다.
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+from config import STRATEGY_ASSETS
+from data_handler import compute_strategy_data, load_data
+from indicator_cache import cached_strategy_data
+from init_data_gemini import PRICE_COLUMNS, configure_connection, write_price_rows
+from synthetic_db import generate_database
+
+TICKERS = sorted(
+    {
+        t
+        for assets in STRATEGY_ASSETS.values()
+        for group in assets.values()
+        for t in group
+    }
+)
+START_DATE = "2019-01-01"
+
+
+class CachedStrategyDataTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "synthetic.db")
+        generate_database(self.db_path, n_symbols=2, years=8, seed=11)
+        self.computed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _compute(self, stock_data, include_daily):
+        self.computed.append(len(stock_data))
+        return compute_strategy_data(stock_data, include_daily)
+
+    def _load(self, frequency):
+        return load_data(self.db_path, TICKERS, START_DATE, frequency=frequency)
+
+    def _rewrite(self, symbol, fraction, factor):
+        """symbol 의 이력 중 fraction 위치부터 20개 거래일의 종가를 factor 배로 다시 기록합니다."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            configure_connection(conn)
+            rows = conn.execute(
+                f"SELECT {', '.join(PRICE_COLUMNS)} FROM stock_price "
+                "WHERE Symbol = ? AND Date >= ? ORDER BY Date",
+                (symbol, START_DATE),
+            ).fetchall()
+            start = int(len(rows) * fraction)
+            changed = [
+                row[:5] + (row[5] * factor,) + row[6:]
+                for row in rows[start : start + 20]
+            ]
+            write_price_rows(conn, changed)
+        finally:
+            conn.close()
+
+    def _assert_same(self, actual, expected):
+        actual_monthly, actual_momentum, actual_daily = actual
+        expected_monthly, expected_momentum, expected_daily = expected
+        pd.testing.assert_frame_equal(actual_monthly, expected_monthly)
+        self.assertEqual(sorted(actual_momentum), sorted(expected_momentum))
+        for name in expected_momentum:
+            pd.testing.assert_frame_equal(
+                actual_momentum[name], expected_momentum[name], obj=name
+            )
+        self.assertEqual(sorted(actual_daily), sorted(expected_daily))
+        for name in expected_daily:
+            pd.testing.assert_series_equal(
+                actual_daily[name], expected_daily[name], obj=name
+            )
+
+    def _check_mid_history_replace(self, frequency, include_daily):
+        stock_data = self._load(frequency)
+        cached_strategy_data(self.db_path, stock_data, include_daily, self._compute)
+        self.assertEqual(self.computed, [len(stock_data)])
+
+        self._rewrite("SPY", 0.6, 1.1)
+        self._rewrite("TLT", 0.75, 0.9)
+        stock_data = self._load(frequency)
+        result = cached_strategy_data(
+            self.db_path, stock_data, include_daily, self._compute
+        )
+        # 변경 이후 구간(과 지표 계산에 필요한 이전 구간)만 다시 계산해야 합니다.
+        self.assertEqual(len(self.computed), 2)
+        self.assertLess(self.computed[1], len(stock_data))
+        self._assert_same(result, compute_strategy_data(stock_data, include_daily))
+
+        # 같은 데이터 버전이면 다시 계산하지 않습니다.
+        again = cached_strategy_data(
+            self.db_path, stock_data, include_daily, self._compute
+        )
+        self.assertEqual(len(self.computed), 2)
+        self._assert_same(again, result)
+
+    def test_daily_mid_history_replace(self):
+        self._check_mid_history_replace("daily", include_daily=True)
+
+    def test_monthly_mid_history_replace(self):
+        self._check_mid_history_replace("monthly", include_daily=False)
+
+    def test_change_outside_tickers_reuses_cache(self):
+        stock_data = self._load("daily")
+        first = cached_strategy_data(self.db_path, stock_data, True, self._compute)
+        self._rewrite("SYN00000", 0.5, 1.2)
+        result = cached_strategy_data(self.db_path, stock_data, True, self._compute)
+        self.assertEqual(len(self.computed), 1)
+        self._assert_same(result, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
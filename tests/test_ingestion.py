@@ -0,0 +1,232 @@
+# test_ingestion.py
+"""
+init_data_gemini 의 시세 기록 경로를 합성 DB(synthetic_db.generate_database)로 확인합니다.
+
+- finalize_bulk_load: 빈 stock_price 를 교체할 때 기본 키 유지, 중간 실패 시 롤백
+- INSERT OR REPLACE 경로: 월말 종가 테이블은 종목별 가장 이른 변경일의 달부터만 다시 계산
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+import init_data_gemini
+from init_data_gemini import (
+    MONTHLY_TABLE,
+    PRICE_COLUMNS,
+    STAGING_TABLE,
+    create_staging_table,
+    finalize_bulk_load,
+    write_price_rows,
+)
+from synthetic_db import generate_database
+
+COLUMNS = ", ".join(PRICE_COLUMNS)
+
+
+def _rows(conn, table="stock_price"):
+    return conn.execute(
+        f"SELECT {COLUMNS} FROM {table} ORDER BY Symbol, Date"
+    ).fetchall()
+
+
+def _table_exists(conn, name):
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+        ).fetchone()
+        is not None
+    )
+
+
+def _primary_key(conn, table="stock_price"):
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [name for _, name, _, _, _, pk in sorted(info, key=lambda c: c[5]) if pk]
+
+
+def _monthly(conn):
+    return dict(
+        ((symbol, month), (day, close))
+        for symbol, month, day, close in conn.execute(
+            f"SELECT Symbol, Month, Date, Close FROM {MONTHLY_TABLE}"
+        )
+    )
+
+
+def _expected_monthly(conn):
+    """stock_price 에서 직접 구한 종목별 월말(그 달 마지막 거래일) 종가."""
+    expected = {}
+    for symbol, day, close in conn.execute(
+        "SELECT Symbol, Date, Close FROM stock_price ORDER BY Symbol, Date"
+    ):
+        expected[symbol, day[:7]] = (day, close)
+    return expected
+
+
+class IngestionTestCase(unittest.TestCase):
+    """테스트마다 새로 만든 합성 DB 를 self.db_path 로 제공합니다."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "synthetic.db")
+        generate_database(self.db_path, n_symbols=4, years=2, seed=5)
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _stage(self, rows):
+        create_staging_table(self.db_path)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO {STAGING_TABLE} ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+
+class FinalizeBulkLoadTest(IngestionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original = _rows(self.conn)
+        with self.conn:
+            self.conn.execute("DELETE FROM stock_price")
+        # 같은 (Symbol, Date) 를 다시 적재하면 나중에 적재된 행이 남아야 합니다.
+        symbol, day = self.original[10][:2]
+        self.replaced = (symbol, day, 1.0, 2.0, 0.5, 1.5, 100, 0.0)
+        self._stage(list(reversed(self.original)) + [self.replaced])
+
+    def test_empty_table_swap_keeps_primary_key(self):
+        n_rows = finalize_bulk_load(self.db_path)
+
+        expected = [
+            self.replaced if row[:2] == self.replaced[:2] else row
+            for row in self.original
+        ]
+        self.assertEqual(n_rows, len(expected))
+        self.assertEqual(_rows(self.conn), expected)
+        self.assertEqual(_primary_key(self.conn), ["Symbol", "Date"])
+        self.assertFalse(_table_exists(self.conn, STAGING_TABLE))
+        self.assertFalse(_table_exists(self.conn, "stock_price_new"))
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.conn:
+                self.conn.execute(
+                    f"INSERT INTO stock_price ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    self.replaced,
+                )
+
+    def test_failure_after_swap_rolls_back(self):
+        # 새 테이블로 교체한 뒤 월말 종가 갱신에서 실패시킵니다.
+        with mock.patch.object(
+            init_data_gemini, "refresh_monthly_prices", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                finalize_bulk_load(self.db_path)
+
+        self.assertEqual(_rows(self.conn), [])
+        self.assertEqual(_primary_key(self.conn), ["Symbol", "Date"])
+        self.assertEqual(len(_rows(self.conn, STAGING_TABLE)), len(self.original) + 1)
+        self.assertFalse(_table_exists(self.conn, "stock_price_new"))
+
+        # 실패 후 다시 실행하면 정상적으로 옮겨집니다.
+        self.assertEqual(finalize_bulk_load(self.db_path), len(self.original))
+
+    def test_failure_with_existing_rows_rolls_back(self):
+        kept = self.original[:5]
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO stock_price ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                kept,
+            )
+        with mock.patch.object(
+            init_data_gemini, "refresh_monthly_prices", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                finalize_bulk_load(self.db_path)
+
+        self.assertEqual(_rows(self.conn), kept)
+        self.assertTrue(_table_exists(self.conn, STAGING_TABLE))
+
+
+class MonthlyRefreshTest(IngestionTestCase):
+    """
+    변경된 행이 있는 종목의 가장 이른 변경일이 속한 달부터만 월말 종가를 다시 계산하는지 확인합니다.
+
+    기록 전에 월말 테이블 전체를 표시값으로 바꿔 두고, 기록 후 다시 계산된 행만 표시값이 아닌지 봅니다.
+    """
+
+    MARK = -1.0
+
+    def setUp(self):
+        super().setUp()
+        symbols = [
+            r[0]
+            for r in self.conn.execute(
+                "SELECT DISTINCT Symbol FROM stock_price ORDER BY Symbol"
+            )
+        ]
+        self.early, self.late = symbols[0], symbols[1]
+        self.dates = {
+            symbol: [
+                r[0]
+                for r in self.conn.execute(
+                    "SELECT Date FROM stock_price WHERE Symbol = ? ORDER BY Date",
+                    (symbol,),
+                )
+            ]
+            for symbol in (self.early, self.late)
+        }
+
+    def _changed_rows(self):
+        """early 는 이력 중간의 여러 날, late 는 마지막 달의 하루와 새 거래일 하나를 바꿉니다."""
+        early_dates = self.dates[self.early]
+        late_dates = self.dates[self.late]
+        middle = len(early_dates) // 2
+        rows = [
+            (self.early, day, 1.0, 1.0, 1.0, 1000.0 + i, 1, 0.0)
+            for i, day in enumerate(early_dates[middle : middle + 40 : 7])
+        ]
+        rows += [
+            (self.late, late_dates[-3], 1.0, 1.0, 1.0, 2000.0, 1, 0.0),
+            (self.late, "2099-01-04", 1.0, 1.0, 1.0, 3000.0, 1, 0.0),
+        ]
+        since = {self.early: early_dates[middle], self.late: late_dates[-3]}
+        return rows, since
+
+    def _mark_monthly(self):
+        with self.conn:
+            self.conn.execute(f"UPDATE {MONTHLY_TABLE} SET Close = ?", (self.MARK,))
+
+    def _check(self, since):
+        monthly = _monthly(self.conn)
+        expected = _expected_monthly(self.conn)
+        self.assertEqual(set(monthly), set(expected))
+        for key, (day, close) in monthly.items():
+            symbol, month = key
+            with self.subTest(symbol=symbol, month=month):
+                if symbol in since and month >= since[symbol][:7]:
+                    self.assertEqual((day, close), expected[key])
+                else:
+                    self.assertEqual(close, self.MARK)
+
+    def test_write_price_rows(self):
+        rows, since = self._changed_rows()
+        self._mark_monthly()
+        write_price_rows(self.conn, rows)
+        self._check(since)
+
+    def test_finalize_bulk_load_with_existing_rows(self):
+        rows, since = self._changed_rows()
+        # 같은 종목의 이후 날짜를 먼저 적재해도 가장 이른 적재일이 기준입니다.
+        self._stage(rows[::-1])
+        self._mark_monthly()
+        self.assertEqual(finalize_bulk_load(self.db_path), len(rows))
+        self._check(since)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+# test_partitioned_output.py
+"""
+PartitionedResultWriter 의 체크포인트 재시작과 설정이 다른 체크포인트 처리를 확인합니다.
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from dca_engine import RESULT_COLUMNS
+from partitioned_output import (
+    MANIFEST_FILE,
+    PartitionedResultWriter,
+    export_csv,
+    load_results,
+    read_config,
+)
+
+CONFIG = {
+    "db_path": "stock_price.db",
+    "data_version": 10,
+    "markets": ["NASDAQ"],
+    "monthly_investment": 1000,
+    "purchase_rule": "first",
+    "start_date": "2016-10-17",
+    "end_date": "2026-10-17",
+}
+
+
+def _frame(symbols, months=3):
+    dates = pd.date_range("2020-01-31", periods=months, freq="ME").astype(
+        "datetime64[ns]"
+    )
+    rows = []
+    for symbol in symbols:
+        i = ord(symbol[0])
+        for j, date in enumerate(dates):
+            rows.append(
+                (symbol, date, 1000 * (j + 1), 1000.5 * (j + 1) + i, 2.5 * j, 0.05 * j)
+            )
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def _results(output_dir):
+    """기록된 결과 (파티션 순서가 아닌 종목, 날짜 순)."""
+    return load_results(output_dir).sort_values(["Symbol", "Date"], ignore_index=True)
+
+
+class PartitionedResultWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.directory, "results.parts")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _manifest(self):
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def _write_first_run(self):
+        writer = PartitionedResultWriter(self.output_dir, CONFIG, partitions=4)
+        writer.write(["AAA", "BBB"], _frame(["AAA", "BBB"]))
+        writer.write(["CCC", "DDD"], _frame(["CCC"]))
+        return writer
+
+    def test_resume_skips_completed_tasks(self):
+        self._write_first_run()
+        # 세 번째 작업을 기록하다 끊긴 상태: 결과 파일은 있지만 manifest 줄이 불완전합니다.
+        with open(
+            os.path.join(self.output_dir, MANIFEST_FILE), "a", encoding="utf-8"
+        ) as f:
+            f.write('{"symbols": ["EEE"], "par')
+
+        writer = PartitionedResultWriter(self.output_dir, dict(CONFIG), partitions=4)
+        self.assertTrue(writer.resumed)
+        # 결과가 없던 DDD 도 완료된 작업에 포함됩니다.
+        self.assertEqual(writer.completed_symbols, {"AAA", "BBB", "CCC", "DDD"})
+        self.assertEqual((writer.tasks, writer.rows), (2, 9))
+        self.assertEqual(len(self._manifest()), 3)
+
+        writer.write(["EEE"], _frame(["EEE"]))
+        expected = _frame(["AAA", "BBB", "CCC", "EEE"])
+        pd.testing.assert_frame_equal(_results(self.output_dir), expected)
+        self.assertEqual(
+            export_csv(self.output_dir, os.path.join(self.directory, "out.csv")), 12
+        )
+
+    def test_resume_redoes_tasks_with_missing_files(self):
+        self._write_first_run()
+        entries = [json.loads(line) for line in self._manifest()]
+        os.remove(os.path.join(self.output_dir, entries[1]["parts"][0]))
+
+        writer = PartitionedResultWriter(self.output_dir, CONFIG, partitions=4)
+        self.assertEqual(writer.completed_symbols, {"CCC", "DDD"})
+        self.assertEqual(len(self._manifest()), 2)
+        # 남은 파일과 겹치지 않는 순번으로 기록합니다.
+        writer.write(["AAA", "BBB"], _frame(["AAA", "BBB"]))
+        pd.testing.assert_frame_equal(
+            _results(self.output_dir), _frame(["AAA", "BBB", "CCC"])
+        )
+
+    def test_config_mismatch_keeps_checkpoint(self):
+        self._write_first_run()
+        before = self._manifest()
+        parts = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.output_dir)
+            for name in names
+        )
+
+        for changed in ({"data_version": 11}, {"purchase_rule": "last"}):
+            with self.assertRaises(FileExistsError):
+                PartitionedResultWriter(
+                    self.output_dir, {**CONFIG, **changed}, partitions=4
+                )
+        with self.assertRaises(FileExistsError):
+            PartitionedResultWriter(self.output_dir, CONFIG, partitions=8)
+
+        self.assertEqual(self._manifest(), before)
+        self.assertTrue(all(os.path.exists(path) for path in parts))
+        self.assertEqual(read_config(self.output_dir), CONFIG)
+
+    def test_restart_replaces_checkpoint(self):
+        self._write_first_run()
+        config = {**CONFIG, "data_version": 11}
+        writer = PartitionedResultWriter(
+            self.output_dir, config, partitions=4, resume=False
+        )
+        self.assertFalse(writer.resumed)
+        self.assertEqual(len(self._manifest()), 1)
+        self.assertEqual(read_config(self.output_dir), config)
+        self.assertTrue(load_results(self.output_dir).empty)
+
+    def test_refuses_unrelated_directory(self):
+        os.makedirs(self.output_dir)
+        with open(os.path.join(self.output_dir, "notes.txt"), "w") as f:
+            f.write("x")
+        for resume in (True, False):
+            with self.assertRaises(FileExistsError):
+                PartitionedResultWriter(self.output_dir, CONFIG, resume=resume)
+        self.assertEqual(os.listdir(self.output_dir), ["notes.txt"])
+        self.assertIsNone(read_config(self.output_dir))
+
+    def test_column_types_round_trip(self):
+        writer = PartitionedResultWriter(self.output_dir, CONFIG, partitions=4)
+        frame = _frame(["AAA"])
+        writer.write(["AAA"], frame)
+        loaded = load_results(self.output_dir)
+        self.assertEqual(list(loaded.dtypes), list(frame.dtypes))
+        self.assertTrue(np.issubdtype(loaded["TotalInvestment"].dtype, np.integer))
+
+
+if __name__ == "__main__":
+    unittest.main()
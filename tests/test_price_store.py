@@ -0,0 +1,124 @@
+# test_price_store.py
+"""
+update_price_store 의 증분 갱신이 전체 재구성(rebuild=True), SQLite 피벗과 같은 행렬을 만드는지
+합성 DB(synthetic_db.generate_database)로 확인합니다.
+
+증분 갱신 경로: 끝에 날짜 추가(제자리 기록), 기존 행 교체, 새 종목(열 추가), 중간 날짜 삽입(재배치)
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+from init_data_gemini import PRICE_COLUMNS, configure_connection, write_price_rows
+from price_store import get_data_version, load_price_matrix, update_price_store
+from synthetic_db import generate_database
+
+
+class UpdatePriceStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "synthetic.db")
+        generate_database(
+            self.db_path, n_symbols=6, years=2, seed=13, build_price_store=True
+        )
+        self.conn = sqlite3.connect(self.db_path)
+        configure_connection(self.conn)
+        self.symbols = [
+            r[0]
+            for r in self.conn.execute(
+                "SELECT DISTINCT Symbol FROM stock_price ORDER BY Symbol"
+            )
+        ]
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, rows):
+        write_price_rows(self.conn, rows)
+
+    def _existing(self, symbol, position):
+        return self.conn.execute(
+            f"SELECT {', '.join(PRICE_COLUMNS)} FROM stock_price WHERE Symbol = ? "
+            "ORDER BY Date LIMIT 1 OFFSET ?",
+            (symbol, position),
+        ).fetchone()
+
+    def _sqlite_matrix(self):
+        df = pd.read_sql_query("SELECT Date, Symbol, Close FROM stock_price", self.conn)
+        df["Date"] = pd.to_datetime(df["Date"]).astype("datetime64[ns]")
+        pivot = df.pivot(index="Date", columns="Symbol", values="Close")
+        return pivot.rename_axis(index="date", columns="ticker")
+
+    def _store_matrix(self):
+        df = load_price_matrix(self.db_path)
+        self.assertIsNotNone(df)
+        # memmap 뷰이므로 저장소를 다시 만들기 전에 복사합니다.
+        return df.sort_index(axis=1).copy()
+
+    def _check_incremental(self, rows):
+        self._write(rows)
+        n_rows = update_price_store(self.db_path)
+        self.assertEqual(n_rows, len(rows))
+        incremental = self._store_matrix()
+        pd.testing.assert_frame_equal(
+            incremental, self._sqlite_matrix(), check_freq=False
+        )
+
+        update_price_store(self.db_path, rebuild=True)
+        pd.testing.assert_frame_equal(incremental, self._store_matrix())
+
+    def test_store_is_current_after_generation(self):
+        self.assertEqual(update_price_store(self.db_path), 0)
+        pd.testing.assert_frame_equal(
+            self._store_matrix(), self._sqlite_matrix(), check_freq=False
+        )
+
+    def test_append_dates(self):
+        self._check_incremental(
+            [
+                (s, "2026-01-05", 1.0, 1.0, 1.0, 10.0 + i, 1, 0.0)
+                for i, s in enumerate(self.symbols[:4])
+            ]
+            + [(self.symbols[0], "2026-01-06", 1.0, 1.0, 1.0, 20.0, 1, 0.0)]
+        )
+
+    def test_replace_existing_rows(self):
+        rows = [self._existing(s, 100) for s in self.symbols[:3]]
+        self._check_incremental([row[:5] + (row[5] * 2,) + row[6:] for row in rows])
+
+    def test_new_symbol(self):
+        self._check_incremental(
+            [
+                ("NEW00001", day, 1.0, 1.0, 1.0, 5.0, 1, 0.0)
+                for (day,) in self.conn.execute(
+                    "SELECT DISTINCT Date FROM stock_price ORDER BY Date DESC LIMIT 30"
+                )
+            ]
+        )
+
+    def test_insert_date_in_the_middle(self):
+        # 주말 날짜는 합성 달력에 없으므로 기존 날짜 축 중간에 끼어듭니다.
+        self._check_incremental(
+            [(self.symbols[1], "2025-06-07", 1.0, 1.0, 1.0, 7.0, 1, 0.0)]
+        )
+
+    def test_stale_store_is_not_used(self):
+        row = self._existing(self.symbols[0], 5)
+        self._write([row])
+        self.assertIsNone(load_price_matrix(self.db_path))
+        update_price_store(self.db_path)
+        self.assertIsNotNone(load_price_matrix(self.db_path))
+        self.assertEqual(
+            get_data_version(self.db_path),
+            self.conn.execute("SELECT MAX(rowid) FROM stock_price").fetchone()[0],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
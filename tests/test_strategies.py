@@ -0,0 +1,206 @@
+# test_strategies.py
+"""
+strategy_target_weights(벡터화 구현)가 날짜별 기준 구현 decide_* 와 같은 목표를 내는지 확인합니다.
+
+합성 DB(synthetic_db.generate_database)의 전략 ETF 시세로 지표를 만들고, 다음 구간을 섞어 비교합니다.
+- 데이터 앞부분: 모멘텀/이동평균이 아직 모두 NaN 인 날
+- 방어/카나리아 종목을 지운 구간: idxmax 대상이 모두 NaN 인 날 (벡터화 구현은 목표를 정하지 않음)
+- 공격 종목 대부분을 지운 구간: nlargest 가 NaN 종목으로 채워지는 날
+- QQQ 를 SPY 와 같은 시세로 바꾼 구간: 같은 값의 순서(앞선 종목 우선)
+
+be/strategies.py 도 같은 비교를 실행합니다. (BeStrategyTargetWeightsTest)
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from config import STRATEGY_ASSETS
+from data_handler import compute_strategy_data, load_data
+from portfolio_manager import row_targets
+import strategies
+from synthetic_db import generate_database
+
+STRATEGIES = ("haa", "daa", "laa")
+BE_STRATEGIES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "be", "strategies.py"
+)
+
+
+def _load_be_strategies():
+    """be/strategies.py 를 루트 strategies 와 겹치지 않는 이름으로 읽습니다."""
+    spec = importlib.util.spec_from_file_location("be_strategies", BE_STRATEGIES_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _strategy_tickers():
+    return sorted(
+        {
+            t
+            for assets in STRATEGY_ASSETS.values()
+            for group in assets.values()
+            for t in group
+        }
+    )
+
+
+def _blank(stock_data, tickers, start, stop):
+    """stock_data 의 [start, stop) 비율 구간에서 tickers 시세를 지웁니다."""
+    n = len(stock_data)
+    stock_data.iloc[
+        int(n * start) : int(n * stop), [stock_data.columns.get_loc(t) for t in tickers]
+    ] = np.nan
+
+
+def _expected(
+    module, strategy, date, stock_data, monthly_prices, momentum_data, daily_data
+):
+    """
+    decide_* 의 목표를 [(종목, 비중), ...] 로 반환합니다. 목표를 정하지 못하면 [].
+
+    모두 NaN 인 idxmax 는 pandas 2 에서는 경고 후 NaN 을, pandas 3 에서는 예외를 내므로
+    NaN 종목이 고른 목표는 [] 로 보고, 예외가 나면 기준이 없는 날로 None 을 반환합니다.
+    (이런 날의 동작은 test_all_nan_pick_dates 에서 따로 확인합니다.)
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            if strategy == "haa":
+                target = module.decide_haa_portfolio(
+                    date, monthly_prices, momentum_data
+                )
+            elif strategy == "daa":
+                target = module.decide_daa_portfolio(date, momentum_data)
+            else:
+                current_prices = stock_data.loc[stock_data.index.asof(date)]
+                target = module.decide_laa_portfolio(date, current_prices, daily_data)
+    except (ValueError, TypeError):
+        return None
+    if any(pd.isna(ticker) for ticker in target):
+        return []
+    return list(target.items())
+
+
+def _actual(weights, order, row):
+    positions, values = row_targets(weights.to_numpy()[row], order.to_numpy()[row])
+    return [(weights.columns[p], v) for p, v in zip(positions, values)]
+
+
+class StrategyTargetWeightsTest(unittest.TestCase):
+    module = strategies
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        db_path = os.path.join(cls.directory, "synthetic.db")
+        generate_database(db_path, n_symbols=2, years=8, seed=3)
+        stock_data = load_data(db_path, _strategy_tickers(), "1990-01-01")
+        _blank(stock_data, ["IEF", "BIL", "LQD", "TLT"], 0.30, 0.45)
+        _blank(stock_data, ["EEM", "EFA", "AGG"], 0.40, 0.55)
+        _blank(stock_data, ["SPY"], 0.50, 0.52)
+        offensive = STRATEGY_ASSETS["daa"]["offensive"]
+        _blank(
+            stock_data, [t for t in offensive if t not in ("GLD", "HYG")], 0.70, 0.78
+        )
+        tie_start = stock_data.index[int(len(stock_data) * 0.8)]
+        tie = stock_data.index >= tie_start
+        stock_data.loc[tie, "QQQ"] = stock_data.loc[tie, "SPY"]
+        cls.stock_data = stock_data
+        cls.monthly_prices, cls.momentum_data, cls.daily_data = compute_strategy_data(
+            stock_data
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def _dates(self, strategy):
+        if strategy == "laa":
+            # 월말(휴장일 포함)과 임의의 거래일에서 asof 동작을 함께 확인합니다.
+            dates = self.monthly_prices.index.union(self.stock_data.index[::7])
+            return dates[dates >= self.stock_data.index[0]]
+        return self.monthly_prices.index
+
+    def _targets(self, strategy, dates):
+        return self.module.strategy_target_weights(
+            strategy,
+            dates,
+            self.stock_data,
+            self.monthly_prices,
+            self.momentum_data,
+            self.daily_data,
+        )
+
+    def test_matches_decide_functions(self):
+        for strategy in STRATEGIES:
+            dates = self._dates(strategy)
+            weights, order = self._targets(strategy, dates)
+            compared = undecided = 0
+            for row, date in enumerate(dates):
+                expected = _expected(
+                    self.module,
+                    strategy,
+                    date,
+                    self.stock_data,
+                    self.monthly_prices,
+                    self.momentum_data,
+                    self.daily_data,
+                )
+                if expected is None:
+                    continue
+                compared += 1
+                undecided += not expected
+                with self.subTest(strategy=strategy, date=date):
+                    self.assertEqual(_actual(weights, order, row), expected)
+            # 목표를 정하는 날이 충분히 비교되어야 합니다.
+            self.assertGreater(compared - undecided, len(dates) // 4, strategy)
+
+    def test_all_nan_pick_dates(self):
+        """idxmax 대상 종목이 모두 NaN 인 날: 그 그룹을 골라야 하면 목표를 정하지 않고, 아니면 다른 그룹에서 고릅니다."""
+        dates = self.monthly_prices.index
+        momentum = self.momentum_data
+
+        # DAA: 카나리아와 방어 종목이 모두 NaN -> 방어 모드지만 고를 종목이 없음
+        daa = STRATEGY_ASSETS["daa"]
+        daa_momentum = momentum["daa_momentum"].loc[dates]
+        rows = np.flatnonzero(
+            daa_momentum[daa["canary"]].isna().all(axis=1).to_numpy()
+            & daa_momentum[daa["defensive"]].isna().all(axis=1).to_numpy()
+        )
+        self.assertGreater(len(rows), 0)
+        _, order = self._targets("daa", dates)
+        self.assertTrue((order.to_numpy()[rows] == -1).all())
+
+        # HAA: 방어 종목 모멘텀이 모두 NaN 인 날
+        haa = STRATEGY_ASSETS["haa"]
+        canary = haa["canary"][0]
+        price = self.monthly_prices.loc[dates, canary].to_numpy()
+        sma = momentum["sma_12_month"].loc[dates, canary].to_numpy()
+        defensive_missing = (
+            momentum["roc_6"].loc[dates, haa["defensive"]].isna().all(axis=1).to_numpy()
+        )
+        weights, order = self._targets("haa", dates)
+        risk_off = defensive_missing & (price <= sma)
+        risk_on = defensive_missing & (price > sma)
+        self.assertGreater(risk_off.sum(), 0)
+        self.assertGreater(risk_on.sum(), 0)
+        self.assertTrue((order.to_numpy()[risk_off] == -1).all())
+        for row in np.flatnonzero(risk_on):
+            pick = momentum["roc_6"].loc[dates[row], haa["offensive"]].idxmax()
+            self.assertEqual(_actual(weights, order, row), [(pick, 1.0)])
+
+
+class BeStrategyTargetWeightsTest(StrategyTargetWeightsTest):
+    module = _load_be_strategies()
+
+
+if __name__ == "__main__":
+    unittest.main()
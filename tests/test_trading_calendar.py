@@ -0,0 +1,178 @@
+# test_trading_calendar.py
+"""
+거래일 달력(trading_calendar)을 합성 DB(synthetic_db.generate_database)로 확인합니다.
+
+- load_trading_days: 저장된 달력의 증분 갱신이 처음부터 만든 달력과 같은지,
+  테이블이 없는 시장을 저장하지 않는지
+- month_positions: 월별 첫/마지막 거래일의 행 번호가 index.asof 와 같은지
+
+실행: python -m unittest (저장소 루트에서)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+import trading_calendar
+from init_data_gemini import (
+    configure_connection,
+    save_market_info_to_db,
+    write_price_rows,
+)
+from synthetic_db import SYNTHETIC_MARKETS, generate_database
+from trading_calendar import (
+    ALL_MARKETS,
+    get_calendar_path,
+    load_trading_days,
+    month_positions,
+)
+
+MISSING_MARKET = "NEW_MARKET"
+
+
+class LoadTradingDaysTest(unittest.TestCase):
+    def setUp(self):
+        trading_calendar._LOADED.clear()
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "synthetic.db")
+        generate_database(self.db_path, n_symbols=6, years=2, seed=19)
+
+    def tearDown(self):
+        trading_calendar._LOADED.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _expected(self, market):
+        """stock_price 에서 직접 구한 시장의 시세일."""
+        with sqlite3.connect(self.db_path) as conn:
+            if market == ALL_MARKETS:
+                query = "SELECT DISTINCT Date FROM stock_price"
+            else:
+                query = (
+                    "SELECT DISTINCT Date FROM stock_price "
+                    f'WHERE Symbol IN (SELECT Symbol FROM "{market}")'
+                )
+            days = [row[0] for row in conn.execute(query)]
+        return pd.DatetimeIndex(sorted(pd.to_datetime(days)))
+
+    def _assert_days(self, calendars):
+        for market, days in calendars.items():
+            with self.subTest(market=market):
+                pd.testing.assert_index_equal(
+                    days, self._expected(market), check_names=False, exact=False
+                )
+
+    def _fresh(self, markets):
+        """프로세스 안의 달력과 저장된 파일 없이 처음부터 만든 달력."""
+        trading_calendar._LOADED.clear()
+        os.remove(get_calendar_path(self.db_path))
+        return load_trading_days(self.db_path, markets)
+
+    def _symbol(self, market):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(f'SELECT Symbol FROM "{market}" LIMIT 1').fetchone()[0]
+
+    def _write(self, rows):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            configure_connection(conn)
+            write_price_rows(conn, rows)
+        finally:
+            conn.close()
+
+    def test_incremental_update_matches_fresh_build(self):
+        markets = SYNTHETIC_MARKETS + [ALL_MARKETS]
+        self._assert_days(load_trading_days(self.db_path, markets))
+
+        # 한 시장에만 새 거래일, 다른 시장에는 주말 날짜(기존 거래일 사이)를 더합니다.
+        nasdaq, nyse = (self._symbol(market) for market in SYNTHETIC_MARKETS)
+        self._write(
+            [
+                (nasdaq, "2026-01-05", 1.0, 1.0, 1.0, 1.0, 1, 0.0),
+                (nyse, "2025-06-07", 1.0, 1.0, 1.0, 1.0, 1, 0.0),
+            ]
+        )
+        # 같은 프로세스의 달력과 저장된 파일 모두 새 버전으로 갱신되어야 합니다.
+        incremental = load_trading_days(self.db_path, markets)
+        self._assert_days(incremental)
+        trading_calendar._LOADED.clear()
+        self._assert_days(load_trading_days(self.db_path, markets))
+
+        fresh = self._fresh(markets)
+        for market in markets:
+            pd.testing.assert_index_equal(incremental[market], fresh[market])
+
+    def test_missing_market_table_is_not_persisted(self):
+        calendars = load_trading_days(
+            self.db_path, [SYNTHETIC_MARKETS[0], MISSING_MARKET]
+        )
+        self.assertEqual(len(calendars[MISSING_MARKET]), 0)
+        entry = pd.read_pickle(get_calendar_path(self.db_path))
+        self.assertIn(SYNTHETIC_MARKETS[0], entry["markets"])
+        self.assertNotIn(MISSING_MARKET, entry["markets"])
+
+        # 나중에 테이블이 생기면 이전에 저장된 시세까지 처음부터 읽습니다.
+        save_market_info_to_db(
+            self.db_path,
+            MISSING_MARKET,
+            pd.DataFrame(
+                {"Symbol": [self._symbol(SYNTHETIC_MARKETS[1])], "Name": ["x"]}
+            ),
+        )
+        calendars = load_trading_days(self.db_path, [MISSING_MARKET])
+        self.assertGreater(len(calendars[MISSING_MARKET]), 0)
+        self._assert_days(calendars)
+
+    def test_recreated_database_rebuilds_calendar(self):
+        load_trading_days(self.db_path, SYNTHETIC_MARKETS)
+        path = get_calendar_path(self.db_path)
+        saved = path + ".saved"
+        shutil.copyfile(path, saved)
+        # DB 만 새로 만들어지고 이전 DB 의 달력 파일이 남은 경우 (버전이 줄어듦)
+        generate_database(self.db_path, n_symbols=3, years=1, seed=23)
+        os.replace(saved, path)
+        self._assert_days(load_trading_days(self.db_path, SYNTHETIC_MARKETS))
+        trading_calendar._LOADED.clear()
+        self._assert_days(load_trading_days(self.db_path, SYNTHETIC_MARKETS))
+
+
+class MonthPositionsTest(unittest.TestCase):
+    def setUp(self):
+        # 날짜 축에는 없는 거래일과, 거래일이 하나도 없는 달(2024-03)을 섞습니다.
+        self.dates = pd.DatetimeIndex(
+            ["2024-01-03", "2024-01-10", "2024-01-31", "2024-02-02", "2024-02-27"]
+            + ["2024-03-15", "2024-04-01", "2024-04-30", "2024-05-02"]
+        )
+        self.trading_days = pd.DatetimeIndex(
+            ["2023-12-29", "2024-01-02", "2024-01-30", "2024-02-01", "2024-02-28"]
+            + ["2024-04-01", "2024-04-29", "2024-05-31"]
+        )
+
+    def _expected(self, rule):
+        expected = []
+        for month in pd.period_range(self.dates[0], self.dates[-1], freq="M"):
+            days = self.trading_days[self.trading_days.to_period("M") == month]
+            if len(days) == 0:
+                expected.append(-1)
+                continue
+            day = days[0] if rule == "first" else days[-1]
+            asof = self.dates.asof(day)
+            expected.append(-1 if pd.isna(asof) else self.dates.get_loc(asof))
+        return expected
+
+    def test_matches_asof_of_first_and_last_trading_days(self):
+        for rule in ("first", "last"):
+            with self.subTest(rule=rule):
+                self.assertEqual(
+                    month_positions(self.dates, self.trading_days, rule).tolist(),
+                    self._expected(rule),
+                )
+
+    def test_rejects_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            month_positions(self.dates, self.trading_days, "middle")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+stock_price 에 저장된 실제 시세일로 만든 시장별 거래일 달력.
+
+시장은 종목 목록 테이블(KRX, ETF_US, NASDAQ 등)이며, 시장의 거래일은 그 시장 종목 중
+하나라도 시세가 저장된 날입니다. 공휴일 라이브러리로 추정한 날과 달리 임시 휴장일이나
+데이터가 없는 날을 고를 일이 없습니다.
+
+거래일은 DB 파일 옆의 '<DB 이름>.calendar.pkl' 에 데이터 버전(stock_price 의 MAX(rowid))과
+함께 저장합니다.
+- 버전이 같으면 저장된 거래일을 그대로 사용합니다. (같은 프로세스에서는 파일도 다시 읽지 않습니다.)
+- 버전이 올라갔으면 'rowid > 이전 버전' 인 행의 날짜만 읽어 기존 거래일에 더합니다.
+  (저장된 거래일이 비어 있던 시장은 처음부터 다시 읽고, 테이블이 없어 읽지 못한 시장은 저장하지 않습니다.)
+
+month_positions 는 '각 월의 첫/마지막 거래일' 을 날짜 축(예: 종가 패널)의 행 번호로 돌려주므로
+엔진은 날짜 대신 정수 위치로 매수일을 다룰 수 있습니다.
+"""
+
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from price_store import get_data_version
+
+CALENDAR_FORMAT_VERSION: int = 1
+# 종목 목록 테이블과 관계없이 stock_price 전체의 시세일로 만든 달력의 이름
+ALL_MARKETS: str = "*"
+PURCHASE_RULES = ("first", "last")
+
+# 프로세스 안의 달력: DB 경로 -> {"data_version": 버전, "markets": {시장: 거래일 배열}}
+_LOADED: Dict[str, dict] = {}
+
+
+def get_calendar_path(db_path: str) -> str:
+    """DB 파일 옆에 위치한 거래일 달력 파일 경로를 반환합니다."""
+    root, _ = os.path.splitext(db_path)
+    return root + ".calendar.pkl"
+
+
+def month_number(dates: pd.DatetimeIndex) -> np.ndarray:
+    """날짜를 '연*12 + (월-1)' 형태의 월 번호로 변환합니다."""
+    return np.asarray(dates.year * 12 + dates.month - 1, dtype=np.int64)
+
+
+def _read_calendar(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        entry = pd.read_pickle(path)
+    except Exception:
+        return None
+    if entry.get("format") != CALENDAR_FORMAT_VERSION:
+        return None
+    return entry
+
+
+def _write_calendar(path: str, entry: dict) -> None:
+    # 여러 프로세스가 동시에 기록해도 서로의 임시 파일을 건드리지 않도록 이름을 따로 만듭니다.
+    fd, tmp_path = tempfile.mkstemp(
+        suffix=".tmp", dir=os.path.dirname(os.path.abspath(path))
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pd.to_pickle({**entry, "format": CALENDAR_FORMAT_VERSION}, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _market_days(
+    conn: sqlite3.Connection, market: str, since_version: int, until_version: int
+) -> Optional[np.ndarray]:
+    """
+    rowid 가 (since_version, until_version] 인 행 중 market 종목의 시세일 (datetime64[D]).
+
+    market 테이블이 없으면 None 을 반환합니다.
+    """
+    if market == ALL_MARKETS:
+        query = "SELECT DISTINCT Date FROM stock_price WHERE rowid > ? AND rowid <= ?"
+    else:
+        query = f"""
+            SELECT DISTINCT p.Date FROM stock_price p
+            WHERE p.rowid > ? AND p.rowid <= ?
+              AND p.Symbol IN (SELECT Symbol FROM "{market}")
+        """
+    try:
+        rows = conn.execute(query, (since_version, until_version)).fetchall()
+    except sqlite3.OperationalError:
+        print(f"경고: '{market}' 테이블을 찾을 수 없어 빈 거래일 달력을 사용합니다.")
+        return None
+    if not rows:
+        return np.empty(0, dtype="datetime64[D]")
+    days = pd.to_datetime(pd.Series([row[0] for row in rows])).to_numpy()
+    return np.unique(days.astype("datetime64[D]"))
+
+
+def load_trading_days(
+    db_path: str, markets: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DatetimeIndex]:
+    """
+    시장별 거래일({시장: 정렬된 DatetimeIndex})을 반환합니다.
+
+    markets 를 지정하지 않으면 stock_price 전체의 시세일로 만든 달력 하나({ALL_MARKETS: ...})를 반환합니다.
+    캐시된 달력이 최신이 아니면 변경된 행만 읽어 갱신하고 저장합니다.
+    """
+    markets = [ALL_MARKETS] if markets is None else list(dict.fromkeys(markets))
+    version = get_data_version(db_path)
+    path = get_calendar_path(db_path)
+    key = os.path.abspath(db_path)
+
+    entry = _LOADED.get(key)
+    if entry is None or entry["data_version"] != version:
+        entry = _read_calendar(path) or {"data_version": 0, "markets": {}}
+    if entry["data_version"] > version:
+        # DB 가 새로 만들어져 버전이 줄었으면 처음부터 다시 만듭니다.
+        entry = {"data_version": 0, "markets": {}}
+
+    stale = entry["data_version"] < version
+    missing = [market for market in markets if market not in entry["markets"]]
+    if stale or missing:
+        with sqlite3.connect(db_path) as conn:
+            updated = {}
+            for market, days in entry["markets"].items():
+                # 비어 있던 시장은 이전 행에도 시세가 있을 수 있으므로 처음부터 다시 읽습니다.
+                since = entry["data_version"] if len(days) else 0
+                new_days = _market_days(conn, market, since, version)
+                if new_days is not None:
+                    updated[market] = np.union1d(days, new_days) if since else new_days
+            for market in missing:
+                days = _market_days(conn, market, 0, version)
+                if days is not None:
+                    updated[market] = days
+        entry = {"data_version": version, "markets": updated}
+        try:
+            _write_calendar(path, entry)
+        except OSError:
+            pass
+    _LOADED[key] = entry
+    # 테이블이 없어 읽지 못한 시장은 저장하지 않고 이번 호출에만 빈 달력을 사용합니다.
+    empty = np.empty(0, dtype="datetime64[D]")
+    return {
+        market: pd.DatetimeIndex(entry["markets"].get(market, empty))
+        for market in markets
+    }
+
+
+def load_symbol_markets(db_path: str, markets: Iterable[str]) -> Dict[str, str]:
+    """종목 목록 테이블에서 {종목: 시장} 을 만듭니다. 여러 시장에 있으면 앞에 지정한 시장을 사용합니다."""
+    symbol_markets: Dict[str, str] = {}
+    with sqlite3.connect(db_path) as conn:
+        for market in markets:
+            try:
+                rows = conn.execute(f'SELECT Symbol FROM "{market}"').fetchall()
+            except sqlite3.OperationalError:
+                continue
+            for (symbol,) in rows:
+                symbol_markets.setdefault(symbol, market)
+    return symbol_markets
+
+
+def month_positions(
+    dates: pd.DatetimeIndex, trading_days: pd.DatetimeIndex, rule: str
+) -> np.ndarray:
+    """
+    dates 의 첫 월부터 마지막 월까지 각 월의 첫('first')/마지막('last') 거래일이 dates 의 몇 번째 행인지 반환합니다.
+
+    거래일이 dates 에 없으면 그 이전의 마지막 행(index.asof 와 동일)을 사용하며,
+    그 월에 거래일이 없거나 거래일이 dates 보다 앞서면 -1 입니다.
+    """
+    if rule not in PURCHASE_RULES:
+        raise ValueError(f"알 수 없는 매수 규칙입니다: {rule}")
+    if len(dates) == 0:
+        return np.empty(0, dtype=np.int64)
+    row_months = month_number(dates)
+    months = np.arange(row_months[0], row_months[-1] + 1)
+    if len(trading_days) == 0:
+        return np.full(len(months), -1, dtype=np.int64)
+
+    day_months = month_number(trading_days)
+    if rule == "first":
+        anchors = np.searchsorted(day_months, months, side="left")
+    else:
+        anchors = np.searchsorted(day_months, months, side="right") - 1
+    anchors = np.clip(anchors, 0, len(trading_days) - 1)
+    has_day = day_months[anchors] == months
+    rows = dates.searchsorted(trading_days[anchors], side="right") - 1
+    return np.where(has_day, rows, -1).astype(np.int64)
+
+
+def market_positions(
+    dates: pd.DatetimeIndex,
+    symbols: List[str],
+    trading_days: Dict[str, pd.DatetimeIndex],
+    symbol_markets: Dict[str, str],
+    rule: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    시장별 매수 행 번호 (월 x 시장) 와 종목별 시장 번호를 반환합니다.
+
+    positions[:, codes] 가 종목별 매수 행 번호 (월 x 종목) 입니다.
+    시장을 알 수 없는 종목은 마지막 열(dates 자체를 거래일로 본 달력)을 사용합니다.
+    """
+    names = list(trading_days)
+    positions = np.stack(
+        [month_positions(dates, trading_days[name], rule) for name in names]
+        + [month_positions(dates, dates, rule)],
+        axis=1,
+    )
+    codes = np.array(
+        [
+            names.index(symbol_markets[symbol])
+            if symbol_markets.get(symbol) in trading_days
+            else len(names)
+            for symbol in symbols
+        ],
+        dtype=np.int64,
+    )
+    return positions, codes